@@ -0,0 +1,95 @@
+"""
+Admission control
+One process can only time so many games: once it is overloaded every
+game's timers drift together. The controller keeps smoothed measures of how
+loaded the process is:
+
+- scheduling lag: how late a background probe wakes from a fixed sleep,
+  which is how long any handler or timer thread waits for the interpreter
+- timer drift: how late game timers (question, voting, round gaps) fire
+- emit backlog: emits queued on the broadcast workers
+
+When any of them passes its limit the process is overloaded. New games are
+refused with a retryable error and /readyz turns 503 so a load balancer
+sends new games elsewhere. Games already running are never affected. The
+process is admitting again once every measure is back under RECOVER_RATIO
+of its limit, so readiness does not flap at the threshold. A probe taken
+while no game timer has fired since the last one counts as zero drift, so
+an overloaded process whose timers have stopped firing still recovers.
+"""
+
+import os
+import threading
+
+LAG_LIMIT = float(os.getenv('ADMISSION_LAG_LIMIT', '0.2'))
+DRIFT_LIMIT = float(os.getenv('ADMISSION_DRIFT_LIMIT', '0.5'))
+BACKLOG_LIMIT = int(os.getenv('ADMISSION_BACKLOG_LIMIT', '5000'))
+PROBE_INTERVAL = 0.5
+# Weight of the newest sample in the moving averages
+SMOOTHING = 0.2
+RECOVER_RATIO = 0.5
+RETRY_AFTER = 15
+
+
+class AdmissionController:
+    def __init__(self, lag_limit=LAG_LIMIT, drift_limit=DRIFT_LIMIT, backlog_limit=BACKLOG_LIMIT):
+        self.limits = {'lag': lag_limit, 'drift': drift_limit, 'backlog': backlog_limit}
+        self.lock = threading.Lock()
+        self.measures = {'lag': 0.0, 'drift': 0.0, 'backlog': 0}
+        # Game timers fired since the last probe
+        self.timers_fired = 0
+        self.overloaded = False
+        self.refused = 0
+
+    def _smooth(self, name, sample):
+        self.measures[name] += SMOOTHING * (max(0.0, sample) - self.measures[name])
+
+    def sample(self, lag, backlog):
+        """Record a probe: seconds it woke late and emits queued at the time"""
+        with self.lock:
+            self._smooth('lag', lag)
+            if not self.timers_fired:
+                self._smooth('drift', 0.0)
+            self.timers_fired = 0
+            self.measures['backlog'] = backlog
+            self._update()
+
+    def timer_fired(self, late):
+        """Record how many seconds late a game timer fired"""
+        with self.lock:
+            self._smooth('drift', late)
+            self.timers_fired += 1
+            self._update()
+
+    def _update(self):
+        over = [name for name, limit in self.limits.items() if self.measures[name] > limit]
+        if not self.overloaded and over:
+            self.overloaded = True
+            print(f"Overloaded ({', '.join(over)}); refusing new games: {self.measures}", flush=True)
+        elif self.overloaded and all(self.measures[name] < RECOVER_RATIO * limit
+                                     for name, limit in self.limits.items()):
+            self.overloaded = False
+            print(f"Load recovered; admitting new games: {self.measures}", flush=True)
+
+    def admit(self):
+        """Whether a new game may be created or started"""
+        with self.lock:
+            if self.overloaded:
+                self.refused += 1
+                return False
+            return True
+
+    def ready(self):
+        with self.lock:
+            return not self.overloaded
+
+    def stats(self):
+        with self.lock:
+            return {
+                'ready': not self.overloaded,
+                'lag': round(self.measures['lag'], 4),
+                'drift': round(self.measures['drift'], 4),
+                'backlog': self.measures['backlog'],
+                'limits': dict(self.limits),
+                'refused': self.refused
+            }
@@ -0,0 +1,191 @@
+"""
+Batched answer ingestion
+Answers are buffered per game into preallocated arrays indexed by player slot.
+Submissions are appended to a small pending list and written to the arrays in
+micro-batches; at question timeout one vectorized pass splits active players
+into correct and incorrect and counts the answer distribution.
+"""
+
+import threading
+
+import numpy as np
+
+import game_engine
+
+BATCH_SIZE = 64
+NO_ANSWER = -1
+OPTION_CODES = {option: code for code, option in enumerate(game_engine.OPTIONS)}
+
+
+class AnswerBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+
+        # Player slots
+        self.slot_of = {}
+        self.sids = [None] * capacity
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.active_count = 0
+
+        # Per-question answers
+        self.choices = np.full(capacity, NO_ANSWER, dtype=np.int8)
+        self.elapsed = np.zeros(capacity, dtype=np.float32)
+        self.answered = bytearray(capacity)
+        self.answered_count = 0
+        self.pending = []
+
+    def assign(self, sid):
+        """Give a player a slot; returns the slot or None if the game is full"""
+        with self.lock:
+            if sid in self.slot_of:
+                return self.slot_of[sid]
+            if not self.free_slots:
+                return None
+            slot = self.free_slots.pop()
+            self.slot_of[sid] = slot
+            self.sids[slot] = sid
+            self.active[slot] = True
+            self.active_count += 1
+            return slot
+
+    def deactivate(self, sid):
+        """Stop expecting answers from a player (eliminated or gone)"""
+        with self.lock:
+            slot = self.slot_of.get(sid)
+            if slot is None or not self.active[slot]:
+                return
+            self.active[slot] = False
+            self.active_count -= 1
+            if self.answered[slot]:
+                self.answered_count -= 1
+
+    def activate(self, sid):
+        """Expect answers from a player again, e.g. after a reconnect"""
+        with self.lock:
+            slot = self.slot_of.get(sid)
+            if slot is None or self.active[slot]:
+                return
+            self.active[slot] = True
+            self.active_count += 1
+            if self.answered[slot]:
+                self.answered_count += 1
+
+    def rebind(self, old_sid, new_sid):
+        """Hand a player's slot, and any answer already given, to a new sid"""
+        with self.lock:
+            slot = self.slot_of.pop(old_sid, None)
+            if slot is None:
+                return None
+            self.slot_of[new_sid] = slot
+            self.sids[slot] = new_sid
+            return slot
+
+    def has_answered(self, sid):
+        slot = self.slot_of.get(sid)
+        return slot is not None and bool(self.answered[slot])
+
+    def release(self, sid):
+        """Free a disconnected player's slot"""
+        self.deactivate(sid)
+        with self.lock:
+            slot = self.slot_of.pop(sid, None)
+            if slot is None:
+                return
+            self.sids[slot] = None
+            self.answered[slot] = 0
+            self.choices[slot] = NO_ANSWER
+            self.free_slots.append(slot)
+            # Drop any buffered answer for the slot so it can't reach a new owner
+            self.pending = [entry for entry in self.pending if entry[0] != slot]
+
+    def clear(self):
+        """Forget all players, e.g. when a game ends or is stopped"""
+        with self.lock:
+            self.slot_of = {}
+            self.sids = [None] * self.capacity
+            self.free_slots = list(range(self.capacity - 1, -1, -1))
+            self.active[:] = False
+            self.active_count = 0
+        self.reset()
+
+    def reset(self):
+        """Clear answers before a new question"""
+        with self.lock:
+            self.choices[:] = NO_ANSWER
+            self.elapsed[:] = 0
+            self.answered = bytearray(self.capacity)
+            self.answered_count = 0
+            self.pending = []
+
+    def submit(self, sid, answer, elapsed):
+        """Buffer an answer; returns False for unknown players and duplicates"""
+        with self.lock:
+            slot = self.slot_of.get(sid)
+            if slot is None or self.answered[slot]:
+                return False
+            self.answered[slot] = 1
+            if self.active[slot]:
+                self.answered_count += 1
+            self.pending.append((slot, OPTION_CODES.get(answer, NO_ANSWER), elapsed))
+            full = len(self.pending) >= BATCH_SIZE
+        if full:
+            self.drain()
+        return True
+
+    def drain(self):
+        """Write buffered answers into the arrays in one batch"""
+        # The arrays are written under the lock too, so partition() never sees
+        # answers that have left pending but are not in the arrays yet
+        with self.lock:
+            self._drain()
+
+    def _drain(self):
+        """drain() for a caller holding the lock"""
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        slots, codes, elapsed = zip(*batch)
+        slots = np.fromiter(slots, dtype=np.intp, count=len(batch))
+        self.choices[slots] = np.fromiter(codes, dtype=np.int8, count=len(batch))
+        self.elapsed[slots] = np.fromiter(elapsed, dtype=np.float32, count=len(batch))
+
+    def all_answered(self):
+        return self.active_count > 0 and self.answered_count >= self.active_count
+
+    def partition(self, correct_answer):
+        """Split active players by correctness and count answers per option
+
+        Returns (correct_sids, incorrect_sids, answer_counts). Active players
+        who didn't answer count as incorrect.
+        """
+        code = OPTION_CODES.get(correct_answer, NO_ANSWER)
+        with self.lock:
+            self._drain()
+            choices = self.choices
+            active = self.active
+
+            correct_mask = active & (choices == code)
+            incorrect_mask = active & ~correct_mask
+            answered_mask = active & (choices != NO_ANSWER)
+
+            counts = np.bincount(choices[answered_mask], minlength=len(game_engine.OPTIONS))
+            answer_counts = {option: int(counts[code]) for option, code in OPTION_CODES.items()}
+            answer_counts['no_answer'] = int(self.active_count - answered_mask.sum())
+
+            sids = self.sids
+            correct_sids = [sids[i] for i in np.flatnonzero(correct_mask)]
+            incorrect_sids = [sids[i] for i in np.flatnonzero(incorrect_mask)]
+        return correct_sids, incorrect_sids, answer_counts
+
+    def answer_times(self):
+        """Seconds to answer for each active player who answered, after partition()"""
+        return self.elapsed[self.active & (self.choices != NO_ANSWER)]
+
+    def deactivate_eliminated(self, game):
+        """Drop players eliminated in the last voting phase"""
+        for sid in game.points_awarded:
+            player = game.players.get(sid)
+            if player and player['eliminated']:
+                self.deactivate(sid)
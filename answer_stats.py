@@ -0,0 +1,110 @@
+"""
+Per-question answer statistics
+When a question closes, its outcome (players asked, correct answers, the
+answer distribution and a histogram of time to answer) is added to a
+fixed-size row of counters for that question id, across every game on the
+server. Nothing is written on the answer path. A background task takes the
+accumulated rows every FLUSH_INTERVAL and adds them to one results item per
+question (pk QUESTION#<id>, sk STATS) with DynamoDB ADD updates, grouped into
+TransactWriteItems calls so each batch lands whole or not at all. A batch
+that fails goes back into the accumulator for the next flush.
+
+The stored counters are the calibration data for question difficulty:
+correct / players is the correct rate, and the time histogram shows how
+hard players found it.
+"""
+
+import threading
+
+import numpy as np
+
+import game_engine
+
+FLUSH_INTERVAL = 60.0
+# TransactWriteItems accepts at most 100 actions
+TRANSACTION_SIZE = 100
+STATS_SK = 'STATS'
+
+# Upper bounds of the time-to-answer buckets, in seconds; a last bucket takes the rest
+TIME_EDGES = [2, 5, 10, 15, 20, 25]
+TIME_FIELDS = [f'time_lt_{edge}' for edge in TIME_EDGES] + [f'time_ge_{TIME_EDGES[-1]}']
+FIELDS = (['asked', 'players', 'correct'] + [f'answer_{option}' for option in game_engine.OPTIONS]
+          + ['no_answer', 'time_total_ms'] + TIME_FIELDS)
+COLUMN = {field: i for i, field in enumerate(FIELDS)}
+
+
+def stats_key(question_id):
+    return {'pk': f'QUESTION#{question_id}', 'sk': STATS_SK}
+
+
+def outcome_row(correct_count, answer_counts, times):
+    """Counters for one closed question"""
+    row = np.zeros(len(FIELDS), dtype=np.int64)
+    row[COLUMN['asked']] = 1
+    row[COLUMN['players']] = sum(answer_counts.values())
+    row[COLUMN['correct']] = correct_count
+    for option in game_engine.OPTIONS:
+        row[COLUMN[f'answer_{option}']] = answer_counts.get(option, 0)
+    row[COLUMN['no_answer']] = answer_counts.get('no_answer', 0)
+    row[COLUMN['time_total_ms']] = int(round(float(np.sum(times)) * 1000))
+    buckets = np.bincount(np.searchsorted(TIME_EDGES, times, side='right'), minlength=len(TIME_FIELDS))
+    row[COLUMN[TIME_FIELDS[0]]:] = buckets
+    return row
+
+
+class AnswerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # question id -> counters not yet flushed
+        self.pending = {}
+        self.flushed = 0
+        self.failed = 0
+
+    def record(self, question_id, correct_count, answer_counts, times):
+        """Add one closed question's outcome"""
+        self.record_row(question_id, outcome_row(correct_count, answer_counts, times))
+
+    def record_row(self, question_id, row):
+        with self.lock:
+            if question_id in self.pending:
+                self.pending[question_id] += row
+            else:
+                self.pending[question_id] = row
+
+    def flush(self, write):
+        """Hand accumulated rows to write() a transaction at a time; returns questions written"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        items = list(pending.items())
+        written = 0
+        for start in range(0, len(items), TRANSACTION_SIZE):
+            chunk = items[start:start + TRANSACTION_SIZE]
+            try:
+                write(chunk)
+                written += len(chunk)
+            except Exception as e:
+                print(f"Question stats flush failed for {len(chunk)} questions: {e}", flush=True)
+                self.failed += 1
+                # Keep the counts for the next flush
+                for question_id, row in chunk:
+                    self.record_row(question_id, row)
+        self.flushed += written
+        return written
+
+    def stats(self):
+        with self.lock:
+            pending = len(self.pending)
+        return {'pending': pending, 'flushed': self.flushed, 'failed_batches': self.failed}
+
+
+def update_action(table, question_id, row):
+    """TransactWriteItems Update adding a row of counters to a question's stats item"""
+    # Plain values: Repository.client is the resource's client, which serializes them itself
+    fields = [field for field in FIELDS if row[COLUMN[field]]]
+    return {'Update': {
+        'TableName': table,
+        'Key': stats_key(question_id),
+        'UpdateExpression': 'ADD ' + ', '.join(f'#{field} :{field}' for field in fields),
+        'ExpressionAttributeNames': {f'#{field}': field for field in fields},
+        'ExpressionAttributeValues': {f':{field}': int(row[COLUMN[field]]) for field in fields}
+    }}
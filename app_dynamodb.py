@@ -1,100 +1,154 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from flask_socketio import SocketIO, emit, join_room, leave_room
-import boto3
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, abort, send_from_directory
+from flask_socketio import SocketIO, emit, leave_room, disconnect
+import functools
 import hashlib
 import json
 from datetime import datetime
 import threading
+import atexit
 import time
 import os
 import sys
 from decimal import Decimal
 import logging
 
+import admission
+import answer_stats
+import arena
+import assets
+import broadcaster
+import game_engine
+import game_history
+import game_listing
+import leaderboard
+import lifecycle
+import lobby
+import page_cache
+import question_bank
+import ratelimit
+import resume
+import spectators
+import staging
+import startup
+import vote_allocator
+import wire
+from answer_buffer import AnswerBuffer
+from game_engine import GameState
+import repository
+from repository import Repository, GameExists
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'trivia_secret_key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Configure logging
+# Fingerprinted static assets, built by `python assets.py`
+asset_manifest = assets.AssetManifest()
+if not asset_manifest.load():
+    print("No asset manifest; serving images from /static (run python assets.py)", flush=True)
+
+@app.context_processor
+def asset_helpers():
+    def asset_url(name):
+        return asset_manifest.url(name) or url_for('static', filename=name)
+    def asset_webp(name):
+        return asset_manifest.url(name, 'webp')
+    return {'asset_url': asset_url, 'asset_webp': asset_webp}
+
+# Rendered pages by template and arguments, plus compression for other responses
+rendered_pages = page_cache.PageCache()
+page_cache_enabled = True
+
+def render_page(template, **context):
+    """render_template through the page cache, in the best encoding the client accepts"""
+    if not page_cache_enabled:
+        return render_template(template, **context)
+    key = page_cache.page_key(template, context)
+    entry = rendered_pages.get(key) or rendered_pages.put(key, render_template(template, **context))
+    encoding = page_cache.choose_encoding(entry, request.accept_encodings)
+    etag = entry['etag'] + (f'-{encoding}' if encoding else '')
+    headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    # Parsed list of tags, compared whole (weakly, as If-None-Match asks)
+    if request.if_none_match.contains_weak(etag):
+        return app.response_class(status=304, headers=headers)
+    return app.response_class(entry[encoding], mimetype='text/html', headers=headers)
+
+@app.after_request
+def compress_response(response):
+    if page_cache_enabled:
+        page_cache.compress_response(response, request.accept_encodings)
+    return response
+
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 app.logger.setLevel(logging.DEBUG)
 
-# DynamoDB setup
-region = os.getenv('AWS_REGION', 'us-west-2')
-print(f"Using DynamoDB region: {region}", flush=True)
-dynamodb = boto3.resource('dynamodb', region_name=region)
+# Storage setup: DynamoDB, Postgres (app.py), or an embedded SQLite file for a single-server venue
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'dynamodb')
+if STORAGE_BACKEND == 'sqlite':
+    import sqlite_repository
+    repo = sqlite_repository.SqliteRepository()
+    print(f"Using SQLite database: {repo.path}", flush=True)
+elif STORAGE_BACKEND == 'postgres':
+    import postgres_repository
+    repo = postgres_repository.PostgresRepository()
+    print(f"Using Postgres database: {repo.dsn['database']} on {repo.dsn['host']}", flush=True)
+else:
+    region = os.getenv('AWS_REGION', 'us-west-2')
+    print(f"Using DynamoDB region: {region}", flush=True)
+    repo = Repository(region)
+atexit.register(repo.close)
 
 # Game state
 games = {}
 game_timers = {}
+answer_buffers = {}
+game_locks = {}
+game_recorders = {}
+lobby_feeds = {}
+# sid -> negotiated payload format (wire.JSON or wire.MSGPACK)
+wire_formats = {}
+# Pre-staged next question per game, and sids whose page can decrypt one
+staged_questions = {}
+staging_sids = set()
+boards = leaderboard.Leaderboards()
+# Until the stored snapshot has loaded, finished games wait in pending and
+# nothing is snapshotted, so an empty board never replaces the stored one
+leaderboard_state = {'loaded': False, 'pending': []}
+leaderboard_lock = threading.Lock()
+game_tracker = lifecycle.GameTracker()
+admission_control = admission.AdmissionController()
+rate_limiter = ratelimit.RateLimiter()
+question_stats = answer_stats.AnswerStats()
+warmup = startup.Warmup()
+spectator_feed = spectators.SpectatorFeed()
+# Indexed questions, shared by every game started within RELOAD_INTERVAL of loading
+question_cache = {'bank': None, 'loaded_at': 0.0}
+# QUESTION_SOURCE=database: the SQL backends draw each game by index seeks instead of loading the bank
+sample_in_database = os.getenv('QUESTION_SOURCE', 'bank') == 'database' and STORAGE_BACKEND in ('sqlite', 'postgres')
+resume_tokens = resume.ResumeTokens()
+sweeper_started = False
+listing_cache = game_listing.ListingCache()
 
-def init_dynamodb():
-    """Initialize DynamoDB tables"""
-    print(f"Creating DynamoDB tables in region: {region}", flush=True)
-    try:
-        # Create admins table
-        admins_table = dynamodb.create_table(
-            TableName='trivia_admins',
-            KeySchema=[{'AttributeName': 'username', 'KeyType': 'HASH'}],
-            AttributeDefinitions=[{'AttributeName': 'username', 'AttributeType': 'S'}],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        admins_table.wait_until_exists()
-        
-        # Create questions table
-        questions_table = dynamodb.create_table(
-            TableName='trivia_questions',
-            KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-            AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        questions_table.wait_until_exists()
-        
-        # Create games table
-        games_table = dynamodb.create_table(
-            TableName='trivia_games',
-            KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-            AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        games_table.wait_until_exists()
-        
-    except dynamodb.meta.client.exceptions.ResourceInUseException:
-        print("Tables already exist", flush=True)
-        pass  # Tables already exist
-    except Exception as e:
-        print(f"Error creating tables: {e}", flush=True)
-        print(f"Region being used: {dynamodb.meta.client.meta.region_name}", flush=True)
+def init_storage():
+    """Create missing tables, then seed the default admin and questions"""
+    repo.create_tables()
     
     # Insert default admin
-    admins_table = dynamodb.Table('trivia_admins')
     try:
-        admins_table.put_item(
-            Item={'username': 'james', 'password': hashlib.sha256('pango123'.encode()).hexdigest()},
-            ConditionExpression='attribute_not_exists(username)'
-        )
+        repo.add_admin('james', hashlib.sha256('pango123'.encode()).hexdigest())
     except:
         pass
     
     # Copy questions from source table if it exists
     try:
-        source_table = dynamodb.Table('trivia_questions_source')
-        questions_table = dynamodb.Table('trivia_questions')
-        
-        # Check if source table has questions
-        source_response = source_table.scan(Limit=1)
-        if source_response['Items']:
+        source_questions = repo.source_questions()
+        if source_questions:
             print("Copying questions from source table", flush=True)
             
-            # Get all questions from source
-            response = source_table.scan()
-            source_questions = response['Items']
-            
             # Copy to game table (only if game table is empty)
-            game_response = questions_table.scan(Limit=1)
-            if not game_response['Items']:
-                for question in source_questions:
-                    questions_table.put_item(Item=question)
+            if not repo.has_questions():
+                repo.add_questions(source_questions)
                 print(f"Copied {len(source_questions)} questions to game table", flush=True)
             else:
                 print("Game table already has questions", flush=True)
@@ -108,83 +162,396 @@ def init_dynamodb():
             ] * 15
             
             for i, q in enumerate(basic_questions):
-                try:
-                    questions_table.put_item(
-                        Item={
-                            'id': str(i+1),
-                            'question': q[0],
-                            'option_a': q[1],
-                            'option_b': q[2],
-                            'option_c': q[3],
-                            'option_d': q[4],
-                            'correct_answer': q[5]
-                        },
-                        ConditionExpression='attribute_not_exists(id)'
-                    )
-                except:
-                    pass
+                repo.add_question({
+                    'id': str(i+1),
+                    'question': q[0],
+                    'option_a': q[1],
+                    'option_b': q[2],
+                    'option_c': q[3],
+                    'option_d': q[4],
+                    'correct_answer': q[5]
+                }, overwrite=False)
                     
     except Exception as e:
         print(f"Error copying questions: {e}", flush=True)
         print("Using fallback questions", flush=True)
 
-class GameState:
-    def __init__(self, game_id, name, password):
-        self.game_id = game_id
-        self.name = name
-        self.password = password
-        self.players = {}
-        self.admin_sid = None
-        self.status = 'waiting'
-        self.current_round = 0
-        self.current_question = 0
-        self.questions = []
-        self.question_start_time = None
-        self.answers = {}
-        self.scores = {}
+def dispatch(game, events):
+    """Emit rules engine events to their Socket.IO destinations"""
+    game_tracker.touch(game.game_id, time.time())
+    if arena.is_arena(game):
+        events = arena.compact_events(game, events)
+
+    for event in events:
+        encoded = None
+        if event.data is not None and wire.is_compact(event.name):
+            encoded = wire.encode(event.name, event.data)
+
+        if event.to == game_engine.ROOM:
+            for room in arena.broadcast_rooms(game):
+                broadcast_event(event.name, event.data, room, encoded, game.game_id)
+            if event.name in spectators.PASSTHROUGH:
+                broadcast_event(event.name, event.data, spectators.room(game.game_id), encoded, game.game_id)
+            else:
+                spectator_feed.mark(game.game_id)
+        elif event.to == game_engine.ADMIN:
+            if game.admin_sid:
+                emit_event(event.name, event.data, game.admin_sid, encoded, game.game_id)
+        else:
+            emit_event(event.name, event.data, event.to, encoded, game.game_id)
+
+def emit_event(name, data, sid, encoded=None, lane=None):
+    """Queue an emit to one socket behind the earlier emits of lane (its game)"""
+    broadcast_pool.submit(lane or sid, name, sid, lambda skip: send_event(name, data, sid, encoded))
+
+def broadcast_event(name, data, room, encoded=None, lane=None):
+    """Queue an emit to a game or shard room behind the earlier emits of lane"""
+    broadcast_pool.submit(lane or room, name, room, lambda skip: send_room_event(name, data, room, encoded, skip))
+
+def send_event(name, data, sid, encoded=None):
+    """Emit to one socket in the payload format it negotiated"""
+    if data is None:
+        socketio.emit(name, room=sid)
+        return
+    if wire_formats.get(sid) == wire.MSGPACK and wire.is_compact(name):
+        data = encoded or wire.encode(name, data)
+    socketio.emit(name, data, room=sid)
+
+def send_room_event(name, data, room, encoded=None, skip=None):
+    """Emit to a game or shard room, once per payload format"""
+    if data is None:
+        socketio.emit(name, room=room, skip_sid=skip)
+    elif wire.is_compact(name):
+        socketio.emit(name, data, room=wire.room(room, wire.JSON), skip_sid=skip)
+        socketio.emit(name, encoded or wire.encode(name, data), room=wire.room(room, wire.MSGPACK), skip_sid=skip)
+    else:
+        socketio.emit(name, data, room=room, skip_sid=skip)
+
+def transport_depths(target):
+    """(sid, packets waiting in its Engine.IO send queue) for each socket in a room or sid"""
+    sockets = socketio.server.eio.sockets
+    for sid, eio_sid in socketio.server.manager.get_participants('/', target):
+        socket = sockets.get(eio_sid)
+        yield sid, socket.queue.qsize() if socket else 0
+
+# Emits from game logic run on these workers, one ordered lane per game
+broadcast_pool = broadcaster.Broadcaster(transport_depths)
+atexit.register(broadcast_pool.close)
+
+def negotiate_wire(data):
+    """Pick the payload format for the requesting socket, before it joins any room"""
+    fmt = wire_formats[request.sid] = wire.negotiate(data.get('wire'))
+    emit('wire_format', wire.hello(fmt))
+
+def join_game_room(sid, room):
+    """Join a game or shard room and its subroom for the sid's payload format"""
+    # Through the server, so timers moving players between rooms need no request context
+    socketio.server.enter_room(sid, room)
+    socketio.server.enter_room(sid, wire.room(room, wire_formats.get(sid, wire.JSON)))
+
+def leave_game_room(sid, room):
+    socketio.server.leave_room(sid, room)
+    socketio.server.leave_room(sid, wire.room(room, wire_formats.get(sid, wire.JSON)))
+
+def player_room(game, sid):
+    """Room a player's socket is in: its game or shard room, or the spectator room once eliminated"""
+    player = game.players.get(sid)
+    if player and player['eliminated']:
+        return spectators.room(game.game_id)
+    return arena.player_room(game, sid)
+
+def move_to_spectators(game):
+    """Move eliminated players out of the per-event stream and into the spectator room"""
+    moved = 0
+    for sid, player in list(game.players.items()):
+        if player['eliminated'] and not spectator_feed.is_watching(game.game_id, sid):
+            leave_game_room(sid, arena.player_room(game, sid))
+            join_game_room(sid, spectators.room(game.game_id))
+            spectator_feed.add(game.game_id, sid)
+            emit_event('spectating', {'reason': 'eliminated'}, sid, lane=game.game_id)
+            moved += 1
+    if moved:
+        broadcast_event('spectator_snapshot', spectators.snapshot(game), spectators.room(game.game_id),
+                        lane=game.game_id)
+
+def player_rooms(game):
+    """(sid, room) for each of a game's players"""
+    return [(sid, player_room(game, sid)) for sid in game.players]
+
+def leave_rooms_after_queued(game_id, rooms):
+    """Take players out of their rooms once the emits already queued for the game have gone out"""
+    def leave(skip):
+        current = games.get(game_id)
+        for sid, room in rooms:
+            # A socket that rejoined the stopped game in the meantime stays
+            if current is None or sid not in current.players or player_room(current, sid) != room:
+                leave_game_room(sid, room)
+    broadcast_pool.submit(game_id, 'leave_rooms', game_id, leave)
+
+def close_spectator_room(game_id):
+    """Empty a game's spectator room once the emits already queued for it have gone out"""
+    spectator_feed.forget_game(game_id)
+    room = spectators.room(game_id)
+    def close(skip):
+        for name in (room, wire.room(room, wire.JSON), wire.room(room, wire.MSGPACK)):
+            socketio.close_room(name)
+    broadcast_pool.submit(game_id, 'close_room', room, close)
+
+def spectator_snapshots():
+    """Send each changed game with an audience one consolidated snapshot per interval"""
+    while True:
+        socketio.sleep(spectators.SNAPSHOT_INTERVAL)
+        try:
+            for game_id in spectator_feed.due():
+                game = games.get(game_id)
+                if game:
+                    broadcast_event('spectator_snapshot', spectators.snapshot(game), spectators.room(game_id),
+                                    lane=game_id)
+        except Exception as e:
+            print(f"Error sending spectator snapshots: {e}", flush=True)
+
+def get_answer_buffer(game):
+    """Answer buffer for a game, created on first use"""
+    buffer = answer_buffers.get(game.game_id)
+    if buffer is None:
+        buffer = answer_buffers.setdefault(game.game_id, AnswerBuffer(game.max_players))
+    return buffer
+
+def get_lobby_feed(game):
+    """Lobby delta feed for a game, created on first use"""
+    return lobby_feeds.setdefault(game.game_id, lobby.LobbyFeed())
+
+def lobby_changed(game, scheduled):
+    """Start the coalescing window for the first change since the last flush"""
+    if scheduled:
+        threading.Timer(lobby.COALESCE_DELAY, flush_lobby, [game.game_id]).start()
+
+def flush_lobby(game_id):
+    game = games.get(game_id)
+    if game:
+        dispatch(game, get_lobby_feed(game).flush(game))
+
+def discard_game(game_id):
+    """Cancel a game's timers and drop it and its per-game state from memory"""
+    if game_id in game_timers:
+        game_timers[game_id].cancel()
+        del game_timers[game_id]
+    games.pop(game_id, None)
+    answer_buffers.pop(game_id, None)
+    game_locks.pop(game_id, None)
+    game_recorders.pop(game_id, None)
+    resume_tokens.discard_game(game_id)
+    lobby_feeds.pop(game_id, None)
+    staged_questions.pop(game_id, None)
+    game_tracker.forget(game_id)
+    close_spectator_room(game_id)
+    print(f"Game {game_id} removed from memory", flush=True)
+
+def game_memory(game):
+    return lifecycle.game_memory(game, answer_buffers.get(game.game_id))
+
+def sweep_games():
+    """Evict ended and idle games, and the least recently active ones while over the memory budget"""
+    while True:
+        socketio.sleep(lifecycle.SWEEP_INTERVAL)
+        try:
+            for game_id, reason in game_tracker.to_evict(games, time.time(), game_memory):
+                game = games.get(game_id)
+                if game is None:
+                    continue
+                print(f"Evicting {reason} game {game_id} ({len(game.players)} players)", flush=True)
+                if reason != 'ended':
+                    # Players of a finished game are already on the results screen
+                    broadcast(game, 'game_cancelled', {'message': 'Game was closed after being inactive'})
+                rooms = player_rooms(game)
+                discard_game(game_id)
+                leave_rooms_after_queued(game_id, rooms)
+        except Exception as e:
+            print(f"Error evicting games: {e}", flush=True)
+
+def start_timer(delay, callback, game_id):
+    """Call callback(game_id) after delay seconds, recording how late the timer fired"""
+    due = time.monotonic() + delay
+    def fire():
+        admission_control.timer_fired(time.monotonic() - due)
+        callback(game_id)
+    timer = threading.Timer(delay, fire)
+    timer.start()
+    return timer
+
+def measure_load():
+    """Sample scheduling lag and the emit backlog for admission control"""
+    while True:
+        began = time.monotonic()
+        socketio.sleep(admission.PROBE_INTERVAL)
+        lag = time.monotonic() - began - admission.PROBE_INTERVAL
+        admission_control.sample(lag, broadcast_pool.stats()['queued'])
+
+def limited(event):
+    """Drop a handler's events from a connection that is over its rate limit for them"""
+    def decorate(handler):
+        @functools.wraps(handler)
+        def guarded(*args):
+            verdict = rate_limiter.check(request.sid, event, time.monotonic())
+            if verdict == ratelimit.ALLOW:
+                return handler(*args)
+            if verdict == ratelimit.NOTIFY:
+                emit('rate_limited', {'event': event, 'retry_after': rate_limiter.retry_after(event)})
+            elif verdict == ratelimit.DISCONNECT:
+                disconnect()
+        return guarded
+    return decorate
+
+def busy_response():
+    """Retryable refusal for work the server has no capacity for right now"""
+    response = jsonify({'success': False, 'error': 'Server busy, please try again',
+                        'retry_after': admission.RETRY_AFTER})
+    response.headers['Retry-After'] = str(admission.RETRY_AFTER)
+    return response, 503
+
+def get_question_bank():
+    """Question bank indexed by category and difficulty, reloaded from storage when stale"""
+    if question_cache['bank'] is None or time.time() - question_cache['loaded_at'] > question_bank.RELOAD_INTERVAL:
+        print(f"Loading questions from storage", flush=True)
+        all_questions = repo.all_questions()
+        print(f"Found {len(all_questions)} questions in database", flush=True)
+        question_cache['bank'] = question_bank.QuestionBank(all_questions)
+        question_cache['loaded_at'] = time.time()
+    return question_cache['bank']
+
+def get_game_lock(game_id):
+    """Lock serialising vote updates for one game"""
+    return game_locks.setdefault(game_id, threading.Lock())
+
+def broadcast(game, name, data=None):
+    """Emit an event to everyone in a game, across arena shards"""
+    dispatch(game, [game_engine.Event(name, data, game_engine.ROOM)])
+
+def player_list_payload(game):
+    """Player list for admin views; bounded standings in arena games"""
+    if arena.is_arena(game):
+        return arena.standings(game)
+    return {'players': game_engine.player_list(game)}
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_page('index.html')
+
+@app.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    selected = asset_manifest.select(filename, request.accept_encodings)
+    if selected is None:
+        abort(404)
+    path, content_type, encoding, etag = selected
+    response = send_from_directory(asset_manifest.dist_dir, path, mimetype=content_type, etag=etag,
+                                   max_age=assets.CACHE_SECONDS, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/admin')
 def admin_login():
-    return render_template('admin_login.html')
+    return render_page('admin_login.html')
 
 @app.route('/admin/dashboard')
 def admin_dashboard():
-    print(f"=== ADMIN DASHBOARD ACCESSED ===", flush=True)
-    print(f"Session contents: {dict(session)}", flush=True)
-    
     if 'admin' not in session:
-        print("Admin not in session, redirecting to login", flush=True)
         return redirect(url_for('admin_login'))
     
-    print("Admin authenticated, loading dashboard", flush=True)
-    
+    cursor = request.args.get('cursor')
     try:
-        print("=== LOADING ADMIN DASHBOARD ===", flush=True)
-        games_table = dynamodb.Table('trivia_games')
-        print(f"Table name: {games_table.table_name}", flush=True)
-        print(f"Table region: {games_table.meta.client.meta.region_name}", flush=True)
-        
-        response = games_table.scan()
-        print(f"DynamoDB scan response: {response}", flush=True)
-        
-        game_configs = response['Items']
-        print(f"Dashboard - Found {len(game_configs)} games in DB", flush=True)
-        print(f"Dashboard - Games data: {game_configs}", flush=True)
-        print(f"Dashboard - Active games in memory: {list(games.keys())}", flush=True)
-        
-        print(f"Rendering template with {len(game_configs)} games", flush=True)
-        
+        game_configs, next_cursor = repo.list_games(listing_cache, cursor)
+    except game_listing.InvalidCursor:
+        abort(400)
     except Exception as e:
         print(f"ERROR loading dashboard: {e}", flush=True)
         import traceback
         traceback.print_exc()
-        game_configs = []
+        game_configs, next_cursor = [], None
+    
+    return render_template('admin_dashboard.html', games=game_configs, active_games=games,
+                           next_cursor=next_cursor, paged=bool(cursor))
+
+@app.errorhandler(game_listing.InvalidCursor)
+def invalid_cursor(error):
+    return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+
+@app.route('/api/admin/games')
+def list_games_api():
+    if 'admin' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    games_page, next_cursor = repo.list_games(listing_cache, request.args.get('cursor'))
+    return jsonify({'success': True, 'games': games_page, 'next_cursor': next_cursor})
+
+@app.route('/api/admin/metrics')
+def admin_metrics():
+    if 'admin' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    return jsonify({'success': True, 'write_queue': repo.write_stats(),
+                    'page_cache': rendered_pages.stats(), 'broadcast': broadcast_pool.stats(),
+                    'admission': admission_control.stats(), 'rate_limits': rate_limiter.stats(),
+                    'question_stats': question_stats.stats(), 'startup': warmup.stats(),
+                    'spectators': spectator_feed.stats()})
+
+@app.route('/readyz')
+def readiness():
+    """503 while warming up or overloaded, so load balancers send new games to other instances"""
+    stats = admission_control.stats()
+    if not warmup.done():
+        stats['ready'] = False
+        stats['startup'] = warmup.stats()
+    return jsonify(stats), 200 if stats['ready'] else 503
+
+@app.route('/api/admin/memory')
+def admin_memory():
+    if 'admin' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
     
-    return render_template('admin_dashboard.html', games=game_configs, active_games=games)
+    return jsonify({'success': True, **game_tracker.stats(games, game_memory)})
+
+@app.route('/api/history/game/<game_id>')
+def game_history_api(game_id):
+    results, next_cursor = repo.game_results(game_id, request.args.get('cursor'),
+                                             request.args.get('limit', repository.HISTORY_PAGE_SIZE, type=int))
+    return jsonify({'success': True, 'results': results, 'next_cursor': next_cursor})
+
+@app.route('/api/history/run/<run_id>')
+def run_history_api(run_id):
+    players, next_cursor = repo.run_results(run_id, request.args.get('cursor'),
+                                            request.args.get('limit', repository.HISTORY_PAGE_SIZE, type=int))
+    return jsonify({'success': True, 'players': players, 'next_cursor': next_cursor})
+
+@app.route('/api/history/player/<name>')
+def player_history_api(name):
+    history, next_cursor = repo.player_history(name, request.args.get('cursor'),
+                                               request.args.get('limit', repository.HISTORY_PAGE_SIZE, type=int))
+    return jsonify({'success': True, 'history': history, 'next_cursor': next_cursor})
+
+@app.route('/api/leaderboard/<metric>')
+def leaderboard_api(metric):
+    window = request.args.get('window', 'all')
+    if metric not in leaderboard.METRICS or window not in leaderboard.WINDOWS:
+        return jsonify({'success': False, 'message': 'Unknown leaderboard'}), 404
+    
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify({'success': True, 'metric': metric, 'window': window,
+                    'leaders': boards.top(metric, window, limit)})
+
+@app.route('/api/leaderboard/<metric>/<name>')
+def leaderboard_rank_api(metric, name):
+    window = request.args.get('window', 'all')
+    if metric not in leaderboard.METRICS or window not in leaderboard.WINDOWS:
+        return jsonify({'success': False, 'message': 'Unknown leaderboard'}), 404
+    
+    rank = boards.rank(metric, name, window)
+    if rank is None:
+        return jsonify({'success': False, 'message': 'Player not ranked'}), 404
+    return jsonify(dict(rank, success=True, metric=metric, window=window, name=name))
 
 @app.route('/api/join_game', methods=['POST'])
 def join_game_api():
@@ -238,7 +605,7 @@ def game_lobby(game_id):
     if f'game_{game_id}' not in session or not session[f'game_{game_id}'].get('authenticated'):
         return redirect(url_for('index'))
     
-    return render_template('game_lobby.html', game_id=game_id)
+    return render_page('game_lobby.html', game_id=game_id)
 
 @app.route('/game/<game_id>/play')
 def game_play(game_id):
@@ -249,7 +616,22 @@ def game_play(game_id):
     if f'game_{game_id}' not in session or not session[f'game_{game_id}'].get('authenticated'):
         return redirect(url_for('index'))
     
-    return render_template('game_play.html', game_id=game_id)
+    return render_page('game_play.html', game_id=game_id)
+
+def can_watch(game_id):
+    """Whether this session joined the game with its password, or is the admin"""
+    return 'admin' in session or session.get(f'game_{game_id}', {}).get('authenticated', False)
+
+@app.route('/game/<game_id>/watch')
+def game_watch(game_id):
+    if game_id not in games:
+        return "Game not found", 404
+    
+    # Spectators need the same game session as players
+    if not can_watch(game_id):
+        return redirect(url_for('index'))
+    
+    return render_page('game_play.html', game_id=game_id, spectator=True)
 
 @app.route('/game/<game_id>/admin')
 def game_admin(game_id):
@@ -260,18 +642,18 @@ def game_admin(game_id):
     if game_id not in games:
         # Try to load from database
         try:
-            games_table = dynamodb.Table('trivia_games')
-            response = games_table.get_item(Key={'id': game_id})
-            if 'Item' not in response:
+            game_data = repo.get_game(game_id)
+            if game_data is None:
                 return "Game not found", 404
             
             # Create game state if it doesn't exist in memory
-            game_data = response['Item']
-            games[game_id] = GameState(game_id, game_data['name'], game_data['password'])
+            games[game_id] = GameState(game_id, game_data['name'], game_data['password'],
+                                       game_data.get('mode', game_engine.STANDARD))
         except Exception as e:
             return f"Error loading game: {e}", 500
+    game_tracker.touch(game_id, time.time())
     
-    return render_template('admin_game.html', game_id=game_id)
+    return render_template('admin_game.html', game_id=game_id, max_players=games[game_id].max_players)
 
 @app.route('/game/<game_id>/round/<int:round_number>')
 def round_start(game_id, round_number):
@@ -279,17 +661,16 @@ def round_start(game_id, round_number):
         return "Game not found", 404
     if round_number not in [1, 2, 3]:
         return "Invalid round number", 400
-    return render_template('round_start.html', round_number=round_number)
+    return render_page('round_start.html', round_number=round_number)
 
 @app.route('/api/admin/login', methods=['POST'])
 def admin_login_api():
     username = request.json['username']
     password = hashlib.sha256(request.json['password'].encode()).hexdigest()
     
-    admins_table = dynamodb.Table('trivia_admins')
-    response = admins_table.get_item(Key={'username': username})
+    admin = repo.get_admin(username)
     
-    if 'Item' in response and response['Item']['password'] == password:
+    if admin and admin['password'] == password:
         session['admin'] = username
         return jsonify({'success': True, 'redirect': '/admin/dashboard'})
     else:
@@ -312,44 +693,42 @@ def create_game():
             print("ERROR: No JSON data received")
             return jsonify({'success': False, 'error': 'No data received'})
             
+        if not admission_control.admit():
+            return busy_response()
+        
         name = request_data.get('name')
         password = request_data.get('password')
+        mode = game_engine.ARENA if request_data.get('mode') == game_engine.ARENA else game_engine.STANDARD
         
         if not name or not password:
             print(f"ERROR: Missing name or password. Name: {name}, Password: {password}")
             return jsonify({'success': False, 'error': 'Name and password required'})
         
         game_id = str(int(time.time()))
+        if game_id in games:
+            return jsonify({'success': False, 'error': 'A game was just created, please try again'})
         
         print(f"Creating game: {name} with ID: {game_id}")
         
-        # Test DynamoDB connection
-        try:
-            games_table = dynamodb.Table('trivia_games')
-            print(f"DynamoDB region: {games_table.meta.client.meta.region_name}", flush=True)
-            print(f"Table ARN: {games_table.table_arn}", flush=True)
-            print(f"Table status: {games_table.table_status}", flush=True)
-        except Exception as table_error:
-            print(f"ERROR accessing table: {table_error}", flush=True)
-            return jsonify({'success': False, 'error': f'Table access error: {str(table_error)}'})
-        
-        # Write to DynamoDB
+        # Write to storage
         item = {
             'id': game_id,
             'name': name,
             'password': password,
-            'created_at': datetime.now().isoformat()
+            'mode': mode,
+            'created_at': datetime.now().isoformat(),
+            game_listing.INDEX_KEY: game_listing.INDEX_VALUE
         }
         print(f"Writing item: {item}", flush=True)
         
-        response = games_table.put_item(Item=item)
-        print(f"DynamoDB response: {response}", flush=True)
-        
-        # Verify write by reading back
-        verify_response = games_table.get_item(Key={'id': game_id})
-        print(f"Verification read: {verify_response}", flush=True)
+        try:
+            repo.create_game(item)
+        except GameExists:
+            return jsonify({'success': False, 'error': 'A game was just created, please try again'})
         
-        games[game_id] = GameState(game_id, name, password)
+        games[game_id] = GameState(game_id, name, password, mode)
+        game_tracker.touch(game_id, time.time())
+        listing_cache.add_game(item)
         print(f"In-memory games: {list(games.keys())}", flush=True)
         
         return jsonify({'success': True, 'game_id': game_id})
@@ -369,10 +748,10 @@ def delete_game():
         game_id = request.json['game_id']
         print(f"Deleting game {game_id}", flush=True)
         
-        # Remove from DynamoDB
-        games_table = dynamodb.Table('trivia_games')
-        games_table.delete_item(Key={'id': game_id})
-        print(f"Game {game_id} deleted from database", flush=True)
+        # Remove from storage
+        repo.delete_game(game_id)
+        listing_cache.remove_game(game_id)
+        print(f"Game {game_id} queued for deletion", flush=True)
         
         # Notify players and remove from memory
         if game_id in games:
@@ -380,20 +759,12 @@ def delete_game():
             print(f"Notifying {len(game.players)} players that game is cancelled", flush=True)
             
             # Notify all players that game is cancelled
-            socketio.emit('game_cancelled', {'message': 'Game has been cancelled by administrator'}, room=game_id)
-            
-            # Remove all players from the room
-            for player_sid in list(game.players.keys()):
-                socketio.server.leave_room(player_sid, game_id)
+            broadcast(game, 'game_cancelled', {'message': 'Game has been cancelled by administrator'})
             
-            # Cancel any active timers
-            if game_id in game_timers:
-                game_timers[game_id].cancel()
-                del game_timers[game_id]
-            
-            # Remove from memory
-            del games[game_id]
-            print(f"Game {game_id} removed from memory", flush=True)
+            # Remove all players from the room once the notice has gone out
+            rooms = player_rooms(game)
+            discard_game(game_id)
+            leave_rooms_after_queued(game_id, rooms)
         
         return jsonify({'success': True})
         
@@ -402,6 +773,7 @@ def delete_game():
         return jsonify({'success': False, 'error': str(e)})
 
 @socketio.on('join_game')
+@limited('join_game')
 def handle_join_game(data):
     game_id = data['game_id']
     player_name = data['player_name']
@@ -414,11 +786,17 @@ def handle_join_game(data):
         return
     
     game = games[game_id]
+    game_tracker.touch(game_id, time.time())
+    negotiate_wire(data)
+    if data.get('staging'):
+        staging_sids.add(request.sid)
+    
+    # A reconnecting player takes back their held slot without a room broadcast
+    token = data.get('resume_token')
+    if token and resume_player(game, token, request.sid):
+        return
     
-    # Only clean up players that have been disconnected for a while
-    # Don't clean up during active join process
-    
-    if len(game.players) >= 100:
+    if len(game.players) >= game.max_players:
         print(f"Game {game_id} is full", flush=True)
         emit('error', {'message': 'Game is full'})
         return
@@ -427,25 +805,27 @@ def handle_join_game(data):
     player_exists = request.sid in game.players
     
     # Duplicate name check disabled for now to ensure game functionality
-        
+    if not player_exists:
         print(f"Current players in game: {[(sid, p.get('name', 'NO_NAME')) for sid, p in game.players.items()]}", flush=True)
         print(f"New player {player_name} with sid {request.sid} joining", flush=True)
         
-        print(f"Player {player_name} joining room {game_id}", flush=True)
-        join_room(game_id)
-        game.players[request.sid] = {
-            'name': player_name,
-            'score': 0,
-            'eliminated': False,
-            'readonly': False,
-            'eliminated_at': None
-        }
+        # Arena players join a shard room rather than the game room
+        if arena.is_arena(game):
+            arena.assign_shard(game, request.sid)
+        print(f"Player {player_name} joining room {arena.player_room(game, request.sid)}", flush=True)
+        join_game_room(request.sid, arena.player_room(game, request.sid))
+        player = game_engine.add_player(game, request.sid, player_name)
+        get_answer_buffer(game).assign(request.sid)
+        recorder = game_recorders.get(game_id)
+        if recorder:
+            recorder.add_player(request.sid, player_name)
     else:
         print(f"Player {player_name} already in game, updating info", flush=True)
         game.players[request.sid]['name'] = player_name
     
     print(f"Player {player_name} successfully joined. Total players: {len(game.players)}", flush=True)
-    emit('joined_game', {'player_name': player_name})
+    emit('joined_game', {'player_name': player_name,
+                         'resume_token': resume_tokens.issue(game_id, request.sid)})
     
     # If game is already playing, send current state to new player
     if game.status == 'playing':
@@ -455,10 +835,50 @@ def handle_join_game(data):
         if game.current_question == 0:
             print(f"Sending round start to new player: Round {game.current_round}", flush=True)
             emit('show_round_start', {'round_number': game.current_round})
+        send_staged(game, request.sid)
     
-    # Only emit player list update if this is a new player and game hasn't started
+    # New lobby players get a snapshot; everyone else gets the join in the next coalesced delta
     if not player_exists and game.status == 'waiting':
-        socketio.emit('player_joined', {'players': list(game.players.values())}, room=game_id)
+        if not arena.is_arena(game):
+            emit('lobby_state', get_lobby_feed(game).state(game))
+        lobby_changed(game, get_lobby_feed(game).join(player))
+
+def resume_player(game, token, sid):
+    """Rebind a held player slot to a new connection; returns False if the token is stale"""
+    old_sid = resume_tokens.claim(token, game.game_id, sid)
+    if old_sid is None or old_sid not in game.players:
+        return False
+    
+    if old_sid != sid:
+        # The old socket may still be open after a page reload
+        leave_game_room(old_sid, player_room(game, old_sid))
+        spectator_feed.forget(old_sid)
+        game_engine.rebind_player(game, old_sid, sid)
+        arena.rebind(game, old_sid, sid)
+        get_answer_buffer(game).rebind(old_sid, sid)
+        recorder = game_recorders.get(game.game_id)
+        if recorder:
+            recorder.rebind(old_sid, sid)
+    
+    buffer = get_answer_buffer(game)
+    if not game.players[sid]['eliminated']:
+        buffer.activate(sid)
+    else:
+        spectator_feed.add(game.game_id, sid)
+    join_game_room(sid, player_room(game, sid))
+    
+    print(f"Player {game.players[sid]['name']} resumed in game {game.game_id}", flush=True)
+    snapshot = game_engine.resume_snapshot(game, sid, time.time(), buffer.has_answered(sid))
+    snapshot['standings'] = player_list_payload(game)
+    emit('resumed', snapshot)
+    if game.players[sid]['eliminated']:
+        emit('spectating', {'reason': 'eliminated'})
+        emit('spectator_snapshot', spectators.snapshot(game))
+    if game.status == 'waiting' and not arena.is_arena(game):
+        emit('lobby_state', get_lobby_feed(game).state(game))
+    if game.status == 'playing':
+        send_staged(game, request.sid)
+    return True
 
 @socketio.on('admin_join')
 def handle_admin_join(data):
@@ -466,25 +886,39 @@ def handle_admin_join(data):
     print(f"Admin joining game: {game_id}", flush=True)
     if game_id in games:
         games[game_id].admin_sid = request.sid
-        join_room(game_id)
+        game_tracker.touch(game_id, time.time())
+        negotiate_wire(data)
+        join_game_room(request.sid, game_id)
         emit('admin_joined')
         
         # Send current player list to admin only
         game = games[game_id]
-        player_list = list(game.players.values())
-        print(f"Sending {len(player_list)} players to admin", flush=True)
-        emit('admin_player_list', {'players': player_list})
+        print(f"Sending {len(game.players)} players to admin", flush=True)
+        emit_event('admin_player_list', player_list_payload(game), request.sid)
+        if game.status == 'waiting' and not arena.is_arena(game):
+            emit('lobby_state', get_lobby_feed(game).state(game))
     else:
         print(f"Game {game_id} not found in memory", flush=True)
         emit('error', {'message': 'Game not found'})
 
+@socketio.on('clock_sync')
+def handle_clock_sync(data):
+    """Acknowledge with the server time so clients can estimate their clock offset"""
+    return time.time()
+
 @socketio.on('get_players')
+@limited('get_players')
 def handle_get_players(data):
     game_id = data['game_id']
     if game_id in games:
-        game = games[game_id]
-        player_list = list(game.players.values())
-        emit('admin_player_list', {'players': player_list})
+        emit_event('admin_player_list', player_list_payload(games[game_id]), request.sid)
+
+@socketio.on('lobby_sync')
+@limited('lobby_sync')
+def handle_lobby_sync(data):
+    game = games.get(data['game_id'])
+    if game and not arena.is_arena(game):
+        emit('lobby_state', get_lobby_feed(game).state(game))
 
 @socketio.on('stop_game')
 def handle_stop_game(data):
@@ -497,6 +931,7 @@ def handle_stop_game(data):
     game = games[game_id]
     if game.admin_sid != request.sid:
         return
+    game_tracker.restarted(game_id)
     
     # Cancel any active timers
     if game_id in game_timers:
@@ -504,11 +939,17 @@ def handle_stop_game(data):
         del game_timers[game_id]
     
     # Close all player tabs
-    socketio.emit('close_tab', {'message': 'Game has been stopped by administrator'}, room=game_id)
-    
-    # Remove all players from the room
-    for player_sid in list(game.players.keys()):
-        socketio.server.leave_room(player_sid, game_id)
+    broadcast(game, 'close_tab', {'message': 'Game has been stopped by administrator'})
+    
+    # Remove all players from the room once the notice has gone out
+    rooms = player_rooms(game)
+    close_spectator_room(game_id)
+    arena.reset_shards(game)
+    get_answer_buffer(game).clear()
+    game_recorders.pop(game_id, None)
+    resume_tokens.discard_game(game_id)
+    get_lobby_feed(game).reset()
+    staged_questions.pop(game_id, None)
     
     # Reset game state
     game.status = 'waiting'
@@ -516,6 +957,7 @@ def handle_stop_game(data):
     game.current_question = 0
     game.questions = []
     game.players = {}
+    leave_rooms_after_queued(game_id, rooms)
     
     print(f"Game {game_id} stopped and reset", flush=True)
 
@@ -532,55 +974,33 @@ def handle_start_game(data):
     if game.admin_sid != request.sid:
         print(f"Unauthorized start game request", flush=True)
         return
+    if not admission_control.admit():
+        emit('error', {'message': 'Server is busy, please try starting the game again shortly',
+                       'retry_after': admission.RETRY_AFTER})
+        return
+    game_tracker.restarted(game_id)
     
-    # Load questions from DynamoDB
-    print(f"Loading questions from DynamoDB", flush=True)
-    questions_table = dynamodb.Table('trivia_questions')
-    response = questions_table.scan()
-    all_questions = response['Items']
-    print(f"Found {len(all_questions)} questions in database", flush=True)
-    
-    import random
-    game.questions = random.sample(all_questions, min(45, len(all_questions)))
+    # Rounds go from mostly easy to mostly hard questions
+    if sample_in_database:
+        game.questions = repo.sample_game(game_engine.ROUNDS, game_engine.QUESTIONS_PER_ROUND)
+    else:
+        game.questions = get_question_bank().sample_game(game_engine.ROUNDS, game_engine.QUESTIONS_PER_ROUND)
     print(f"Selected {len(game.questions)} questions for game", flush=True)
     
     game.status = 'playing'
-    game.current_round = 1
-    game.current_question = 0
+    game_recorders[game_id] = game_history.GameRecorder(game, time.time())
     
     print(f"Emitting game_started to room {game_id}", flush=True)
-    socketio.emit('game_started', room=game_id)
+    broadcast(game, 'game_started')
     
     # Show round 1 start screen before first question
     print(f"Showing round 1 start screen to room {game_id}", flush=True)
-    socketio.emit('show_round_start', {'round_number': 1}, room=game_id)
+    dispatch(game, game_engine.start_round(game, 1))
     print(f"Round start event emitted, waiting 8 seconds before first question", flush=True)
+    socketio.start_background_task(stage_question, game_id, (game.current_round, game.current_question))
     
     # Wait longer to ensure round start screen is seen
-    threading.Timer(8.0, start_question, [game_id]).start()
-
-def validate_question(question):
-    """Validate question has required fields"""
-    required_fields = ['question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
-    
-    for field in required_fields:
-        if field not in question:
-            return False
-    
-    # Check if correct_answer is valid (a, b, c, or d)
-    if question['correct_answer'] not in ['a', 'b', 'c', 'd']:
-        return False
-        
-    return True
-
-def find_correct_answer_fallback(question, correct_text):
-    """Try to find correct answer by matching text"""
-    for option in ['a', 'b', 'c', 'd']:
-        option_key = f'option_{option}'
-        if option_key in question and question[option_key] == correct_text:
-            question['correct_answer'] = option  # Fix the correct_answer field
-            return correct_text
-    return None
+    start_timer(8.0, start_question, game_id)
 
 def skip_to_next_question(game_id):
     """Skip current question and move to next"""
@@ -588,12 +1008,13 @@ def skip_to_next_question(game_id):
         game = games[game_id]
         game.current_question += 1
         
-        socketio.emit('question_skipped', {
+        broadcast(game, 'question_skipped', {
             'message': 'Question had errors and was skipped'
-        }, room=game_id)
+        })
+        socketio.start_background_task(stage_question, game_id, (game.current_round, game.current_question))
         
         # Start next question after short delay
-        threading.Timer(2.0, start_question, [game_id]).start()
+        start_timer(2.0, start_question, game_id)
         
     except Exception as e:
         print(f"Error skipping question: {e}", flush=True)
@@ -609,120 +1030,71 @@ def start_question(game_id):
         print(f"Total players in game: {len(game.players)}", flush=True)
         
         # Check if only one player remains active before starting question
-        active_players = [p for p in game.players.values() if not p['eliminated']]
-        print(f"Active players: {len(active_players)}", flush=True)
-        
-        if len(active_players) <= 1:
-            print(f"Not enough active players ({len(active_players)}), ending game", flush=True)
+        if game_engine.is_game_over(game):
+            print(f"Not enough active players, ending game", flush=True)
             end_game(game_id)
             return
         
         print(f"Starting question for game {game_id}, round {game.current_round}, question {game.current_question}", flush=True)
         
-        if game.current_question >= 15:
+        if game.current_question >= game_engine.QUESTIONS_PER_ROUND:
             print(f"Round {game.current_round} complete, ending round", flush=True)
             end_round(game_id)
             return
         
-        # Use modulo to cycle through questions if we run out
-        question_idx = ((game.current_round - 1) * 15 + game.current_question) % len(game.questions)
-        question = game.questions[question_idx]
-        print(f"Question data: {question}", flush=True)
-        
-        # Validate question structure
-        if not validate_question(question):
-            print(f"Invalid question structure: {question}", flush=True)
-            skip_to_next_question(game_id)
-            return
-        
-        # Reset question state completely
-        game.question_start_time = time.time()
-        game.answers = {}
-        game.voting_active = False
-        game.votes_cast = {}
-        game.points_awarded = {}
-        game.question_expired = False
+        staged = staged_questions.pop(game_id, None)
+        if staged and staged.position == (game.current_round, game.current_question):
+            # Already shuffled and sent; only the key goes out now
+            question_data = staged.question_data
+        else:
+            staged = None
+            # Use modulo to cycle through questions if we run out
+            question = game.questions[game_engine.question_index(game)]
+            print(f"Question data: {question}", flush=True)
+            
+            # Validate question and randomize correct answer position
+            question_data = game_engine.prepare_question(game, question)
+            if question_data is None:
+                print(f"Invalid question structure: {question}", flush=True)
+                skip_to_next_question(game_id)
+                return
         
         # Cancel any existing timers
         if game_id in game_timers:
             game_timers[game_id].cancel()
             del game_timers[game_id]
         
-        # Randomize correct answer position
-        import random
-        positions = ['a', 'b', 'c', 'd']
-        new_correct_position = random.choice(positions)
-        
-        # Get the correct answer text with error handling
-        original_correct = question['correct_answer']
-        try:
-            correct_text = question[f'option_{original_correct}']
-        except KeyError:
-            print(f"Error: Invalid correct_answer '{original_correct}' for question {question.get('id', 'unknown')}", flush=True)
-            # Try to find the correct answer by matching text
-            correct_text = find_correct_answer_fallback(question, original_correct)
-            if not correct_text:
-                skip_to_next_question(game_id)
-                return
-            original_correct = question['correct_answer']  # Use the fixed value
-        
-        # Create list of all answer texts
-        all_options = [
-            question['option_a'],
-            question['option_b'],
-            question['option_c'],
-            question['option_d']
-        ]
-        
-        # Remove correct answer and shuffle remaining
-        other_options = [opt for opt in all_options if opt != correct_text]
-        random.shuffle(other_options)
-        
-        # Place correct answer in random position, fill others
-        final_options = [''] * 4
-        correct_index = positions.index(new_correct_position)
-        final_options[correct_index] = correct_text
-        
-        other_index = 0
-        for i in range(4):
-            if i != correct_index:
-                final_options[i] = other_options[other_index]
-                other_index += 1
-        
-        # Store the randomized correct answer
-        game.current_correct_answer = new_correct_position
-        
-        question_data = {
-            'round': game.current_round,
-            'question_num': game.current_question + 1,
-            'question': question['question'],
-            'options': {
-                'a': final_options[0],
-                'b': final_options[1],
-                'c': final_options[2],
-                'd': final_options[3]
-            },
-            'correct_answer': new_correct_position
-        }
+        # Reset question state completely
+        game_engine.open_question(game, question_data, time.time())
+        arena.reset_tallies(game)
+        get_answer_buffer(game).reset()
         
         print(f"Sending question data to room {game_id}: {question_data}", flush=True)
         print(f"Active players: {[p['name'] for p in game.players.values() if not p['eliminated']]}", flush=True)
         
-        # Send to all players individually to ensure delivery
-        for player_sid in game.players.keys():
-            socketio.emit('new_question', question_data, room=player_sid)
-        
-        # Also send to room as backup
-        socketio.emit('new_question', question_data, room=game_id)
-        
-        # Send question data to admin
-        if game.admin_sid:
-            socketio.emit('new_question', question_data, room=game.admin_sid)
+        if staged:
+            reveal_question(game, staged)
+        elif arena.is_arena(game):
+            # One emit per shard room; admin is in the game room
+            broadcast(game, 'new_question', question_data)
+        else:
+            encoded = wire.encode('new_question', question_data) if wire.is_compact('new_question') else None
+            
+            # Send to all active players individually to ensure delivery; spectators get snapshots
+            for player_sid in game_engine.active_sids(game):
+                emit_event('new_question', question_data, player_sid, encoded, game_id)
+            
+            # Also send to room as backup
+            broadcast_event('new_question', question_data, game_id, encoded)
+            spectator_feed.mark(game_id)
+            
+            # Send question data to admin
+            if game.admin_sid:
+                emit_event('new_question', question_data, game.admin_sid, encoded, game_id)
         
-        # Start 30-second timer
-        timer = threading.Timer(30.0, question_timeout, [game_id])
-        game_timers[game_id] = timer
-        timer.start()
+        # Close the question once the deadline's grace window has passed
+        game_timers[game_id] = start_timer(game_engine.QUESTION_TIME_LIMIT + game_engine.DEADLINE_GRACE,
+                                           question_timeout, game_id)
         print(f"Question timer started for 30 seconds", flush=True)
         
     except Exception as e:
@@ -731,7 +1103,66 @@ def start_question(game_id):
         traceback.print_exc()
         skip_to_next_question(game_id)
 
+def stage_question(game_id, position):
+    """Prepare the question at position and send it encrypted ahead of time"""
+    game = games.get(game_id)
+    if not staging.AVAILABLE or game is None or game.status != 'playing' or not game.questions:
+        return
+    if position[0] > game_engine.ROUNDS:
+        return
+    question = game.questions[game_engine.question_index(game, position)]
+    question_data = game_engine.prepare_question(game, question, position=position)
+    if question_data is None:
+        return
+    staged = staged_questions[game_id] = staging.StagedQuestion(position, question_data)
+    broadcast(game, 'question_staged', staged.staged())
+    print(f"Staged round {position[0]} question {position[1] + 1} for game {game_id}", flush=True)
+
+def send_staged(game, sid):
+    """Catch a player up on the staged question they missed by joining late"""
+    staged = staged_questions.get(game.game_id)
+    if staged and sid in staging_sids:
+        emit_event('question_staged', staged.staged(), sid, lane=game.game_id)
+
+def reveal_question(game, staged):
+    """Broadcast the key to a staged question; players who cannot decrypt get it in full"""
+    question_data = staged.question_data
+    encoded = wire.encode('new_question', question_data) if wire.is_compact('new_question') else None
+    for player_sid in game_engine.active_sids(game):
+        if player_sid not in staging_sids:
+            emit_event('new_question', question_data, player_sid, encoded, game.game_id)
+    if game.admin_sid:
+        emit_event('new_question', question_data, game.admin_sid, encoded, game.game_id)
+    broadcast(game, 'question_reveal', staged.reveal())
+
+@socketio.on('watch_game')
+@limited('watch_game')
+def handle_watch_game(data):
+    """Follow a game from its spectator room, on periodic snapshots"""
+    game = games.get(data.get('game_id'))
+    if game is None:
+        emit('error', {'message': 'Game not found'})
+        return
+    if not can_watch(game.game_id):
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    negotiate_wire(data)
+    join_game_room(request.sid, spectators.room(game.game_id))
+    spectator_feed.add(game.game_id, request.sid)
+    emit('spectating', {'reason': 'watching'})
+    emit('spectator_snapshot', spectators.snapshot(game))
+
+@socketio.on('question_fetch')
+@limited('question_fetch')
+def handle_question_fetch(data):
+    """Full current question for a player whose staged copy was missing or unreadable"""
+    game = games.get(data['game_id'])
+    if game and request.sid in game.players and game.question_data and not game.question_expired:
+        emit_event('new_question', game.question_data, request.sid)
+
 @socketio.on('submit_answer')
+@limited('submit_answer')
 def handle_submit_answer(data):
     game_id = data['game_id']
     answer = data['answer']
@@ -740,36 +1171,29 @@ def handle_submit_answer(data):
         return
     
     game = games[game_id]
-    player = game.players.get(request.sid)
-    
-    if not player or player['eliminated'] or player['readonly']:
-        return
-    
-    # Check if question time has expired
-    if hasattr(game, 'question_expired') and game.question_expired:
-        emit('answer_rejected', {'message': 'Time expired, answer not accepted'})
+    allowed, events = game_engine.check_answer(game, request.sid, time.time())
+    dispatch(game, events)
+    if not allowed:
         return
     
-    # Prevent duplicate answers
-    if request.sid in game.answers:
+    # Buffered and written to the answer arrays in micro-batches; duplicates are ignored
+    buffer = get_answer_buffer(game)
+    if not buffer.submit(request.sid, answer, time.time() - game.question_start_time):
         return
+    arena.tally_answer(game, request.sid, answer)
     
-    game.answers[request.sid] = answer
-    print(f"Player {player['name']} submitted answer. Total answers: {len(game.answers)}", flush=True)
+    print(f"Player {game.players[request.sid]['name']} submitted answer. Total answers: {buffer.answered_count}", flush=True)
     
     # Check if ALL active players have answered
-    active_players = [sid for sid, p in game.players.items() if not p['eliminated']]
-    print(f"Active players: {len(active_players)}, Answers received: {len(game.answers)}", flush=True)
-    
-    if len(game.answers) >= len(active_players):
+    if buffer.all_answered():
         print(f"All active players answered, stopping timer", flush=True)
         if game_id in game_timers:
             game_timers[game_id].cancel()
             del game_timers[game_id]
-        socketio.emit('timer_stop', room=game_id)
+        broadcast(game, 'timer_stop')
         # Send timer stop to admin
         if game.admin_sid:
-            socketio.emit('timer_stop', room=game.admin_sid)
+            emit_event('timer_stop', None, game.admin_sid, lane=game_id)
         question_timeout(game_id)
 
 def question_timeout(game_id):
@@ -777,44 +1201,25 @@ def question_timeout(game_id):
         return
     
     game = games[game_id]
-    # Mark question as expired to prevent late answers
-    game.question_expired = True
-    
-    # Add incorrect answers for players who didn't answer
-    active_players = [sid for sid, p in game.players.items() if not p['eliminated']]
-    for player_sid in active_players:
-        if player_sid not in game.answers:
-            game.answers[player_sid] = 'no_answer'  # Mark as incorrect
-    
-    # Get correct answer from the last question data sent
-    correct_answer = getattr(game, 'current_correct_answer', 'a')
-    
-    correct_players = []
-    incorrect_players = []
-    
-    for sid, answer in game.answers.items():
-        if sid in game.players:  # Safety check
-            player = game.players[sid]
-            if answer == correct_answer:
-                correct_players.append({'sid': sid, 'name': player['name']})
-            else:
-                incorrect_players.append({'sid': sid, 'name': player['name']})
-    
-    # Initialize voting state
-    game.voting_active = True
-    game.votes_cast = {}
-    game.points_awarded = {}
-    game.correct_players = correct_players
-    game.incorrect_players = incorrect_players
+    if game.question_expired:
+        return
     
-    socketio.emit('question_result', {
-        'correct_answer': correct_answer,
-        'correct_players': correct_players,
-        'incorrect_players': incorrect_players
-    }, room=game_id)
+    # One vectorized pass over the answer arrays
+    buffer = get_answer_buffer(game)
+    correct_sids, incorrect_sids, answer_counts = buffer.partition(game.current_correct_answer)
+    print(f"Answer distribution: {answer_counts}", flush=True)
+    question_id = game.questions[game_engine.question_index(game)].get('id')
+    if question_id is not None:
+        question_stats.record(question_id, len(correct_sids), answer_counts, buffer.answer_times())
+    dispatch(game, game_engine.close_question(game, (correct_sids, incorrect_sids)))
+    # The voting phase and the admin's pause are idle time for the next question
+    socketio.start_background_task(stage_question, game_id, game_engine.upcoming_position(game))
+    recorder = game_recorders.get(game_id)
+    if recorder:
+        recorder.record_question(game, correct_sids, incorrect_sids)
     
     # Start voting phase if there are correct and incorrect players
-    if correct_players and incorrect_players:
+    if game_engine.needs_voting(game):
         start_voting_phase(game_id)
     else:
         # No voting needed, proceed to next question
@@ -827,19 +1232,11 @@ def start_voting_phase(game_id):
     game = games[game_id]
     
     # Send voting options to correct players
-    available_targets = [p for p in game.incorrect_players 
-                        if game.players[p['sid']]['score'] < 10]
-    
-    for correct_player in game.correct_players:
-        socketio.emit('voting_phase', {
-            'incorrect_players': available_targets,
-            'time_limit': 30
-        }, room=correct_player['sid'])
-    
-    # Start 30-second voting timer
-    timer = threading.Timer(30.0, voting_timeout, [game_id])
-    game_timers[game_id] = timer
-    timer.start()
+    dispatch(game, game_engine.open_voting(game, time.time()))
+    
+    # Close voting once the deadline's grace window has passed
+    game_timers[game_id] = start_timer(game_engine.VOTING_TIME_LIMIT + game_engine.DEADLINE_GRACE,
+                                       voting_timeout, game_id)
     print(f"Voting phase started for 30 seconds", flush=True)
 
 def voting_timeout(game_id):
@@ -849,68 +1246,16 @@ def voting_timeout(game_id):
     game = games[game_id]
     print(f"Voting timeout - assigning random votes", flush=True)
     
-    # Assign random votes for players who haven't voted
-    import random
-    
-    for correct_player in game.correct_players:
-        voter_sid = correct_player['sid']
-        if voter_sid not in game.votes_cast:
-            # Find available targets for this voter
-            available_targets = []
-            for incorrect_player in game.incorrect_players:
-                target_sid = incorrect_player['sid']
-                current_round_points = game.points_awarded.get(target_sid, 0)
-                total_score = game.players[target_sid]['score']
-                points_per_vote = game.current_round if game.current_round <= 3 else 1
-                points_would_award = min(points_per_vote, 10 - total_score)
-                
-                if current_round_points + points_would_award <= 4 and total_score < 10 and points_would_award > 0:
-                    available_targets.append(target_sid)
-            
-            if available_targets:
-                # Randomly select a target
-                target_sid = random.choice(available_targets)
-                points_per_vote = game.current_round if game.current_round <= 3 else 1
-                points_to_award = min(points_per_vote, 10 - game.players[target_sid]['score'])
-                
-                # Record the vote
-                game.votes_cast[voter_sid] = target_sid
-                game.points_awarded[target_sid] = game.points_awarded.get(target_sid, 0) + points_to_award
-                game.players[target_sid]['score'] += points_to_award
-                
-                # Send updated player list to admin with new scores
-                if game.admin_sid:
-                    player_list = list(game.players.values())
-                    socketio.emit('admin_player_list', {'players': player_list}, room=game.admin_sid)
-                
-                # Send score updates to all players
-                player_list = list(game.players.values())
-                socketio.emit('score_update', {'players': player_list}, room=game_id)
-                
-                # Check for elimination
-                if game.players[target_sid]['score'] >= 10:
-                    game.players[target_sid]['eliminated'] = True
-                    game.players[target_sid]['readonly'] = True
-                    game.players[target_sid]['eliminated_at'] = time.time()
-                    socketio.emit('player_eliminated', {'name': game.players[target_sid]['name']}, room=game_id)
-                    
-                    # Send updated player list to admin after elimination
-                    if game.admin_sid:
-                        player_list = list(game.players.values())
-                        socketio.emit('admin_player_list', {'players': player_list}, room=game.admin_sid)
-                    
-                    # Send score updates to all players after elimination
-                    player_list = list(game.players.values())
-                    socketio.emit('score_update', {'players': player_list}, room=game_id)
-                
-                # Notify the voter
-                socketio.emit('vote_recorded', {
-                    'target': game.players[target_sid]['name'], 
-                    'points': points_to_award,
-                    'auto_selected': True
-                }, room=voter_sid)
-                
-                print(f"Auto-voted: {game.players[voter_sid]['name']} -> {game.players[target_sid]['name']} (+{points_to_award})", flush=True)
+    # Assign random votes for all players who haven't voted in one batch,
+    # then send a single consolidated update
+    with get_game_lock(game_id):
+        # Voting may already have been closed by the last manual vote
+        if not game.voting_active or game_engine.voting_complete(game):
+            return
+        assignments = vote_allocator.allocate(game)
+        events = game_engine.apply_votes(game, assignments, time.time())
+    dispatch(game, events)
+    print(f"Auto-assigned {len(assignments)} votes", flush=True)
     
     # End voting phase
     end_voting_phase(game_id)
@@ -920,60 +1265,26 @@ def end_voting_phase(game_id):
         return
     
     game = games[game_id]
-    game.voting_active = False
-    
-    # Send points received to incorrect players with voter names
-    for incorrect_player in game.incorrect_players:
-        target_sid = incorrect_player['sid']
-        points_this_round = game.points_awarded.get(target_sid, 0)
-        
-        # Find who voted for this player
-        voters = []
-        for voter_sid, voted_for_sid in game.votes_cast.items():
-            if voted_for_sid == target_sid:
-                voter_name = game.players[voter_sid]['name']
-                voters.append(voter_name)
-        
-        if points_this_round > 0:
-            if len(voters) == 1:
-                message = f"You received {points_this_round} point from {voters[0]}!"
-            else:
-                voter_list = ', '.join(voters[:-1]) + f" and {voters[-1]}"
-                message = f"You received {points_this_round} points from {voter_list}!"
-        else:
-            message = "You received no points this round."
-        
-        socketio.emit('points_received', {
-            'points': points_this_round,
-            'message': message,
-            'voters': voters
-        }, room=target_sid)
+    get_answer_buffer(game).deactivate_eliminated(game)
+    events = game_engine.close_voting(game)
+    recorder = game_recorders.get(game_id)
+    if recorder:
+        recorder.record_eliminations(game)
+    if arena.is_arena(game):
+        # Per-vote score updates were held back; send one consolidated update
+        events += arena.standings_events(game)
+    dispatch(game, events)
+    move_to_spectators(game)
     
     # Check if only one player remains active
-    active_players = [p for p in game.players.values() if not p['eliminated']]
-    if len(active_players) <= 1:
+    if game_engine.is_game_over(game):
         end_game(game_id)
         return
     
-    # Send final admin summary
-    if game.admin_sid:
-        # Create points awarded with player names
-        points_with_names = {}
-        for sid, points in game.points_awarded.items():
-            player_name = game.players[sid]['name']
-            points_with_names[player_name] = points
-        
-        admin_summary = {
-            'correct_players': game.correct_players,
-            'incorrect_players': game.incorrect_players,
-            'points_awarded': points_with_names,
-            'all_scores': {p['name']: p['score'] for p in game.players.values()}
-        }
-        socketio.emit('admin_question_summary', admin_summary, room=game.admin_sid)
-    
     print(f"Voting phase ended for game {game_id}", flush=True)
 
 @socketio.on('vote_player')
+@limited('vote_player')
 def handle_vote_player(data):
     game_id = data['game_id']
     target_sid = data['target_sid']
@@ -982,107 +1293,22 @@ def handle_vote_player(data):
         return
     
     game = games[game_id]
-    voter = game.players.get(request.sid)
-    target = game.players.get(target_sid)
-    
-    if not voter or not target or not hasattr(game, 'voting_active') or not game.voting_active:
-        return
-    
-    # Check if voter already voted
-    if request.sid in game.votes_cast:
-        emit('vote_failed', {'message': 'You have already voted'})
+    with get_game_lock(game_id):
+        accepted, events = game_engine.cast_vote(game, request.sid, target_sid, time.time())
+        complete = accepted and game_engine.voting_complete(game)
+    dispatch(game, events)
+    if not accepted:
         return
     
-    # Check limits: max 4 points per round, max 10 total points
-    points_per_vote = game.current_round if game.current_round <= 3 else 1
-    round_points = game.points_awarded.get(target_sid, 0)
-    points_would_award = min(points_per_vote, 10 - target['score'])
-    if round_points + points_would_award > 4 or target['score'] >= 10 or points_would_award <= 0:
-        # Send updated list without this player
-        available_targets = []
-        for incorrect_player in game.incorrect_players:
-            sid = incorrect_player['sid']
-            if (game.points_awarded.get(sid, 0) < 4 and 
-                game.players[sid]['score'] < 10):
-                available_targets.append(incorrect_player)
-        
-        emit('vote_failed', {
-            'message': f"{target['name']} cannot receive more points",
-            'available_targets': available_targets
-        })
-        return
-    
-    # Record vote and award points based on round, but cap at 10 total
-    points_per_vote = game.current_round if game.current_round <= 3 else 1
-    points_to_award = min(points_per_vote, 10 - target['score'])
-    
-    game.votes_cast[request.sid] = target_sid
-    game.points_awarded[target_sid] = game.points_awarded.get(target_sid, 0) + points_to_award
-    target['score'] += points_to_award
-    
-    # Send updated player list to admin with new scores
-    if game.admin_sid:
-        player_list = list(game.players.values())
-        socketio.emit('admin_player_list', {'players': player_list}, room=game.admin_sid)
-    
-    # Send score updates to all players
-    player_list = list(game.players.values())
-    socketio.emit('score_update', {'players': player_list}, room=game_id)
-    
-    # Check if target now has 4 points this round - notify other voters to choose again
-    if game.points_awarded[target_sid] == 4:
-        for voter_sid in game.correct_players:
-            if (voter_sid['sid'] not in game.votes_cast and 
-                voter_sid['sid'] != request.sid):
-                # Send updated voting options without the maxed-out player
-                available_targets = []
-                for incorrect_player in game.incorrect_players:
-                    sid = incorrect_player['sid']
-                    if (game.points_awarded.get(sid, 0) < 4 and 
-                        game.players[sid]['score'] < 10):
-                        available_targets.append(incorrect_player)
-                
-                socketio.emit('voting_phase', {
-                    'incorrect_players': available_targets,
-                    'time_limit': 30,
-                    'message': f"{target['name']} has reached maximum points. Please choose another player."
-                }, room=voter_sid['sid'])
-    
-    # Check for elimination
-    if target['score'] >= 10:
-        target['eliminated'] = True
-        target['readonly'] = True
-        target['eliminated_at'] = time.time()
-        socketio.emit('player_eliminated', {'name': target['name']}, room=game_id)
-        
-        # Send updated player list to admin after elimination
-        if game.admin_sid:
-            player_list = list(game.players.values())
-            socketio.emit('admin_player_list', {'players': player_list}, room=game.admin_sid)
-        
-        # Send score updates to all players after elimination
-        player_list = list(game.players.values())
-        socketio.emit('score_update', {'players': player_list}, room=game_id)
-    
-    emit('vote_recorded', {'target': target['name'], 'points': points_to_award})
-    print(f"Vote recorded: {voter['name']} -> {target['name']}", flush=True)
+    print(f"Vote recorded: {game.players[request.sid]['name']} -> {game.players[target_sid]['name']}", flush=True)
     
     # Check if all correct players have voted
-    if len(game.votes_cast) >= len(game.correct_players):
+    if complete:
         print(f"All votes cast, ending voting phase", flush=True)
         if game_id in game_timers:
             game_timers[game_id].cancel()
             del game_timers[game_id]
         end_voting_phase(game_id)
-    else:
-        # Update admin with current voting status
-        if game.admin_sid:
-            voting_summary = {
-                'votes_cast': len(game.votes_cast),
-                'total_voters': len(game.correct_players),
-                'points_awarded': game.points_awarded
-            }
-            socketio.emit('voting_update', voting_summary, room=game.admin_sid)
 
 def end_voting(game_id):
     next_question(game_id)
@@ -1102,19 +1328,12 @@ def handle_next_question(data):
             print(f"Unauthorized next question request", flush=True)
             return
         
-        # Reset voting state
-        game.voting_active = False
-        game.votes_cast = {}
-        game.points_awarded = {}
-        
-        # Clear previous answers
-        game.answers = {}
-        
-        game.current_question += 1
+        # Reset voting state and clear previous answers
+        round_complete = game_engine.advance_question(game)
         print(f"Moving to question {game.current_question} in round {game.current_round}", flush=True)
         
         # Check if round is complete
-        if game.current_question >= 15:
+        if round_complete:
             end_round(game_id)
         else:
             start_question(game_id)
@@ -1131,27 +1350,26 @@ def next_question(game_id):
     game = games[game_id]
     game.current_question += 1
     
-    threading.Timer(3.0, start_question, [game_id]).start()
+    start_timer(3.0, start_question, game_id)
 
 def end_round(game_id):
     if game_id not in games:
         return
     
     game = games[game_id]
+    recorder = game_recorders.get(game_id)
+    if recorder:
+        recorder.record_round(game)
     
     # Check if only one player remains active
-    active_players = [p for p in game.players.values() if not p['eliminated']]
-    if len(active_players) <= 1:
+    if game_engine.is_game_over(game):
         end_game(game_id)
         return
     
     # Continue to next round if more than one player remains
-    game.current_round += 1
-    game.current_question = 0
-    
-    # Show round start page before continuing
-    socketio.emit('show_round_start', {'round_number': game.current_round}, room=game_id)
-    threading.Timer(8.0, start_question, [game_id]).start()
+    # and show round start page before continuing
+    dispatch(game, game_engine.start_round(game, game.current_round + 1))
+    start_timer(8.0, start_question, game_id)
 
 def end_game(game_id):
     if game_id not in games:
@@ -1159,70 +1377,183 @@ def end_game(game_id):
     
     game = games[game_id]
     
-    # Find the winner (last remaining active player)
-    active_players = [p for p in game.players.values() if not p['eliminated']]
-    winner = active_players[0] if active_players else None
-    
-    final_scores = [(p['name'], p['score']) for p in game.players.values()]
-    final_scores.sort(key=lambda x: x[1])
-    
-    socketio.emit('game_ended', {
-        'final_scores': final_scores,
-        'winner': winner['name'] if winner else 'No winner'
-    }, room=game_id)
-    
-    print(f"Game {game_id} ended. Winner: {winner['name'] if winner else 'No winner'}", flush=True)
-    
-    # Clean up game state to prevent stale data
-    game.players = {}
-    game.status = 'waiting'
-    game.current_round = 0
-    game.current_question = 0
-    game.answers = {}
+    results = game_engine.final_results(game)
+    print(f"Game {game_id} ended. Winner: {results['winner']}", flush=True)
+    
+    # Results are ranked and queued for storage off the handler thread
+    recorder = game_recorders.pop(game_id, None)
+    if recorder:
+        recorder.record_round(game)
+        socketio.start_background_task(save_results, recorder, game.players, results['winner'], time.time())
+    
+    # Announce results and clean up game state to prevent stale data
+    dispatch(game, game_engine.finish_game(game))
+    game_tracker.ended(game_id, time.time())
+    # Watchers get the results above, then the room closes and snapshots stop
+    close_spectator_room(game_id)
+    arena.reset_shards(game)
+    get_answer_buffer(game).clear()
+    resume_tokens.discard_game(game_id)
+    get_lobby_feed(game).reset()
+    staged_questions.pop(game_id, None)
     
     # Cancel any active timers
     if game_id in game_timers:
         game_timers[game_id].cancel()
         del game_timers[game_id]
 
+def save_results(recorder, players, winner, finished_at):
+    try:
+        items = recorder.finish(players, winner, finished_at)
+        record_leaderboard([item for item in items if item['pk'].startswith('PLAYER#')], finished_at)
+        repo.save_results(items)
+        print(f"Queued {len(items)} result items for run {recorder.run_id}", flush=True)
+    except Exception as e:
+        print(f"Error saving results for run {recorder.run_id}: {e}", flush=True)
+
+def record_leaderboard(rows, finished_at):
+    with leaderboard_lock:
+        if not leaderboard_state['loaded']:
+            leaderboard_state['pending'].append((rows, finished_at))
+            return
+    boards.record(rows, finished_at)
+
+def snapshot_leaderboard():
+    if not leaderboard_state['loaded']:
+        # The warm-up load failed; retry it instead of writing over the stored snapshot
+        try:
+            load_leaderboard()
+        except Exception as e:
+            print(f"Leaderboards not loaded, snapshot skipped: {e}", flush=True)
+            return
+    if boards.dirty:
+        count = repo.save_leaderboard(boards)
+        print(f"Queued leaderboard snapshot ({count} items)", flush=True)
+
+def flush_question_stats():
+    written = question_stats.flush(repo.add_question_stats)
+    if written:
+        print(f"Flushed answer stats for {written} questions", flush=True)
+
+def question_stats_flushes():
+    """Write accumulated per-question answer stats periodically"""
+    while True:
+        socketio.sleep(answer_stats.FLUSH_INTERVAL)
+        try:
+            flush_question_stats()
+        except Exception as e:
+            print(f"Error flushing question stats: {e}", flush=True)
+
+def leaderboard_snapshots():
+    """Persist leaderboard changes periodically"""
+    while True:
+        socketio.sleep(leaderboard.SNAPSHOT_INTERVAL)
+        try:
+            snapshot_leaderboard()
+        except Exception as e:
+            print(f"Error saving leaderboard snapshot: {e}", flush=True)
+
+def remove_player(game, sid):
+    """Drop a player for good and close the question if everyone left has answered"""
+    player = game.players.pop(sid)
+    print(f"Removing {player['name']} from game {game.game_id}", flush=True)
+    if game.status == 'waiting':
+        lobby_changed(game, get_lobby_feed(game).leave(player))
+    arena.release(game, sid)
+    
+    # Also remove from any active answers
+    buffer = get_answer_buffer(game)
+    buffer.release(sid)
+    close_if_all_answered(game)
+
+def close_if_all_answered(game):
+    # If this was during a question and all remaining connected players have answered, end the question
+    if game.status == 'playing' and not game.question_expired:
+        if get_answer_buffer(game).all_answered():
+            if game.game_id in game_timers:
+                game_timers[game.game_id].cancel()
+                del game_timers[game.game_id]
+            broadcast(game, 'timer_stop')
+            question_timeout(game.game_id)
+
+def sweep_held_players():
+    """Remove players whose resume grace window ran out"""
+    while True:
+        socketio.sleep(resume.SWEEP_INTERVAL)
+        for game_id, sid in resume_tokens.expired(time.time()):
+            try:
+                game = games.get(game_id)
+                if game and sid in game.players:
+                    remove_player(game, sid)
+            except Exception as e:
+                print(f"Error removing held player {sid}: {e}", flush=True)
+
 @socketio.on('disconnect')
 def handle_disconnect():
+    global sweeper_started
     print(f"Player disconnected: {request.sid}", flush=True)
+    wire_formats.pop(request.sid, None)
+    staging_sids.discard(request.sid)
+    broadcast_pool.forget(request.sid)
+    spectator_feed.forget(request.sid)
+    rate_limiter.forget(request.sid)
     
     try:
-        # Remove player from all games immediately
         for game_id, game in list(games.items()):
             if request.sid in game.players:
-                player_name = game.players[request.sid]['name']
-                print(f"Removing {player_name} from game {game_id}", flush=True)
-                del game.players[request.sid]
-                
-                # Also remove from any active answers
-                if hasattr(game, 'answers') and request.sid in game.answers:
-                    del game.answers[request.sid]
-                
-                # If this was during a question and all remaining connected players have answered, end the question
-                if hasattr(game, 'answers') and game.status == 'playing':
-                    connected_active_sids = [sid for sid, p in game.players.items() if not p['eliminated']]
-                    if len(game.answers) >= len(connected_active_sids) and len(connected_active_sids) > 0:
-                        if game_id in game_timers:
-                            game_timers[game_id].cancel()
-                            del game_timers[game_id]
-                        socketio.emit('timer_stop', room=game_id)
-                        question_timeout(game_id)
+                if resume_tokens.hold(request.sid, time.time()):
+                    # Hold the slot for the grace window; stop waiting on their answer meanwhile
+                    print(f"Holding {game.players[request.sid]['name']} in game {game_id} for "
+                          f"{resume_tokens.grace:.0f}s", flush=True)
+                    get_answer_buffer(game).deactivate(request.sid)
+                    close_if_all_answered(game)
+                    if not sweeper_started:
+                        sweeper_started = True
+                        socketio.start_background_task(sweep_held_players)
+                else:
+                    remove_player(game, request.sid)
                 break
     except Exception as e:
         print(f"disconnect handler error: {e}", flush=True)
         import traceback
         traceback.print_exc()
 
-if __name__ == '__main__':
-    print("Initializing DynamoDB...", flush=True)
-    try:
-        init_dynamodb()
-        print("DynamoDB initialized successfully", flush=True)
-    except Exception as e:
-        print(f"ERROR initializing DynamoDB: {e}", flush=True)
+def load_leaderboard():
+    """Replace the boards with the stored snapshot plus any games that finished before it loaded"""
+    global boards
+    loaded = repo.load_leaderboard()
+    with leaderboard_lock:
+        for rows, finished_at in leaderboard_state['pending']:
+            loaded.record(rows, finished_at)
+        leaderboard_state['pending'] = []
+        boards = loaded
+        leaderboard_state['loaded'] = True
+    print(f"Leaderboards loaded (snapshot {boards.version})", flush=True)
+
+def main():
+    debug = True
+    # The debug reloader's watcher process only restarts the server; it skips warm-up and tasks
+    if startup.serving_process(debug):
+        warmup.add('tables', init_storage)
+        warmup.add('leaderboard', load_leaderboard)
+        if not sample_in_database:
+            warmup.add('questions', get_question_bank)
+        if warmup.mode == startup.EAGER:
+            print("Initializing storage...", flush=True)
+            warmup.run()
+        else:
+            socketio.start_background_task(warmup.run)
+        # Registered after repo.close so the last snapshot is queued before the final flush
+        atexit.register(snapshot_leaderboard)
+        atexit.register(flush_question_stats)
+        socketio.start_background_task(leaderboard_snapshots)
+        socketio.start_background_task(question_stats_flushes)
+        socketio.start_background_task(sweep_games)
+        socketio.start_background_task(measure_load)
+        socketio.start_background_task(spectator_snapshots)
     
     print("Starting Flask application...", flush=True)
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5000, debug=debug)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Arena mode support
+Arena games hold up to 10,000 players. Players are spread over shard rooms so
+broadcasts fan out per shard, answers are counted per shard and merged for
+results, and room-wide payloads carry aggregates instead of full player lists.
+"""
+
+import heapq
+from itertools import islice
+
+import game_engine
+from game_engine import Event, ROOM, ADMIN
+
+SHARD_SIZE = 250
+# Players listed in arena standings (most recent eliminations + highest scores)
+STANDINGS_LIMIT = 20
+
+
+def is_arena(game):
+    return game.mode == game_engine.ARENA
+
+
+def shard_room(game_id, shard):
+    """Socket.IO room name for one shard of an arena game"""
+    return f'{game_id}:shard:{shard}'
+
+
+def player_room(game, sid):
+    """Room a player's socket joins for game broadcasts"""
+    if not is_arena(game) or sid not in game.shards:
+        return game.game_id
+    return shard_room(game.game_id, game.shards[sid])
+
+
+def broadcast_rooms(game):
+    """Rooms a game-wide broadcast has to reach"""
+    if not is_arena(game):
+        return [game.game_id]
+    return [game.game_id] + [shard_room(game.game_id, shard) for shard in game.shard_sizes]
+
+
+def assign_shard(game, sid):
+    """Place a player in the lowest shard that still has room"""
+    shard = 0
+    while game.shard_sizes.get(shard, 0) >= SHARD_SIZE:
+        shard += 1
+    game.shards[sid] = shard
+    game.shard_sizes[shard] = game.shard_sizes.get(shard, 0) + 1
+    return shard
+
+
+def release(game, sid):
+    """Free a player's shard slot"""
+    shard = game.shards.pop(sid, None)
+    if shard is not None:
+        game.shard_sizes[shard] -= 1
+
+
+def rebind(game, old_sid, new_sid):
+    """Keep a reconnecting player in their shard"""
+    if old_sid in game.shards:
+        game.shards[new_sid] = game.shards.pop(old_sid)
+
+
+def reset_shards(game):
+    game.shards = {}
+    game.shard_sizes = {}
+    game.shard_tallies = {}
+
+
+def reset_tallies(game):
+    """Clear answer counts before a new question"""
+    game.shard_tallies = {}
+
+
+def tally_answer(game, sid, answer):
+    """Count an accepted answer against the player's shard"""
+    if not is_arena(game):
+        return
+    counts = game.shard_tallies.get(game.shards.get(sid))
+    if counts is None:
+        counts = game.shard_tallies[game.shards.get(sid)] = dict.fromkeys(game_engine.OPTIONS, 0)
+    if answer in counts:
+        counts[answer] += 1
+
+
+def merged_tally(game):
+    """Answer distribution across all shards"""
+    totals = dict.fromkeys(game_engine.OPTIONS, 0)
+    for counts in game.shard_tallies.values():
+        for option, count in counts.items():
+            totals[option] += count
+    return totals
+
+
+def standings(game):
+    """Bounded player list plus counts, in place of the full player list"""
+    active = []
+    eliminated = []
+    for p in game.players.values():
+        (eliminated if p['eliminated'] else active).append(p)
+
+    shown = heapq.nlargest(STANDINGS_LIMIT, eliminated, key=lambda p: p['eliminated_at'] or 0)
+    shown += heapq.nlargest(STANDINGS_LIMIT, active, key=lambda p: p['score'])
+
+    return {
+        'players': shown,
+        'total_players': len(game.players),
+        'active_players': len(active),
+        'eliminated_players': len(eliminated)
+    }
+
+
+def recent_joins(game):
+    """Latest players to join, for arena lobby updates"""
+    return {
+        'players': list(islice(reversed(game.players.values()), STANDINGS_LIMIT)),
+        'total_players': len(game.players)
+    }
+
+
+def question_summary(game, correct_answer):
+    """Aggregated question_result payload"""
+    answer_counts = merged_tally(game)
+    answered = sum(answer_counts.values())
+    answer_counts['no_answer'] = max(0, len(game.correct_players) + len(game.incorrect_players) - answered)
+    return {
+        'correct_answer': correct_answer,
+        'correct_players': [],
+        'incorrect_players': [],
+        'correct_count': len(game.correct_players),
+        'incorrect_count': len(game.incorrect_players),
+        'answer_counts': answer_counts
+    }
+
+
+def standings_events(game):
+    """One consolidated standings update for players and admin"""
+    payload = standings(game)
+    return [
+        Event('score_update', payload, ROOM),
+        Event('admin_player_list', payload, ADMIN)
+    ]
+
+
+def compact_events(game, events):
+    """Replace room and admin payloads that grow with the player count"""
+    compacted = []
+
+    for event in events:
+        if event.to not in (ROOM, ADMIN):
+            compacted.append(event)
+            continue
+
+        if event.name == 'player_eliminated':
+            compacted.append(event)
+        elif event.name in ('score_update', 'admin_player_list'):
+            # Per-vote updates are folded into standings_events when voting closes
+            if not game.voting_active:
+                compacted.append(Event(event.name, standings(game), event.to))
+        elif event.name == 'question_result':
+            compacted.append(Event(event.name, question_summary(game, event.data['correct_answer']), event.to))
+        elif event.name == 'voting_update':
+            compacted.append(Event(event.name, {
+                'votes_cast': event.data['votes_cast'],
+                'total_voters': event.data['total_voters'],
+                'points_awarded': {}
+            }, event.to))
+        elif event.name == 'admin_question_summary':
+            payload = standings(game)
+            compacted.append(Event(event.name, {
+                'correct_players': [],
+                'incorrect_players': [],
+                'correct_count': len(game.correct_players),
+                'incorrect_count': len(game.incorrect_players),
+                'points_awarded': dict(heapq.nlargest(STANDINGS_LIMIT, event.data['points_awarded'].items(),
+                                                      key=lambda item: item[1])),
+                'all_scores': {p['name']: p['score'] for p in payload['players']},
+                'total_players': payload['total_players']
+            }, event.to))
+        elif event.name == 'game_ended':
+            compacted.append(Event(event.name, {
+                'final_scores': event.data['final_scores'][:STANDINGS_LIMIT],
+                'winner': event.data['winner'],
+                'total_players': len(event.data['final_scores'])
+            }, event.to))
+        else:
+            compacted.append(event)
+
+    return compacted
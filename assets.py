@@ -0,0 +1,173 @@
+"""
+Static asset pipeline
+`python assets.py` copies every file in static/ to static/dist/ under a
+content-hashed name, writes smaller WebP variants of images (needs Pillow)
+and gzip/brotli copies of compressible files (brotli needs the brotli
+package), and records the result in static/dist/manifest.json.
+
+Hashed files never change content, so the server sends them with a one-year
+immutable Cache-Control and a content ETag; after the first game a round
+start is answered from browser caches. Without a manifest, pages fall back
+to the plain /static URLs.
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST = 'manifest.json'
+URL_PREFIX = '/assets/'
+
+CACHE_SECONDS = 365 * 24 * 3600
+HASH_LENGTH = 10
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+# Images are shown at most 400px wide; keep 2x for high-density screens
+IMAGE_MAX_WIDTH = 800
+WEBP_QUALITY = 80
+
+# Accept-Encoding token -> file suffix, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, digest, ext=None):
+    stem, original_ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext or original_ext}'
+
+
+def webp_variant(path):
+    """WebP bytes for an image, scaled down to IMAGE_MAX_WIDTH; None without Pillow"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    with Image.open(path) as image:
+        if image.width > IMAGE_MAX_WIDTH:
+            height = round(image.height * IMAGE_MAX_WIDTH / image.width)
+            image = image.resize((IMAGE_MAX_WIDTH, height), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, 'WEBP', quality=WEBP_QUALITY, method=6)
+        return out.getvalue()
+
+
+def compressed_variants(data):
+    """{encoding: bytes} for each encoding that makes data smaller"""
+    variants = {'gzip': gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+        variants['br'] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Write hashed, converted and precompressed assets plus the manifest"""
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    # assets: source name -> {'file', 'webp'}; files: served name -> {'etag', 'encodings'}
+    manifest = {'assets': {}, 'files': {}}
+    missing_pillow = False
+
+    def write(name, data, encodings=()):
+        with open(os.path.join(dist_dir, name), 'wb') as f:
+            f.write(data)
+        manifest['files'][name] = {'etag': content_hash(data), 'encodings': list(encodings)}
+
+    for name in sorted(os.listdir(static_dir)):
+        path = os.path.join(static_dir, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+        ext = os.path.splitext(name)[1].lower()
+        entry = {'file': hashed_name(name, digest)}
+
+        variants = compressed_variants(data) if ext in COMPRESSIBLE_EXTENSIONS else {}
+        for encoding, suffix in ENCODINGS:
+            if encoding in variants:
+                with open(os.path.join(dist_dir, entry['file'] + suffix), 'wb') as f:
+                    f.write(variants[encoding])
+        write(entry['file'], data, [encoding for encoding, _ in ENCODINGS if encoding in variants])
+
+        if ext in IMAGE_EXTENSIONS:
+            webp = webp_variant(path)
+            if webp is None:
+                missing_pillow = True
+            elif len(webp) < len(data):
+                entry['webp'] = hashed_name(name, digest, '.webp')
+                write(entry['webp'], webp)
+
+        manifest['assets'][name] = entry
+        print(f"{name} -> {entry['file']}" + (f", {entry['webp']}" if 'webp' in entry else ''), flush=True)
+
+    if missing_pillow:
+        print("Pillow is not installed; skipped WebP variants", flush=True)
+    with open(os.path.join(dist_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    def __init__(self, dist_dir=DIST_DIR):
+        self.dist_dir = dist_dir
+        self.assets = {}
+        self.files = {}
+
+    def load(self):
+        """Read the build manifest; returns False if assets have not been built"""
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return False
+        self.assets = manifest['assets']
+        self.files = manifest['files']
+        return True
+
+    def url(self, name, variant='file'):
+        """Hashed URL for a static file (or its webp variant), or None if not built"""
+        entry = self.assets.get(name)
+        if entry is None or variant not in entry:
+            return None
+        return URL_PREFIX + entry[variant]
+
+    def select(self, filename, accept_encodings):
+        """(file to send, content type, content encoding or None, etag) for a hashed name, or None"""
+        info = self.files.get(filename)
+        if info is None:
+            return None
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            # Quality lookup, so gzip;q=0 or br;q=0 refuses the encoding
+            if encoding in info['encodings'] and accept_encodings[encoding] > 0:
+                return filename + suffix, content_type, encoding, f"{info['etag']}-{encoding}"
+        return filename, content_type, None, info['etag']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build fingerprinted, precompressed static assets')
+    parser.add_argument('--static-dir', default=STATIC_DIR)
+    parser.add_argument('--dist-dir', default=DIST_DIR)
+    args = parser.parse_args()
+    build(args.static_dir, args.dist_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+Broadcast workers
+Socket.IO emits from game logic are handed to a small pool of worker threads
+instead of running inline. python-socketio encodes and queues a room emit
+once per member, so the timer thread that starts a question used to spend
+the whole fan-out before it could arm the question's own timer.
+
+Emits are queued per lane (one lane per game) and a lane is served by one
+worker at a time, so a game's events keep their order while different games
+fan out in parallel. A superseded state update (scores, player lists, vote
+tallies) replaces an unsent copy of the same event to the same target, and a
+lane holding more than MAX_LANE_DEPTH emits drops its oldest such update.
+Events that move the game forward are never dropped.
+
+Each connection's send queue lives in Engine.IO. A client with more than
+SLOW_CONSUMER_DEPTH packets waiting there is a slow consumer: superseded
+updates skip it until it catches up, so it is sent the latest standings
+instead of every intermediate one. BROADCAST_WORKERS=0 emits inline.
+
+`python broadcaster.py` measures how long the caller is held up per question
+start with and without the workers, with one slow client in the room.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+
+WORKERS = int(os.getenv('BROADCAST_WORKERS', '4'))
+MAX_LANE_DEPTH = 1000
+SLOW_CONSUMER_DEPTH = 64
+# Emits a worker sends from one lane before letting other lanes go first
+LANE_BATCH = 32
+
+# Events whose latest copy makes earlier unsent ones worthless
+SUPERSEDED = {'score_update', 'admin_player_list', 'voting_update', 'spectator_snapshot'}
+
+
+class Broadcaster:
+    def __init__(self, depths=None, workers=WORKERS, max_lane_depth=MAX_LANE_DEPTH,
+                 slow_depth=SLOW_CONSUMER_DEPTH):
+        # depths(target) -> (sid, packets queued for it) for each socket in a room or sid
+        self.depths = depths
+        self.workers = workers
+        self.max_lane_depth = max_lane_depth
+        self.slow_depth = slow_depth
+
+        # lane -> deque of (name, target, send); ready holds lanes waiting for a worker
+        self.lanes = {}
+        self.ready = deque()
+        self.scheduled = set()
+        self.cond = threading.Condition()
+        self.closing = False
+        # sid -> transport queue depth when last seen over slow_depth
+        self.slow = {}
+
+        self.sent = 0
+        self.superseded = 0
+        self.dropped = 0
+        self.overflow = 0
+        self.slow_skips = 0
+
+        self.threads = [threading.Thread(target=self._run, name=f'broadcast-{i}', daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, lane, name, target, send):
+        """Queue send(skip_sids), an emit of name to a room or sid, behind lane's earlier emits"""
+        job = (name, target, send)
+        if not self.threads or self.closing:
+            self._send(job)
+            return
+        with self.cond:
+            queue = self.lanes.setdefault(lane, deque())
+            if name in SUPERSEDED:
+                for i, (queued_name, queued_target, _) in enumerate(queue):
+                    if queued_name == name and queued_target == target:
+                        del queue[i]
+                        self.superseded += 1
+                        break
+            queue.append(job)
+            if len(queue) > self.max_lane_depth:
+                self._shed(queue)
+            if lane not in self.scheduled:
+                self.scheduled.add(lane)
+                self.ready.append(lane)
+                self.cond.notify()
+
+    def _shed(self, queue):
+        """Drop a full lane's oldest superseded update"""
+        for i, (name, _, _) in enumerate(queue):
+            if name in SUPERSEDED:
+                del queue[i]
+                self.dropped += 1
+                return
+        # Nothing is safe to drop; let the lane grow
+        self.overflow += 1
+
+    def forget(self, sid):
+        """Stop tracking a disconnected socket"""
+        with self.cond:
+            self.slow.pop(sid, None)
+
+    def stats(self):
+        with self.cond:
+            depths = [len(queue) for queue in self.lanes.values()]
+            slow = len(self.slow)
+        return {
+            'workers': self.workers,
+            'queued': sum(depths),
+            'deepest_lane': max(depths, default=0),
+            'sent': self.sent,
+            'superseded': self.superseded,
+            'dropped': self.dropped,
+            'overflow': self.overflow,
+            'slow_consumers': slow,
+            'slow_skips': self.slow_skips
+        }
+
+    def drain(self, timeout=None):
+        """Wait until every queued emit has been sent; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.scheduled:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Send what is queued, then stop the workers; later emits run inline"""
+        if not self.drain(timeout):
+            print(f"Broadcast workers closed with {self.stats()['queued']} emits unsent", flush=True)
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+
+    def _slow_sids(self, target):
+        """Sockets behind target whose transport queue is over slow_depth"""
+        depths = list(self.depths(target))
+        skip = []
+        with self.cond:
+            for sid, depth in depths:
+                if depth > self.slow_depth:
+                    if sid not in self.slow:
+                        print(f"Slow consumer {sid}: {depth} packets queued", flush=True)
+                    self.slow[sid] = depth
+                    skip.append(sid)
+                else:
+                    self.slow.pop(sid, None)
+        return skip
+
+    def _send(self, job):
+        name, target, send = job
+        try:
+            skip = self._slow_sids(target) if name in SUPERSEDED and self.depths else []
+            # A slow sid target gets the next update instead
+            if target not in skip:
+                send(skip)
+        except Exception as e:
+            print(f"Broadcast of {name} to {target} failed: {e}", flush=True)
+            return
+        with self.cond:
+            self.slow_skips += len(skip)
+            if target not in skip:
+                self.sent += 1
+
+    def _next_jobs(self):
+        """Block until a lane is ready; returns (lane, jobs) or None once closed"""
+        with self.cond:
+            while not self.ready:
+                if self.closing:
+                    return None
+                self.cond.wait()
+            lane = self.ready.popleft()
+            queue = self.lanes[lane]
+            jobs = [queue.popleft() for _ in range(min(LANE_BATCH, len(queue)))]
+            return lane, jobs
+
+    def _run(self):
+        while True:
+            claimed = self._next_jobs()
+            if claimed is None:
+                return
+            lane, jobs = claimed
+            for job in jobs:
+                self._send(job)
+            with self.cond:
+                if self.lanes[lane]:
+                    self.ready.append(lane)
+                    self.cond.notify()
+                else:
+                    del self.lanes[lane]
+                    self.scheduled.discard(lane)
+                    self.cond.notify_all()
+
+
+def benchmark(players, questions, workers):
+    """Caller time per question start, inline and on the workers, with one slow client"""
+    payload = {'round': 1, 'question_num': 1, 'question': 'Who is known as the Kingslayer?',
+               'options': {'a': 'Jaime Lannister', 'b': 'Bronn', 'c': 'Sandor Clegane',
+                           'd': 'Brienne of Tarth'}, 'correct_answer': 'a'}
+    sids = [f'sid{i}' for i in range(players)]
+
+    def room_emit(skip):
+        # Like python-socketio: one encode per member; the first member's socket is backed up
+        for sid in sids:
+            if sid not in skip:
+                json.dumps(payload)
+        time.sleep(0.02)
+
+    def depths(target):
+        return [(sid, 500 if sid == sids[0] else 0) for sid in sids]
+
+    print(f"{players} players, {questions} question starts")
+    for label, pool in [('inline', Broadcaster(depths, workers=0)),
+                        (f'{workers} workers', Broadcaster(depths, workers=workers))]:
+        held = 0.0
+        began = time.perf_counter()
+        for _ in range(questions):
+            start = time.perf_counter()
+            pool.submit('game', 'new_question', 'game', room_emit)
+            pool.submit('game', 'score_update', 'game', room_emit)
+            held += time.perf_counter() - start
+        pool.drain()
+        total = time.perf_counter() - began
+        print(f"  {label:10s} caller held {1e3 * held / questions:7.2f}ms per start, "
+              f"all sent after {1e3 * total:7.1f}ms, {pool.stats()}")
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure emit fan-out cost on the game thread')
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+    benchmark(args.players, args.questions, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,648 @@
+"""
+Trivia game rules engine
+Pure game logic with no Flask, Socket.IO or database access.
+Every rule function mutates the GameState it is given and returns the list
+of events the server should send; the server decides how to deliver them.
+"""
+
+import os
+import random
+from collections import namedtuple
+
+ROUNDS = 3
+QUESTIONS_PER_ROUND = 15
+QUESTION_TIME_LIMIT = 30
+VOTING_TIME_LIMIT = 30
+# Answers and votes are still accepted this long after a deadline, to cover
+# clients whose clocks or connections run slightly behind the server
+DEADLINE_GRACE = float(os.getenv('DEADLINE_GRACE_SECONDS', '1.0'))
+ELIMINATION_SCORE = 10
+MAX_POINTS_PER_QUESTION = 4
+OPTIONS = ['a', 'b', 'c', 'd']
+OPTION_KEYS = {o: f'option_{o}' for o in OPTIONS}
+
+# Game types
+STANDARD = 'standard'
+ARENA = 'arena'
+STANDARD_MAX_PLAYERS = 100
+ARENA_MAX_PLAYERS = 10000
+# Arena voters pick from a sample of incorrect players in their own shard
+ARENA_VOTE_CHOICES = 12
+
+# Event destinations other than a single player sid
+ROOM = 'room'
+ADMIN = 'admin'
+
+Event = namedtuple('Event', ['name', 'data', 'to'])
+
+
+class GameState:
+    def __init__(self, game_id, name, password, mode=STANDARD):
+        self.game_id = game_id
+        self.name = name
+        self.password = password
+        self.mode = mode
+        self.max_players = ARENA_MAX_PLAYERS if mode == ARENA else STANDARD_MAX_PLAYERS
+        self.players = {}
+        # Stable player ids; sids change when a player resumes on a new connection
+        self.player_seq = 0
+        self.admin_sid = None
+        self.status = 'waiting'
+        self.current_round = 0
+        self.current_question = 0
+        self.questions = []
+        self.question_start_time = None
+        self.question_deadline = None
+        self.voting_deadline = None
+        self.question_data = None
+        self.answers = {}
+        self.scores = {}
+        self.current_correct_answer = None
+        self.question_expired = False
+        self.voting_active = False
+        self.votes_cast = {}
+        self.points_awarded = {}
+        self.correct_players = []
+        self.incorrect_players = []
+        # Arena games only: sid -> shard index, players per shard, answer counts per shard
+        self.shards = {}
+        self.shard_sizes = {}
+        self.shard_tallies = {}
+
+
+def new_player(name, player_id=None):
+    """Create the player record stored in GameState.players"""
+    return {
+        'id': player_id,
+        'name': name,
+        'score': 0,
+        'eliminated': False,
+        'readonly': False,
+        'eliminated_at': None
+    }
+
+
+def add_player(game, sid, name):
+    """Add a new player with the next stable id"""
+    game.player_seq += 1
+    player = game.players[sid] = new_player(name, game.player_seq)
+    return player
+
+
+def player_list(game):
+    """Player records as sent in player list and score broadcasts"""
+    return list(game.players.values())
+
+
+def active_sids(game):
+    """Sids of players that have not been eliminated"""
+    return [sid for sid, p in game.players.items() if not p['eliminated']]
+
+
+def is_game_over(game):
+    """Game ends when one or no players remain active"""
+    remaining = 0
+    for p in game.players.values():
+        if not p['eliminated']:
+            remaining += 1
+            if remaining > 1:
+                return False
+    return True
+
+
+def points_per_vote(round_number):
+    """Points a single vote is worth in the given round"""
+    return round_number if round_number <= ROUNDS else 1
+
+
+def vote_points(game, target_sid):
+    """Points a vote for target would award now, or 0 if target is capped"""
+    headroom = ELIMINATION_SCORE - game.players[target_sid]['score']
+    if headroom <= 0:
+        return 0
+    points = min(points_per_vote(game.current_round), headroom)
+    if game.points_awarded.get(target_sid, 0) + points > MAX_POINTS_PER_QUESTION:
+        return 0
+    return points
+
+
+def eligible_targets(game):
+    """Incorrect players that can still receive points this question"""
+    return [p for p in game.incorrect_players
+            if p['sid'] in game.players and vote_points(game, p['sid']) > 0]
+
+
+def voting_options(game, voter_sid, targets=None):
+    """Targets offered to one voter
+
+    Standard games offer every eligible target. Arena games offer a bounded
+    sample from the voter's own shard so payloads don't grow with the game.
+    """
+    if targets is None:
+        targets = eligible_targets(game)
+    if game.mode != ARENA:
+        return targets
+    shard = game.shards.get(voter_sid)
+    local = [p for p in targets if game.shards.get(p['sid']) == shard] or targets
+    if len(local) > ARENA_VOTE_CHOICES:
+        local = random.sample(local, ARENA_VOTE_CHOICES)
+    return local
+
+
+def rebind_player(game, old_sid, new_sid):
+    """Move a player's state to a new connection
+
+    Dict-keyed state moves in O(1); the per-question player lists and votes
+    are only rewritten if the current question references the player.
+    """
+    game.players[new_sid] = game.players.pop(old_sid)
+    for state in (game.answers, game.votes_cast, game.points_awarded):
+        if old_sid in state:
+            state[new_sid] = state.pop(old_sid)
+
+    if game.correct_players or game.incorrect_players:
+        for p in game.correct_players + game.incorrect_players:
+            if p['sid'] == old_sid:
+                p['sid'] = new_sid
+        for voter_sid, target_sid in game.votes_cast.items():
+            if target_sid == old_sid:
+                game.votes_cast[voter_sid] = new_sid
+
+
+def resume_snapshot(game, sid, now, answered=False):
+    """Everything a reconnecting player needs to pick up where they left off"""
+    player = game.players[sid]
+    snapshot = {
+        'player_name': player['name'],
+        'score': player['score'],
+        'eliminated': player['eliminated'],
+        'readonly': player['readonly'],
+        'status': game.status,
+        'round': game.current_round,
+        'question': None,
+        'time_left': 0,
+        'answered': answered,
+        'voting': None
+    }
+    if game.status != 'playing':
+        return snapshot
+
+    if game.question_data and not game.question_expired:
+        snapshot['question'] = game.question_data
+        snapshot['time_left'] = max(0, int(QUESTION_TIME_LIMIT - (now - game.question_start_time)))
+    elif game.voting_active and sid not in game.votes_cast and \
+            any(p['sid'] == sid for p in game.correct_players):
+        snapshot['voting'] = {
+            'incorrect_players': voting_options(game, sid),
+            'time_limit': VOTING_TIME_LIMIT,
+            'deadline': game.voting_deadline
+        }
+    return snapshot
+
+
+def question_index(game, position=None):
+    """Index into game.questions for a (round, question) position, the current one by default"""
+    round_number, question = position or (game.current_round, game.current_question)
+    return ((round_number - 1) * QUESTIONS_PER_ROUND + question) % len(game.questions)
+
+
+def upcoming_position(game):
+    """(round, question) of the question after the current one"""
+    if game.current_question + 1 < QUESTIONS_PER_ROUND:
+        return game.current_round, game.current_question + 1
+    return game.current_round + 1, 0
+
+
+def validate_question(question):
+    """Validate question has required fields"""
+    required_fields = ['question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
+
+    for field in required_fields:
+        if field not in question:
+            return False
+
+    # Check if correct_answer is valid (a, b, c, or d)
+    if question['correct_answer'] not in OPTIONS:
+        return False
+
+    return True
+
+
+def prepare_question(game, question, rng=random, position=None):
+    """Shuffle options so the correct answer lands in a random position
+
+    position is the (round, question) the payload is for, the current one by
+    default. Returns the new_question payload, or None if the question is
+    unusable.
+    """
+    if not validate_question(question):
+        return None
+
+    correct_text = question[OPTION_KEYS[question['correct_answer']]]
+    new_correct_position = rng.choice(OPTIONS)
+
+    other_options = [question[key] for key in OPTION_KEYS.values()
+                     if question[key] != correct_text]
+    rng.shuffle(other_options)
+
+    final_options = {}
+    for option in OPTIONS:
+        if option == new_correct_position:
+            final_options[option] = correct_text
+        else:
+            final_options[option] = other_options.pop() if other_options else ''
+
+    round_number, question_number = position or (game.current_round, game.current_question)
+    return {
+        'round': round_number,
+        'question_num': question_number + 1,
+        'question': question['question'],
+        'options': final_options,
+        'correct_answer': new_correct_position
+    }
+
+
+def open_question(game, question_data, now):
+    """Reset per-question state for a question that is about to be sent
+
+    Adds the absolute server deadline to question_data, so clients can count
+    down locally against their synced clock.
+    """
+    game.question_start_time = now
+    game.question_deadline = now + QUESTION_TIME_LIMIT
+    question_data['time_limit'] = QUESTION_TIME_LIMIT
+    question_data['deadline'] = game.question_deadline
+    game.question_data = question_data
+    game.current_correct_answer = question_data['correct_answer']
+    game.answers = {}
+    game.question_expired = False
+    game.voting_active = False
+    game.votes_cast = {}
+    game.points_awarded = {}
+    game.correct_players = []
+    game.incorrect_players = []
+
+
+def past_deadline(deadline, now):
+    """Whether now is beyond a deadline and its grace window"""
+    return deadline is not None and now is not None and now > deadline + DEADLINE_GRACE
+
+
+def check_answer(game, sid, now=None):
+    """Whether a player may answer the current question
+
+    Returns (allowed, events).
+    """
+    player = game.players.get(sid)
+    if not player or player['eliminated'] or player['readonly']:
+        return False, []
+
+    # Check if question time has expired
+    if game.question_expired or past_deadline(game.question_deadline, now):
+        return False, [Event('answer_rejected', {'message': 'Time expired, answer not accepted'}, sid)]
+
+    return True, []
+
+
+def record_answer(game, sid, answer, now=None):
+    """Accept an answer from a player
+
+    Returns (accepted, events).
+    """
+    allowed, events = check_answer(game, sid, now)
+    if not allowed:
+        return False, events
+
+    # Prevent duplicate answers
+    if sid in game.answers:
+        return False, []
+
+    game.answers[sid] = answer
+    return True, []
+
+
+def all_answered(game):
+    """True once every active player has an answer recorded"""
+    active = active_sids(game)
+    return len(active) > 0 and all(sid in game.answers for sid in active)
+
+
+def close_question(game, partition=None):
+    """Expire the question and split players into correct and incorrect
+
+    partition is an optional (correct_sids, incorrect_sids) pair computed by
+    the caller, e.g. from an AnswerBuffer; otherwise game.answers is scanned.
+    """
+    game.question_expired = True
+    correct_answer = game.current_correct_answer or 'a'
+
+    if partition is None:
+        # Players who didn't answer count as incorrect
+        for sid in active_sids(game):
+            if sid not in game.answers:
+                game.answers[sid] = 'no_answer'
+        correct_sids = [sid for sid, answer in game.answers.items() if answer == correct_answer]
+        incorrect_sids = [sid for sid, answer in game.answers.items() if answer != correct_answer]
+    else:
+        correct_sids, incorrect_sids = partition
+
+    players = game.players
+    correct_players = [{'sid': sid, 'name': players[sid]['name']} for sid in correct_sids if sid in players]
+    incorrect_players = [{'sid': sid, 'name': players[sid]['name']} for sid in incorrect_sids if sid in players]
+
+    game.voting_active = True
+    game.votes_cast = {}
+    game.points_awarded = {}
+    game.correct_players = correct_players
+    game.incorrect_players = incorrect_players
+
+    return [Event('question_result', {
+        'correct_answer': correct_answer,
+        'correct_players': correct_players,
+        'incorrect_players': incorrect_players
+    }, ROOM)]
+
+
+def needs_voting(game):
+    """Voting only happens when there are both correct and incorrect players"""
+    return bool(game.correct_players and game.incorrect_players)
+
+
+def open_voting(game, now):
+    """Send voting options to every correct player"""
+    targets = eligible_targets(game)
+    game.voting_deadline = now + VOTING_TIME_LIMIT
+
+    if game.mode == ARENA:
+        # Group once so each voter's sample is drawn from its own shard
+        by_shard = {}
+        for p in targets:
+            by_shard.setdefault(game.shards.get(p['sid']), []).append(p)
+        options = {}
+        for p in game.correct_players:
+            local = by_shard.get(game.shards.get(p['sid'])) or targets
+            if len(local) > ARENA_VOTE_CHOICES:
+                local = random.sample(local, ARENA_VOTE_CHOICES)
+            options[p['sid']] = local
+    else:
+        options = {p['sid']: targets for p in game.correct_players}
+
+    return [Event('voting_phase', {
+        'incorrect_players': options[p['sid']],
+        'time_limit': VOTING_TIME_LIMIT,
+        'deadline': game.voting_deadline
+    }, p['sid']) for p in game.correct_players]
+
+
+def _award_vote(game, voter_sid, target_sid, points, now):
+    """Record a vote, add points and eliminate the target if needed"""
+    target = game.players[target_sid]
+    game.votes_cast[voter_sid] = target_sid
+    game.points_awarded[target_sid] = game.points_awarded.get(target_sid, 0) + points
+    target['score'] += points
+
+    events = [
+        Event('admin_player_list', {'players': player_list(game)}, ADMIN),
+        Event('score_update', {'players': player_list(game)}, ROOM)
+    ]
+
+    if target['score'] >= ELIMINATION_SCORE:
+        target['eliminated'] = True
+        target['readonly'] = True
+        target['eliminated_at'] = now
+        events.append(Event('player_eliminated', {'name': target['name']}, ROOM))
+        events.append(Event('admin_player_list', {'players': player_list(game)}, ADMIN))
+        events.append(Event('score_update', {'players': player_list(game)}, ROOM))
+
+    return events
+
+
+def cast_vote(game, voter_sid, target_sid, now):
+    """Apply a vote chosen by a player
+
+    Returns (accepted, events).
+    """
+    voter = game.players.get(voter_sid)
+    target = game.players.get(target_sid)
+
+    if not voter or not target or not game.voting_active:
+        return False, []
+
+    if voter_sid in game.votes_cast:
+        return False, [Event('vote_failed', {'message': 'You have already voted'}, voter_sid)]
+
+    if past_deadline(game.voting_deadline, now):
+        return False, [Event('vote_failed', {'message': 'Time expired, vote not accepted'}, voter_sid)]
+
+    points = vote_points(game, target_sid)
+    if points <= 0:
+        return False, [Event('vote_failed', {
+            'message': f"{target['name']} cannot receive more points",
+            'available_targets': voting_options(game, voter_sid)
+        }, voter_sid)]
+
+    events = _award_vote(game, voter_sid, target_sid, points, now)
+
+    # Target is capped now - ask the remaining voters to choose again.
+    # Arena voters find out through vote_failed instead of a mass re-offer.
+    if game.mode != ARENA and vote_points(game, target_sid) <= 0:
+        targets = eligible_targets(game)
+        for p in game.correct_players:
+            if p['sid'] not in game.votes_cast:
+                events.append(Event('voting_phase', {
+                    'incorrect_players': targets,
+                    'time_limit': VOTING_TIME_LIMIT,
+                    'deadline': game.voting_deadline,
+                    'message': f"{target['name']} has reached maximum points. Please choose another player."
+                }, p['sid']))
+
+    events.append(Event('vote_recorded', {'target': target['name'], 'points': points}, voter_sid))
+
+    if not voting_complete(game):
+        events.append(Event('voting_update', {
+            'votes_cast': len(game.votes_cast),
+            'total_voters': len(game.correct_players),
+            'points_awarded': game.points_awarded
+        }, ADMIN))
+
+    return True, events
+
+
+def voting_complete(game):
+    """True once every correct player has voted"""
+    return len(game.votes_cast) >= len(game.correct_players)
+
+
+def vote_awards(game, target_sid):
+    """Points each further vote for target would award, in order
+
+    Applies both the per-question cap and the elimination headroom, so the
+    length of the list is how many more votes the target can take.
+    """
+    headroom = ELIMINATION_SCORE - game.players[target_sid]['score']
+    round_points = game.points_awarded.get(target_sid, 0)
+    per_vote = points_per_vote(game.current_round)
+    awards = []
+    while headroom > 0:
+        points = min(per_vote, headroom)
+        if round_points + points > MAX_POINTS_PER_QUESTION:
+            break
+        awards.append(points)
+        round_points += points
+        headroom -= points
+    return awards
+
+
+def pending_voters(game):
+    """Correct players still connected who haven't voted"""
+    return [p['sid'] for p in game.correct_players
+            if p['sid'] not in game.votes_cast and p['sid'] in game.players]
+
+
+def apply_votes(game, assignments, now):
+    """Apply a batch of automatic votes in one step
+
+    assignments is a list of (voter_sid, target_sid, points). Players get one
+    consolidated score update for the whole batch.
+    """
+    if not assignments:
+        return []
+
+    eliminated = []
+    for voter_sid, target_sid, points in assignments:
+        target = game.players[target_sid]
+        game.votes_cast[voter_sid] = target_sid
+        game.points_awarded[target_sid] = game.points_awarded.get(target_sid, 0) + points
+        target['score'] += points
+        if target['score'] >= ELIMINATION_SCORE and not target['eliminated']:
+            target['eliminated'] = True
+            target['readonly'] = True
+            target['eliminated_at'] = now
+            eliminated.append(target)
+
+    events = [Event('player_eliminated', {'name': p['name']}, ROOM) for p in eliminated]
+    events.append(Event('admin_player_list', {'players': player_list(game)}, ADMIN))
+    events.append(Event('score_update', {'players': player_list(game)}, ROOM))
+    events.extend(Event('vote_recorded', {
+        'target': game.players[target_sid]['name'],
+        'points': points,
+        'auto_selected': True
+    }, voter_sid) for voter_sid, target_sid, points in assignments)
+
+    return events
+
+
+def allocate_auto_votes(game, rng=random):
+    """Pick targets for every pending voter at once
+
+    Each target offers one slot per vote it can still take. Slots are handed
+    out level by level (every target's first vote before anyone's second) in
+    random order within a level, so votes spread evenly over eligible targets.
+    """
+    slots = []
+    for p in eligible_targets(game):
+        for level, points in enumerate(vote_awards(game, p['sid'])):
+            slots.append((level, rng.random(), p['sid'], points))
+    slots.sort()
+
+    voters = pending_voters(game)
+    rng.shuffle(voters)
+    return [(voter_sid, target_sid, points)
+            for voter_sid, (_, _, target_sid, points) in zip(voters, slots)]
+
+
+def auto_vote(game, now, rng=random):
+    """Assign random votes for correct players who haven't voted"""
+    return apply_votes(game, allocate_auto_votes(game, rng), now)
+
+
+def close_voting(game):
+    """Tell incorrect players what they received and summarise for the admin"""
+    game.voting_active = False
+    events = []
+
+    # Find who voted for each player
+    voters_by_target = {}
+    for voter_sid, voted_for_sid in game.votes_cast.items():
+        if voter_sid in game.players:
+            voters_by_target.setdefault(voted_for_sid, []).append(game.players[voter_sid]['name'])
+
+    for incorrect_player in game.incorrect_players:
+        target_sid = incorrect_player['sid']
+        points_this_round = game.points_awarded.get(target_sid, 0)
+        voters = voters_by_target.get(target_sid, [])
+
+        if points_this_round > 0 and voters:
+            if len(voters) == 1:
+                message = f"You received {points_this_round} point from {voters[0]}!"
+            else:
+                voter_list = ', '.join(voters[:-1]) + f" and {voters[-1]}"
+                message = f"You received {points_this_round} points from {voter_list}!"
+        else:
+            message = "You received no points this round."
+
+        events.append(Event('points_received', {
+            'points': points_this_round,
+            'message': message,
+            'voters': voters
+        }, target_sid))
+
+    if is_game_over(game):
+        return events
+
+    points_with_names = {game.players[sid]['name']: points
+                         for sid, points in game.points_awarded.items() if sid in game.players}
+
+    events.append(Event('admin_question_summary', {
+        'correct_players': game.correct_players,
+        'incorrect_players': game.incorrect_players,
+        'points_awarded': points_with_names,
+        'all_scores': {p['name']: p['score'] for p in game.players.values()}
+    }, ADMIN))
+
+    return events
+
+
+def advance_question(game):
+    """Move to the next question; returns True when the round is over"""
+    game.voting_active = False
+    game.votes_cast = {}
+    game.points_awarded = {}
+    game.answers = {}
+    game.current_question += 1
+    return game.current_question >= QUESTIONS_PER_ROUND
+
+
+def start_round(game, round_number):
+    """Reset question counter for a new round"""
+    game.current_round = round_number
+    game.current_question = 0
+    return [Event('show_round_start', {'round_number': round_number}, ROOM)]
+
+
+def final_results(game):
+    """Winner and final standings, lowest score first"""
+    active = [game.players[sid] for sid in active_sids(game)]
+    winner = active[0] if active else None
+
+    final_scores = [(p['name'], p['score']) for p in game.players.values()]
+    final_scores.sort(key=lambda x: x[1])
+
+    return {
+        'final_scores': final_scores,
+        'winner': winner['name'] if winner else 'No winner'
+    }
+
+
+def finish_game(game):
+    """Announce results and reset the game so it can be played again"""
+    events = [Event('game_ended', final_results(game), ROOM)]
+
+    game.players = {}
+    game.status = 'waiting'
+    game.current_round = 0
+    game.current_question = 0
+    game.answers = {}
+    game.voting_active = False
+
+    return events
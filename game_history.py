@@ -0,0 +1,152 @@
+"""
+Game results and player histories
+A GameRecorder follows one play-through of a game: per-question correctness,
+scores at the end of each round and when each player was eliminated are
+recorded as the game runs, so finishing only has to rank players and build
+the items to store. No I/O happens here; the repository writes the items.
+
+Items live in the trivia_results table under a pk/sk key:
+  GAME#<game_id>   / RUN#<finished_at>#<run_id>   one summary per play-through
+  RUN#<run_id>     / <placement>                  one row per player, in placement order
+  PLAYER#<name>    / <finished_at>#<run_id>       one row per player, newest last
+"""
+
+import game_engine
+
+QUESTIONS_PER_GAME = game_engine.ROUNDS * game_engine.QUESTIONS_PER_ROUND
+
+# Per-question answer codes in a player's answers string
+CORRECT = ord('1')
+INCORRECT = ord('0')
+NOT_PLAYED = ord('-')
+
+
+def game_key(game_id):
+    return f'GAME#{game_id}'
+
+
+def run_key(run_id):
+    return f'RUN#{run_id}'
+
+
+def player_key(name):
+    return f'PLAYER#{name.strip().lower()}'
+
+
+class GameRecorder:
+    def __init__(self, game, started_at):
+        self.game_id = game.game_id
+        self.game_name = game.name
+        self.mode = game.mode
+        self.run_id = f'{game.game_id}-{int(started_at * 1000)}'
+        self.started_at = started_at
+        self.questions_played = 0
+        self.records = {sid: self._new_record(p['name']) for sid, p in game.players.items()}
+
+    def _new_record(self, name):
+        return {
+            'name': name,
+            'answers': bytearray([NOT_PLAYED]) * QUESTIONS_PER_GAME,
+            'round_scores': [],
+            'eliminated_round': None,
+            'eliminated_question': None
+        }
+
+    def add_player(self, sid, name):
+        """Follow a player who joined the game after it started"""
+        if sid not in self.records:
+            self.records[sid] = self._new_record(name)
+
+    def rebind(self, old_sid, new_sid):
+        if old_sid in self.records:
+            self.records[new_sid] = self.records.pop(old_sid)
+
+    def record_question(self, game, correct_sids, incorrect_sids):
+        """Mark who got the closing question right"""
+        index = (game.current_round - 1) * game_engine.QUESTIONS_PER_ROUND + game.current_question
+        if not 0 <= index < QUESTIONS_PER_GAME:
+            return
+        self.questions_played += 1
+        records = self.records
+        for sid in correct_sids:
+            record = records.get(sid)
+            if record is not None:
+                record['answers'][index] = CORRECT
+        for sid in incorrect_sids:
+            record = records.get(sid)
+            if record is not None:
+                record['answers'][index] = INCORRECT
+
+    def record_eliminations(self, game):
+        """Note players eliminated by the voting phase that just closed"""
+        for sid in game.points_awarded:
+            record = self.records.get(sid)
+            player = game.players.get(sid)
+            if record and player and player['eliminated'] and record['eliminated_round'] is None:
+                record['eliminated_round'] = game.current_round
+                record['eliminated_question'] = game.current_question + 1
+
+    def record_round(self, game):
+        """Snapshot every player's score at the end of a round"""
+        for sid, record in self.records.items():
+            player = game.players.get(sid)
+            if player is not None and len(record['round_scores']) < game.current_round:
+                # Rounds finished before the player joined have no score
+                record['round_scores'].extend([None] * (game.current_round - 1 - len(record['round_scores'])))
+                record['round_scores'].append(player['score'])
+
+    def finish(self, players, winner, finished_at):
+        """Rank players and build the summary and per-player items
+
+        players is the final GameState.players; call record_round first for
+        the round in progress. Active players rank by score (lowest first),
+        then eliminated players by how late they went out, then players who
+        left the game.
+        """
+        def rank(item):
+            sid, record = item
+            player = players.get(sid)
+            if player is None:
+                return (2, 0, 0)
+            if not player['eliminated']:
+                return (0, player['score'], 0)
+            return (1, -(record['eliminated_round'] or 0), -(record['eliminated_question'] or 0))
+
+        stamp = f'{finished_at:.3f}'
+        ranked = sorted(self.records.items(), key=rank)
+        run_rows = []
+        player_rows = []
+
+        for placement, (sid, record) in enumerate(ranked, 1):
+            player = players.get(sid)
+            answers = record['answers'].decode()
+            row = {
+                'name': record['name'],
+                'placement': placement,
+                'score': player['score'] if player else None,
+                'round_scores': record['round_scores'],
+                'eliminated_round': record['eliminated_round'],
+                'eliminated_question': record['eliminated_question'],
+                'left': player is None,
+                'answers': answers,
+                'correct': answers.count('1')
+            }
+            run_rows.append(dict(row, pk=run_key(self.run_id), sk=f'{placement:05d}'))
+            player_rows.append(dict(row, pk=player_key(record['name']), sk=f'{stamp}#{self.run_id}',
+                                    run_id=self.run_id, game_id=self.game_id,
+                                    game_name=self.game_name, players=len(ranked)))
+
+        summary = {
+            'pk': game_key(self.game_id),
+            'sk': f'RUN#{stamp}#{self.run_id}',
+            'run_id': self.run_id,
+            'game_name': self.game_name,
+            'mode': self.mode,
+            'started_at': f'{self.started_at:.3f}',
+            'finished_at': stamp,
+            'winner': winner,
+            'players': len(ranked),
+            'questions_played': self.questions_played,
+            'podium': [row['name'] for row in run_rows[:3]]
+        }
+        return [summary] + run_rows + player_rows
@@ -0,0 +1,189 @@
+"""
+Admin dashboard game listing
+Games are listed newest first, one page at a time, from a global secondary
+index on created_at instead of scanning trivia_games. Recent pages are kept
+in a short-TTL cache that create_game and delete_game write through to.
+"""
+
+import base64
+import json
+import threading
+import time
+
+GAMES_INDEX = 'created_at-index'
+# Every game item carries this constant partition key so the index holds
+# all games in one created_at-ordered partition
+INDEX_KEY = 'entity'
+INDEX_VALUE = 'game'
+
+PAGE_SIZE = 20
+CACHE_TTL = 10.0
+CACHE_PAGES = 5
+
+LISTED_FIELDS = ('id', 'name', 'mode', 'created_at', INDEX_KEY)
+# Attributes of the last listed game that a listing cursor carries
+CURSOR_FIELDS = ('id', 'created_at', INDEX_KEY)
+
+GAMES_INDEX_DEFINITION = {
+    'IndexName': GAMES_INDEX,
+    'KeySchema': [
+        {'AttributeName': INDEX_KEY, 'KeyType': 'HASH'},
+        {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+    ],
+    'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['name', 'mode']}
+}
+
+GAMES_INDEX_ATTRIBUTES = [
+    {'AttributeName': INDEX_KEY, 'AttributeType': 'S'},
+    {'AttributeName': 'created_at', 'AttributeType': 'S'}
+]
+
+
+class InvalidCursor(ValueError):
+    """A cursor that is not one this server handed out"""
+
+
+def encode_cursor(last_key):
+    """Opaque cursor for the page after last_key"""
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, sort_keys=True).encode()).decode()
+
+
+def decode_cursor(cursor, fields=()):
+    """Key a cursor continues after, or None for the first page; raises InvalidCursor
+
+    The key must be an object of strings holding at least fields.
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if (not isinstance(key, dict) or not all(field in key for field in fields)
+            or not all(isinstance(value, str) for value in key.values())):
+        raise InvalidCursor(cursor)
+    return key
+
+
+def query_page(games_table, cursor=None, page_size=PAGE_SIZE):
+    """One page of games, newest first
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    from boto3.dynamodb.conditions import Key
+
+    params = {
+        'IndexName': GAMES_INDEX,
+        'KeyConditionExpression': Key(INDEX_KEY).eq(INDEX_VALUE),
+        'ScanIndexForward': False,
+        'Limit': page_size
+    }
+    start_key = decode_cursor(cursor, CURSOR_FIELDS)
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+
+    response = games_table.query(**params)
+    return response['Items'], encode_cursor(response.get('LastEvaluatedKey'))
+
+
+class ListingCache:
+    """Recent dashboard pages keyed by cursor, expiring after a short TTL"""
+
+    def __init__(self, ttl=CACHE_TTL, max_pages=CACHE_PAGES, page_size=PAGE_SIZE):
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self.page_size = page_size
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    def get(self, cursor):
+        with self.lock:
+            entry = self.pages.get(cursor or '')
+            if entry is None:
+                return None
+            stored_at, items, next_cursor = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self.pages[cursor or '']
+                return None
+            return list(items), next_cursor
+
+    def put(self, cursor, items, next_cursor):
+        with self.lock:
+            if len(self.pages) >= self.max_pages and (cursor or '') not in self.pages:
+                oldest = min(self.pages, key=lambda key: self.pages[key][0])
+                del self.pages[oldest]
+            self.pages[cursor or ''] = (time.monotonic(), list(items), next_cursor)
+
+    def add_game(self, item):
+        """Write through a newly created game to the first page"""
+        # Cache only what the index projects, never the game password
+        item = {key: item[key] for key in LISTED_FIELDS if key in item}
+        with self.lock:
+            entry = self.pages.get('')
+            if entry is not None:
+                stored_at, items, next_cursor = entry
+                items = [item] + items
+                if len(items) > self.page_size:
+                    # The game pushed off the end starts the next page
+                    items = items[:self.page_size]
+                    next_cursor = encode_cursor({key: items[-1][key] for key in CURSOR_FIELDS})
+                self.pages[''] = (stored_at, items, next_cursor)
+
+    def remove_game(self, game_id):
+        """Write through a deleted game to every cached page"""
+        with self.lock:
+            for key, (stored_at, items, next_cursor) in list(self.pages.items()):
+                self.pages[key] = (stored_at, [i for i in items if i['id'] != game_id], next_cursor)
+
+    def clear(self):
+        with self.lock:
+            self.pages = {}
+
+
+def list_games(query, cache, cursor=None, page_size=PAGE_SIZE):
+    """Cached page of games from query(cursor, page_size); returns (items, next_cursor)"""
+    cached = cache.get(cursor)
+    if cached is not None:
+        return cached
+    items, next_cursor = query(cursor, page_size)
+    cache.put(cursor, items, next_cursor)
+    return items, next_cursor
+
+
+def ensure_games_index(dynamodb, table_name='trivia_games'):
+    """Add the created_at index to an existing games table and backfill the index key"""
+    client = dynamodb.meta.client
+    description = client.describe_table(TableName=table_name)['Table']
+    indexes = [i['IndexName'] for i in description.get('GlobalSecondaryIndexes', [])]
+
+    if GAMES_INDEX not in indexes:
+        print(f"Adding {GAMES_INDEX} to {table_name}", flush=True)
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=GAMES_INDEX_ATTRIBUTES,
+            GlobalSecondaryIndexUpdates=[{'Create': GAMES_INDEX_DEFINITION}]
+        )
+
+    # Games written before the index existed lack the index key
+    table = dynamodb.Table(table_name)
+    params = {'ProjectionExpression': 'id, #k', 'ExpressionAttributeNames': {'#k': INDEX_KEY}}
+    backfilled = 0
+    while True:
+        response = table.scan(**params)
+        for item in response['Items']:
+            if INDEX_KEY not in item:
+                table.update_item(
+                    Key={'id': item['id']},
+                    UpdateExpression='SET #k = :v',
+                    ExpressionAttributeNames={'#k': INDEX_KEY},
+                    ExpressionAttributeValues={':v': INDEX_VALUE}
+                )
+                backfilled += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    if backfilled:
+        print(f"Backfilled {INDEX_KEY} on {backfilled} games", flush=True)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Cross-game leaderboards
+Wins, survival rate and accuracy, over all time and over rolling day and
+week windows. Each finished game updates per-player totals and re-positions
+only the players who played, in sorted key lists, so top-K and rank queries
+are a bisect away. Rolling windows are built from hourly buckets; buckets
+leaving a window are subtracted as time moves on. State is persisted as
+periodic snapshots and rebuilt from the latest one at startup.
+
+Usage: python leaderboard.py --player-games 1000000 --players 100000
+"""
+
+import argparse
+import random
+import threading
+import time
+from bisect import bisect_left, insort
+
+# Per-player totals
+GAMES, WINS, SURVIVED, CORRECT, QUESTIONS = range(5)
+STAT_FIELDS = 5
+
+# Rate boards only rank players with enough games to be meaningful
+MIN_GAMES = 3
+
+METRICS = {
+    'wins': lambda s: s[WINS],
+    'survival': lambda s: s[SURVIVED] / s[GAMES] if s[GAMES] >= MIN_GAMES else None,
+    'accuracy': lambda s: s[CORRECT] / s[QUESTIONS] if s[GAMES] >= MIN_GAMES and s[QUESTIONS] else None
+}
+
+# Window name -> length in hours (None for all time)
+WINDOWS = {'all': None, 'day': 24, 'week': 24 * 7}
+RETAINED_HOURS = max(hours for hours in WINDOWS.values() if hours)
+
+SNAPSHOT_INTERVAL = 60.0
+SNAPSHOT_CHUNK = 500
+SNAPSHOT_KEY = 'LEADERBOARD'
+ALL_TIME = -1
+
+
+def player_id(name):
+    return name.strip().lower()
+
+
+def row_stats(row):
+    """Totals contributed by one game_history player row"""
+    survived = not row['left'] and row['eliminated_round'] is None
+    played = len(row['answers']) - row['answers'].count('-')
+    return [1, int(row['placement'] == 1 and survived), int(survived), row['correct'], played]
+
+
+class SortedKeys:
+    """Sorted list split into sublists so inserts and deletes move little memory"""
+
+    LOAD = 1000
+
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self.lists = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self.maxes = [sub[-1] for sub in self.lists]
+        self.size = len(keys)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, key):
+        self.size += 1
+        if not self.lists:
+            self.lists.append([key])
+            self.maxes.append(key)
+            return
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            i -= 1
+        sub = self.lists[i]
+        insort(sub, key)
+        self.maxes[i] = sub[-1]
+        if len(sub) > 2 * self.LOAD:
+            self.lists.insert(i + 1, sub[self.LOAD:])
+            del sub[self.LOAD:]
+            self.maxes.insert(i, sub[-1])
+
+    def remove(self, key):
+        i = bisect_left(self.maxes, key)
+        sub = self.lists[i]
+        del sub[bisect_left(sub, key)]
+        self.size -= 1
+        if sub:
+            self.maxes[i] = sub[-1]
+        else:
+            del self.lists[i]
+            del self.maxes[i]
+
+    def index(self, key):
+        """Position of key, counting from 0"""
+        i = bisect_left(self.maxes, key)
+        return sum(len(sub) for sub in self.lists[:i]) + bisect_left(self.lists[i], key)
+
+    def head(self, k):
+        keys = []
+        for sub in self.lists:
+            keys.extend(sub[:k - len(keys)])
+            if len(keys) >= k:
+                break
+        return keys
+
+
+class Board:
+    """Players ordered by one metric, best first, ties by player id"""
+
+    def __init__(self, metric, stats=None):
+        self.metric = metric
+        self.key_of = {}
+        for pid, s in (stats or {}).items():
+            value = metric(s)
+            if value is not None:
+                self.key_of[pid] = (-value, pid)
+        self.keys = SortedKeys(self.key_of.values())
+
+    def update(self, pid, stats):
+        value = None if stats is None else self.metric(stats)
+        new = None if value is None else (-value, pid)
+        key_of = self.key_of
+        old = key_of.get(pid)
+        if old == new:
+            return
+        if old is not None:
+            self.keys.remove(old)
+        if new is None:
+            del key_of[pid]
+        else:
+            self.keys.add(new)
+            key_of[pid] = new
+
+    def top(self, k):
+        return [(pid, -value) for value, pid in self.keys.head(k)]
+
+    def rank(self, pid):
+        """(rank, value), or None if the player isn't ranked"""
+        key = self.key_of.get(pid)
+        if key is None:
+            return None
+        return self.keys.index(key) + 1, -key[0]
+
+
+class Window:
+    """Per-player totals for one window and a board per metric"""
+
+    def __init__(self, hours, stats=None):
+        self.hours = hours
+        self.stats = stats or {}
+        self.boards = {name: Board(metric, self.stats) for name, metric in METRICS.items()}
+        # First hourly bucket still counted in the window
+        self.start_hour = None
+
+    def apply(self, pid, delta, sign=1):
+        stats = self.stats.get(pid)
+        if stats is None:
+            stats = self.stats[pid] = [0] * STAT_FIELDS
+        if sign > 0:
+            stats[:] = [s + d for s, d in zip(stats, delta)]
+        else:
+            stats[:] = [s - d for s, d in zip(stats, delta)]
+        if stats[GAMES] <= 0:
+            del self.stats[pid]
+            stats = None
+        for board in self.boards.values():
+            board.update(pid, stats)
+
+
+class Leaderboards:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = {}
+        # hour -> pid -> totals for games finished in that hour
+        self.buckets = {}
+        self.windows = {name: Window(hours) for name, hours in WINDOWS.items()}
+        self.dirty = False
+        self.version = 0
+        # Chunks written by the last snapshot, replaced by the next one
+        self.chunks = 0
+        # Latest hour the windows have been advanced to
+        self.hour = None
+
+    def record(self, rows, finished_at):
+        """Fold one finished game's player rows into every window"""
+        hour = int(finished_at // 3600)
+        with self.lock:
+            self._advance(hour)
+            bucket = self.buckets.setdefault(hour, {})
+            for row in rows:
+                pid = player_id(row['name'])
+                delta = row_stats(row)
+                self.names[pid] = row['name']
+                totals = bucket.setdefault(pid, [0] * STAT_FIELDS)
+                for i in range(STAT_FIELDS):
+                    totals[i] += delta[i]
+                for window in self.windows.values():
+                    if window.hours is None or hour >= window.start_hour:
+                        window.apply(pid, delta)
+            self.dirty = True
+
+    def _advance(self, hour):
+        """Drop buckets that have slid out of each rolling window"""
+        if self.hour is not None and hour <= self.hour:
+            return
+        self.hour = hour
+        for window in self.windows.values():
+            if window.hours is None:
+                continue
+            start = hour - window.hours + 1
+            if window.start_hour is None:
+                window.start_hour = start
+                continue
+            if start <= window.start_hour:
+                continue
+            for bucket_hour in sorted(h for h in self.buckets if window.start_hour <= h < start):
+                for pid, totals in self.buckets[bucket_hour].items():
+                    window.apply(pid, totals, -1)
+            window.start_hour = start
+
+        for bucket_hour in [h for h in self.buckets if h <= hour - RETAINED_HOURS]:
+            del self.buckets[bucket_hour]
+
+    def top(self, metric, window='all', k=10, now=None):
+        with self.lock:
+            self._advance(int((now or time.time()) // 3600))
+            entries = self.windows[window].boards[metric].top(k)
+            return [{'rank': rank, 'name': self.names.get(pid, pid), 'value': value}
+                    for rank, (pid, value) in enumerate(entries, 1)]
+
+    def rank(self, metric, name, window='all', now=None):
+        with self.lock:
+            self._advance(int((now or time.time()) // 3600))
+            board = self.windows[window].boards[metric]
+            found = board.rank(player_id(name))
+            if found is None:
+                return None
+            return {'rank': found[0], 'value': found[1], 'ranked': len(board.keys)}
+
+    def snapshot_items(self):
+        """Items holding the current state and the head item naming them
+
+        Returns (items, stale_keys); stale_keys are the previous snapshot's
+        chunks, to delete once the new head is written.
+        """
+        with self.lock:
+            rows = [[ALL_TIME, pid, self.names.get(pid, pid)] + stats
+                    for pid, stats in self.windows['all'].stats.items()]
+            for hour, bucket in self.buckets.items():
+                rows.extend([hour, pid, self.names.get(pid, pid)] + totals for pid, totals in bucket.items())
+            stale = [{'pk': f'{SNAPSHOT_KEY}#{self.version}', 'sk': f'{i:05d}'} for i in range(self.chunks)]
+            self.version += 1
+            self.chunks = -(-len(rows) // SNAPSHOT_CHUNK)
+            self.dirty = False
+            version = self.version
+
+        pk = f'{SNAPSHOT_KEY}#{version}'
+        chunks = [{'pk': pk, 'sk': f'{i:05d}', 'rows': rows[start:start + SNAPSHOT_CHUNK]}
+                  for i, start in enumerate(range(0, len(rows), SNAPSHOT_CHUNK))]
+        head = {'pk': SNAPSHOT_KEY, 'sk': 'HEAD', 'version': version, 'chunks': len(chunks),
+                'taken_at': f'{time.time():.3f}'}
+        return chunks + [head], stale
+
+    @classmethod
+    def from_rows(cls, rows, version=0, chunks=0, now=None):
+        """Rebuild from snapshot rows, sorting each board once"""
+        boards = cls()
+        boards.version = version
+        boards.chunks = chunks
+        hour = boards.hour = int((now or time.time()) // 3600)
+        all_time = {}
+        for scope, pid, name, *stats in rows:
+            boards.names[pid] = name
+            if scope == ALL_TIME:
+                all_time[pid] = list(stats)
+            elif scope > hour - RETAINED_HOURS:
+                boards.buckets.setdefault(scope, {})[pid] = list(stats)
+
+        windows = {'all': Window(None, all_time)}
+        for name, hours in WINDOWS.items():
+            if hours is None:
+                continue
+            stats = {}
+            for bucket_hour, bucket in boards.buckets.items():
+                if bucket_hour > hour - hours:
+                    for pid, totals in bucket.items():
+                        current = stats.setdefault(pid, [0] * STAT_FIELDS)
+                        for i in range(STAT_FIELDS):
+                            current[i] += totals[i]
+            windows[name] = Window(hours, stats)
+            windows[name].start_hour = hour - hours + 1
+        boards.windows = windows
+        return boards
+
+
+def benchmark(player_games, players, game_size, days, seed=None):
+    rng = random.Random(seed)
+    boards = Leaderboards()
+    names = [f'player{i}' for i in range(players)]
+    games = player_games // game_size
+    end = time.time()
+    start = end - days * 86400
+    answers = '1' * 20 + '0' * 10 + '-' * 15
+
+    began = time.perf_counter()
+    for g in range(games):
+        finished_at = start + (end - start) * g / games
+        rows = []
+        for placement, name in enumerate(rng.sample(names, game_size), 1):
+            eliminated = placement > 1 and rng.random() < 0.8
+            rows.append({'name': name, 'placement': placement, 'left': False,
+                         'eliminated_round': 2 if eliminated else None,
+                         'answers': answers, 'correct': rng.randint(0, 30)})
+        boards.record(rows, finished_at)
+    record_time = time.perf_counter() - began
+
+    queries = 10000
+    timings = {}
+    for metric in METRICS:
+        for window in WINDOWS:
+            began = time.perf_counter()
+            for _ in range(queries // 10):
+                boards.top(metric, window, 10, now=end)
+            top_time = (time.perf_counter() - began) / (queries // 10)
+            began = time.perf_counter()
+            for i in range(queries):
+                boards.rank(metric, names[i % players], window, now=end)
+            rank_time = (time.perf_counter() - began) / queries
+            timings[(metric, window)] = (top_time, rank_time, len(boards.windows[window].boards[metric].keys))
+
+    began = time.perf_counter()
+    items, _ = boards.snapshot_items()
+    snapshot_time = time.perf_counter() - began
+    rows = [row for item in items if 'rows' in item for row in item['rows']]
+    began = time.perf_counter()
+    Leaderboards.from_rows(rows, now=end)
+    load_time = time.perf_counter() - began
+
+    print(f"Recorded {games * game_size} player-games ({games} games of {game_size}) over {days} days "
+          f"in {record_time:.1f}s ({1e6 * record_time / games:.0f}us per game)")
+    for (metric, window), (top_time, rank_time, ranked) in timings.items():
+        print(f"  {metric:9s} {window:5s} ranked {ranked:7d}  top-10 {1e6 * top_time:6.1f}us  "
+              f"rank {1e6 * rank_time:6.1f}us")
+    print(f"Snapshot: {len(items)} items in {snapshot_time:.2f}s, rebuild in {load_time:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark leaderboard updates and queries')
+    parser.add_argument('--player-games', type=int, default=1000000)
+    parser.add_argument('--players', type=int, default=100000)
+    parser.add_argument('--game-size', type=int, default=20, help='players per game')
+    parser.add_argument('--days', type=int, default=14, help='days the games are spread over')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    benchmark(args.player_games, args.players, args.game_size, args.days, args.seed)
+
+
+if __name__ == '__main__':
+    main()
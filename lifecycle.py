@@ -0,0 +1,142 @@
+"""
+In-memory game lifecycle
+Games stay in memory after they end, and the admin page recreates any game
+it is pointed at from the database, so without eviction a long-running
+server only grows. GameTracker records when each game was last active. A
+periodic sweep evicts games that ended more than ENDED_TTL ago or saw no
+activity for IDLE_TTL. While the approximate size of the games in memory is
+over MEMORY_BUDGET, it also evicts the least recently active game that is
+not being played. An evicted game is still in the database and is loaded
+again by its admin page.
+
+game_memory() sizes a game by following its containers, so the numbers are
+an estimate: shared strings and interpreter overhead are counted loosely.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+IDLE_TTL = float(os.getenv('GAME_IDLE_TTL_SECONDS', '3600'))
+ENDED_TTL = float(os.getenv('GAME_ENDED_TTL_SECONDS', '600'))
+MEMORY_BUDGET = int(float(os.getenv('GAME_MEMORY_BUDGET_MB', '256')) * 2 ** 20)
+SWEEP_INTERVAL = 30.0
+
+# Game fields counted under each heading of game_memory()
+MEMORY_FIELDS = {
+    'players': ['players', 'scores', 'shards', 'shard_sizes', 'shard_tallies'],
+    'questions': ['questions', 'question_data'],
+    'answers': ['answers', 'correct_players', 'incorrect_players'],
+    'votes': ['votes_cast', 'points_awarded']
+}
+
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by obj and the containers and objects it references"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def game_memory(game, answer_buffer=None):
+    """Approximate bytes per part of a game, plus 'total'"""
+    seen = set()
+    usage = {part: sum(deep_size(getattr(game, field), seen) for field in fields)
+             for part, fields in MEMORY_FIELDS.items()}
+    if answer_buffer is not None:
+        usage['answers'] += deep_size(answer_buffer, seen)
+    usage['other'] = deep_size(game, seen)
+    usage['total'] = sum(usage.values())
+    return usage
+
+
+class GameTracker:
+    def __init__(self, idle_ttl=IDLE_TTL, ended_ttl=ENDED_TTL, budget=MEMORY_BUDGET):
+        self.idle_ttl = idle_ttl
+        self.ended_ttl = ended_ttl
+        self.budget = budget
+        self.lock = threading.Lock()
+        # game_id -> last activity, least recently active first
+        self.active_at = OrderedDict()
+        # game_id -> when it ended
+        self.ended_at = {}
+
+    def touch(self, game_id, now):
+        with self.lock:
+            self.active_at[game_id] = now
+            self.active_at.move_to_end(game_id)
+
+    def ended(self, game_id, now):
+        with self.lock:
+            self.ended_at[game_id] = now
+
+    def restarted(self, game_id):
+        with self.lock:
+            self.ended_at.pop(game_id, None)
+
+    def forget(self, game_id):
+        with self.lock:
+            self.active_at.pop(game_id, None)
+            self.ended_at.pop(game_id, None)
+
+    def to_evict(self, games, now, size_of):
+        """[(game_id, reason)] to evict from games (game_id -> GameState); size_of is like game_memory"""
+        games = dict(games)
+        with self.lock:
+            # Games added without a touch count as active now
+            for game_id in games:
+                if game_id not in self.active_at:
+                    self.active_at[game_id] = now
+            order = [game_id for game_id in self.active_at if game_id in games]
+            active_at = dict(self.active_at)
+            ended_at = dict(self.ended_at)
+
+        evict = []
+        for game_id in order:
+            if game_id in ended_at and now - ended_at[game_id] >= self.ended_ttl:
+                evict.append((game_id, 'ended'))
+            elif now - active_at[game_id] >= self.idle_ttl:
+                evict.append((game_id, 'idle'))
+
+        leaving = {game_id for game_id, _ in evict}
+        sizes = {game_id: size_of(games[game_id])['total'] for game_id in order if game_id not in leaving}
+        total = sum(sizes.values())
+        for game_id in order:
+            if total <= self.budget:
+                break
+            if game_id in sizes and games[game_id].status != 'playing':
+                evict.append((game_id, 'memory'))
+                total -= sizes[game_id]
+        return evict
+
+    def stats(self, games, size_of):
+        """Per-game memory estimate and activity, largest first"""
+        with self.lock:
+            active_at = dict(self.active_at)
+            ended_at = dict(self.ended_at)
+        report = []
+        for game_id, game in list(games.items()):
+            report.append({
+                'game_id': game_id,
+                'status': game.status,
+                'players': len(game.players),
+                'active_at': active_at.get(game_id),
+                'ended_at': ended_at.get(game_id),
+                'bytes': size_of(game)
+            })
+        report.sort(key=lambda entry: entry['bytes']['total'], reverse=True)
+        return {
+            'budget': self.budget,
+            'total': sum(entry['bytes']['total'] for entry in report),
+            'games': report
+        }
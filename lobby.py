@@ -0,0 +1,98 @@
+"""
+Incremental lobby membership
+Instead of broadcasting the whole player list on every join, lobby changes
+are collected per game and flushed as one versioned delta after a short
+coalescing window, so a join rush costs one broadcast per window. Clients
+start from a lobby_state snapshot and apply lobby_delta events in version
+order, asking for a fresh snapshot (lobby_sync) if they see a gap.
+"""
+
+import threading
+
+import arena
+from game_engine import Event, ROOM, ADMIN
+
+# Seconds of joins and leaves folded into one delta
+COALESCE_DELAY = 0.25
+
+
+def lobby_entry(player):
+    return {
+        'id': player['id'],
+        'name': player['name'],
+        'score': player['score'],
+        'eliminated': player['eliminated'],
+        'readonly': player['readonly']
+    }
+
+
+class LobbyFeed:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+        # player id -> entry, and ids that left, since the last flush
+        self.joined = {}
+        self.left = set()
+        self.scheduled = False
+
+    def join(self, player):
+        """Queue a join; returns True if the caller should schedule a flush"""
+        with self.lock:
+            self.left.discard(player['id'])
+            self.joined[player['id']] = lobby_entry(player)
+            return self._schedule()
+
+    def leave(self, player):
+        """Queue a leave; returns True if the caller should schedule a flush"""
+        with self.lock:
+            # Even when the join is still queued: a lobby_state taken since
+            # already lists the player
+            self.joined.pop(player['id'], None)
+            self.left.add(player['id'])
+            return self._schedule()
+
+    def _schedule(self):
+        if self.scheduled:
+            return False
+        self.scheduled = True
+        return True
+
+    def flush(self, game):
+        """Events for everything queued since the last flush"""
+        with self.lock:
+            self.scheduled = False
+            if not self.joined and not self.left:
+                return []
+            self.version += 1
+            joined, self.joined = list(self.joined.values()), {}
+            left, self.left = list(self.left), set()
+
+        if arena.is_arena(game):
+            # Arena lobbies only show the admin the latest joins
+            return [Event('player_joined', arena.recent_joins(game), ADMIN)]
+
+        return [Event('lobby_delta', {
+            'version': self.version,
+            'joined': joined,
+            'left': left,
+            'total_players': len(game.players)
+        }, ROOM)]
+
+    def state(self, game):
+        """Full lobby snapshot at the current version"""
+        with self.lock:
+            # Pending changes are already in game.players; they arrive again
+            # in the next delta, which clients apply idempotently
+            return {
+                'version': self.version,
+                'players': [lobby_entry(p) for p in game.players.values()],
+                'total_players': len(game.players)
+            }
+
+    def reset(self):
+        """Drop queued changes when the game is reset"""
+        with self.lock:
+            self.joined = {}
+            self.left = set()
+            self.scheduled = False
+            self.version += 1
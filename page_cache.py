@@ -0,0 +1,173 @@
+"""
+Rendered page cache and response compression
+Game pages depend only on their template and a few arguments (the routes do
+their session and game checks before rendering), so rendered HTML is kept in
+a small LRU keyed by template and arguments, together with gzip/brotli copies
+made once at insert. Other responses, mostly JSON, are compressed per request
+at a cheaper level when the client accepts it and the body is worth it.
+
+`python page_cache.py` measures latency and bytes per request for the game
+pages and a JSON route with and without the cache and compression.
+"""
+
+import argparse
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import assets
+
+MAX_PAGES = 256
+# Bodies smaller than this are not worth a Content-Encoding
+MIN_COMPRESS_SIZE = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+
+class PageCache:
+    def __init__(self, max_pages=MAX_PAGES):
+        self.max_pages = max_pages
+        self.lock = threading.Lock()
+        # (template, args) -> {'etag', encoding or None: body}
+        self.pages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.pages.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.pages.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, html):
+        """Store a rendered page with its precompressed variants"""
+        body = html.encode()
+        entry = {'etag': hashlib.sha256(body).hexdigest()[:16], None: body}
+        entry.update(assets.compressed_variants(body))
+        with self.lock:
+            self.pages[key] = entry
+            self.pages.move_to_end(key)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.pages.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'pages': len(self.pages), 'hits': self.hits, 'misses': self.misses}
+
+
+def page_key(template, context):
+    return (template, tuple(sorted(context.items())))
+
+
+def choose_encoding(available, accept_encodings):
+    """Preferred encoding the client accepts out of available, or None
+
+    accept_encodings is the parsed header (request.accept_encodings); q=0 refuses an encoding.
+    """
+    for encoding, _ in assets.ENCODINGS:
+        if encoding in available and accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL)
+
+
+def dynamic_encodings():
+    """Encodings available for per-request compression"""
+    try:
+        import brotli  # noqa: F401
+        return {'br', 'gzip'}
+    except ImportError:
+        return {'gzip'}
+
+
+DYNAMIC_ENCODINGS = dynamic_encodings()
+
+
+def compress_response(response, accept_encodings):
+    """Compress a buffered response body in place when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = choose_encoding(DYNAMIC_ENCODINGS, accept_encodings)
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def benchmark(requests_per_route):
+    """Time the game pages and a JSON route with the cache and compression off, then on"""
+    import io
+    from werkzeug.test import EnvironBuilder
+    import app_dynamodb as app_module
+    from game_engine import GameState
+
+    app = app_module.app
+    game = GameState('benchgame', 'Benchmark', 'pw')
+    app_module.games[game.game_id] = game
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess[f'game_{game.game_id}'] = {'authenticated': True, 'player_name': 'bench'}
+    cookie = f"session={client.get_cookie('session').value}"
+
+    # Enough ranked players for a full leaderboard page
+    for _ in range(3):
+        app_module.boards.record([{'name': f'player{i}', 'placement': 1, 'correct': 10, 'answers': '1' * 10,
+                                   'eliminated_round': None, 'left': False} for i in range(200)], time.time())
+
+    routes = ['/', f'/game/{game.game_id}', f'/game/{game.game_id}/play',
+              f'/game/{game.game_id}/round/1', '/api/leaderboard/wins?limit=100']
+
+    def request(environ):
+        """Call the WSGI app directly, without the test client's overhead"""
+        environ = dict(environ, **{'wsgi.input': io.BytesIO()})
+        status = []
+        body = b''.join(app.wsgi_app(environ, lambda s, h, exc_info=None: status.append(h)))
+        return dict(status[0]), body
+
+    for label, enabled, accept in [('before', False, ''), ('after', True, 'gzip, deflate, br')]:
+        app_module.page_cache_enabled = enabled
+        app_module.rendered_pages.clear()
+        print(label)
+        for route in routes:
+            environ = EnvironBuilder(route, headers={'Accept-Encoding': accept, 'Cookie': cookie}).get_environ()
+            request(environ)
+            began = time.perf_counter()
+            for _ in range(requests_per_route):
+                headers, body = request(environ)
+            elapsed = (time.perf_counter() - began) / requests_per_route
+            encoding = headers.get('Content-Encoding', 'identity')
+            print(f"  {route:34s} {1e6 * elapsed:6.0f}us  {len(body):6d} bytes ({encoding})")
+    app_module.page_cache_enabled = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure page and JSON response latency and size')
+    parser.add_argument('--requests', type=int, default=500, help='requests per route')
+    args = parser.parse_args()
+    benchmark(args.requests)
+
+
+if __name__ == '__main__':
+    main()
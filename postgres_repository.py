@@ -0,0 +1,284 @@
+"""
+Postgres repository
+The same interface as repository.Repository on a Postgres (RDS) database,
+for STORAGE_BACKEND=postgres; app.py starts the server with it. Items are
+stored as JSONB documents under the keys the DynamoDB tables use, so game
+history, leaderboard snapshots and the dashboard listing work unchanged;
+per-question answer stats get a table of counters so a flush is one upsert
+per question. Questions are also indexed by difficulty and a random key,
+so with QUESTION_SOURCE=database a game is drawn by index seeks
+(sample_game) instead of from a loaded bank.
+
+The tables are prefixed trivia_ so they sit beside the ones the old app.py
+created: its questions table is read as the seed source, the way the
+DynamoDB backend copies trivia_questions_source, and its admins table is
+used as it is. Connections come from a thread-safe pool and every call is
+one transaction.
+"""
+
+import contextlib
+import os
+import random
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+import psycopg2.pool
+
+import answer_stats
+import game_history
+import game_listing
+import leaderboard
+import question_bank
+import repository
+
+POOL_SIZE = int(os.getenv('RDS_POOL_SIZE', '16'))
+# The table app.py used to create, copied into trivia_questions on first start
+SOURCE_QUESTIONS = 'questions'
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS admins (username VARCHAR(50) PRIMARY KEY, password VARCHAR(64) NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS trivia_games (id TEXT PRIMARY KEY, created_at TEXT NOT NULL, item JSONB NOT NULL)',
+    # Dashboard pages, newest first
+    'CREATE INDEX IF NOT EXISTS trivia_games_created_at ON trivia_games (created_at, id)',
+    'CREATE TABLE IF NOT EXISTS trivia_questions (id TEXT PRIMARY KEY, difficulty TEXT NOT NULL, '
+    'sample_key DOUBLE PRECISION NOT NULL, item JSONB NOT NULL)',
+    # Random draws seek to a point in a difficulty's keys
+    'CREATE INDEX IF NOT EXISTS trivia_questions_sample ON trivia_questions (difficulty, sample_key)',
+    'CREATE TABLE IF NOT EXISTS trivia_results (pk TEXT NOT NULL, sk TEXT NOT NULL, item JSONB NOT NULL, '
+    'PRIMARY KEY (pk, sk))',
+    'CREATE TABLE IF NOT EXISTS trivia_question_stats (question_id TEXT PRIMARY KEY, '
+    + ', '.join(f'{field} BIGINT NOT NULL DEFAULT 0' for field in answer_stats.FIELDS) + ')'
+]
+
+GAMES_PAGE = 'SELECT id, created_at, item FROM trivia_games ORDER BY created_at DESC, id DESC LIMIT %s'
+GAMES_PAGE_AFTER = ('SELECT id, created_at, item FROM trivia_games WHERE (created_at, id) < (%s, %s) '
+                    'ORDER BY created_at DESC, id DESC LIMIT %s')
+# (newest_first, after a cursor) -> query for a page of one results partition
+RESULTS_PAGE = {
+    (False, False): 'SELECT sk, item FROM trivia_results WHERE pk = %s ORDER BY sk LIMIT %s',
+    (False, True): 'SELECT sk, item FROM trivia_results WHERE pk = %s AND sk > %s ORDER BY sk LIMIT %s',
+    (True, False): 'SELECT sk, item FROM trivia_results WHERE pk = %s ORDER BY sk DESC LIMIT %s',
+    (True, True): 'SELECT sk, item FROM trivia_results WHERE pk = %s AND sk < %s ORDER BY sk DESC LIMIT %s'
+}
+# From the point to the end of a difficulty's keys, then from the start up to the point
+SAMPLE_FROM = [
+    'SELECT id FROM trivia_questions WHERE difficulty = %s AND sample_key >= %s ORDER BY sample_key LIMIT %s',
+    'SELECT id FROM trivia_questions WHERE difficulty = %s AND sample_key < %s ORDER BY sample_key LIMIT %s'
+]
+PUT_RESULT = ('INSERT INTO trivia_results (pk, sk, item) VALUES (%s, %s, %s) '
+              'ON CONFLICT (pk, sk) DO UPDATE SET item = EXCLUDED.item')
+PUT_QUESTION = ('INSERT INTO trivia_questions (id, difficulty, sample_key, item) VALUES (%s, %s, %s, %s) '
+                'ON CONFLICT (id) DO UPDATE SET difficulty = EXCLUDED.difficulty, item = EXCLUDED.item')
+ADD_STATS = (f"INSERT INTO trivia_question_stats (question_id, {', '.join(answer_stats.FIELDS)}) "
+             f"VALUES (%s{', %s' * len(answer_stats.FIELDS)}) ON CONFLICT (question_id) DO UPDATE SET "
+             + ', '.join(f'{field} = trivia_question_stats.{field} + EXCLUDED.{field}'
+                         for field in answer_stats.FIELDS))
+QUESTION_FIELDS = ['question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
+
+
+def question_row(item):
+    return item['id'], question_bank.question_key(item)[1], random.random(), psycopg2.extras.Json(item)
+
+
+class PostgresRepository:
+    def __init__(self):
+        self.dsn = {
+            'host': os.getenv('RDS_HOST', 'localhost'),
+            'database': os.getenv('RDS_DB', 'trivia'),
+            'user': os.getenv('RDS_USER', 'postgres'),
+            'password': os.getenv('RDS_PASSWORD', 'password'),
+            'port': os.getenv('RDS_PORT', '5432')
+        }
+        self.pool = None
+        self.committed = 0
+        self.failed = 0
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """A pooled connection's cursor inside one transaction, committed on success"""
+        if self.pool is None:
+            self.pool = psycopg2.pool.ThreadedConnectionPool(1, POOL_SIZE, **self.dsn)
+        conn = self.pool.getconn()
+        try:
+            # The connection's context commits, or rolls back on an exception
+            with conn, conn.cursor() as cursor:
+                yield cursor
+            self.committed += 1
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def _fetch(self, sql, params=()):
+        with self.transaction() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def create_tables(self):
+        """Create missing tables and indexes"""
+        print(f"Opening Postgres database {self.dsn['database']} on {self.dsn['host']}", flush=True)
+        with self.transaction() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+
+    def write_stats(self):
+        # Writes are synchronous; there is no queue to report
+        return {'committed': self.committed, 'failed': self.failed}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.closeall()
+
+    # Admins
+
+    def get_admin(self, username):
+        """Admin item or None"""
+        rows = self._fetch('SELECT username, password FROM admins WHERE username = %s', (username,))
+        return {'username': rows[0][0], 'password': rows[0][1]} if rows else None
+
+    def add_admin(self, username, password_hash):
+        """Create an admin unless one with the username exists; returns True if created"""
+        with self.transaction() as cursor:
+            cursor.execute('INSERT INTO admins (username, password) VALUES (%s, %s) ON CONFLICT DO NOTHING',
+                           (username, password_hash))
+            return cursor.rowcount == 1
+
+    # Games
+
+    def create_game(self, item):
+        """Insert a new game; raises repository.GameExists on an id clash"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('INSERT INTO trivia_games (id, created_at, item) VALUES (%s, %s, %s)',
+                               (item['id'], item['created_at'], psycopg2.extras.Json(item)))
+        except psycopg2.errors.UniqueViolation:
+            raise repository.GameExists(item['id'])
+
+    def get_game(self, game_id):
+        """Game item or None"""
+        rows = self._fetch('SELECT item FROM trivia_games WHERE id = %s', (game_id,))
+        return rows[0][0] if rows else None
+
+    def delete_game(self, game_id):
+        with self.transaction() as cursor:
+            cursor.execute('DELETE FROM trivia_games WHERE id = %s', (game_id,))
+
+    def list_games(self, cache, cursor=None):
+        """Cached dashboard page; returns (items, next_cursor)"""
+        return game_listing.list_games(self._games_page, cache, cursor)
+
+    def _games_page(self, cursor, page_size):
+        start_key = game_listing.decode_cursor(cursor, ('id', 'created_at'))
+        if start_key:
+            rows = self._fetch(GAMES_PAGE_AFTER, (start_key['created_at'], start_key['id'], page_size))
+        else:
+            rows = self._fetch(GAMES_PAGE, (page_size,))
+        # Only what the DynamoDB index projects, never the game password
+        items = [{key: item[key] for key in game_listing.LISTED_FIELDS if key in item} for _, _, item in rows]
+        last_key = {'id': rows[-1][0], 'created_at': rows[-1][1]} if len(rows) == page_size else None
+        return items, game_listing.encode_cursor(last_key)
+
+    # Results
+
+    def save_results(self, items):
+        with self.transaction() as cursor:
+            psycopg2.extras.execute_batch(cursor, PUT_RESULT, [
+                (item['pk'], item['sk'], psycopg2.extras.Json(item)) for item in items])
+
+    def game_results(self, game_id, cursor=None, limit=repository.HISTORY_PAGE_SIZE):
+        """Play-throughs of a game, newest first"""
+        return self._query_results(game_history.game_key(game_id), cursor, limit, newest_first=True)
+
+    def run_results(self, run_id, cursor=None, limit=repository.HISTORY_PAGE_SIZE):
+        """Players of one play-through in placement order"""
+        return self._query_results(game_history.run_key(run_id), cursor, limit)
+
+    def player_history(self, name, cursor=None, limit=repository.HISTORY_PAGE_SIZE):
+        """A player's games, newest first"""
+        return self._query_results(game_history.player_key(name), cursor, limit, newest_first=True)
+
+    def save_leaderboard(self, boards):
+        """Write a leaderboard snapshot and drop the previous one in one transaction"""
+        items, stale = boards.snapshot_items()
+        with self.transaction() as cursor:
+            psycopg2.extras.execute_batch(cursor, PUT_RESULT, [
+                (item['pk'], item['sk'], psycopg2.extras.Json(item)) for item in items])
+            psycopg2.extras.execute_batch(cursor, 'DELETE FROM trivia_results WHERE pk = %s AND sk = %s',
+                                          [(key['pk'], key['sk']) for key in stale])
+        return len(items)
+
+    def add_question_stats(self, rows):
+        """Add [(question_id, counters)] to the questions' stats in one transaction"""
+        with self.transaction() as cursor:
+            psycopg2.extras.execute_batch(cursor, ADD_STATS, [
+                (question_id, *map(int, row)) for question_id, row in rows])
+
+    def load_leaderboard(self):
+        """Leaderboards rebuilt from the latest snapshot, or empty ones"""
+        head = self._fetch('SELECT item FROM trivia_results WHERE pk = %s AND sk = %s',
+                           (leaderboard.SNAPSHOT_KEY, 'HEAD'))
+        if not head:
+            return leaderboard.Leaderboards()
+        head = head[0][0]
+        rows = []
+        for (item,) in self._fetch('SELECT item FROM trivia_results WHERE pk = %s ORDER BY sk',
+                                   (f"{leaderboard.SNAPSHOT_KEY}#{head['version']}",)):
+            rows.extend(item['rows'])
+        return leaderboard.Leaderboards.from_rows(rows, head['version'], head['chunks'])
+
+    def _query_results(self, pk, cursor, limit, newest_first=False):
+        limit = max(1, min(limit, repository.HISTORY_MAX_PAGE_SIZE))
+        start_key = game_listing.decode_cursor(cursor, ('pk', 'sk'))
+        if start_key:
+            rows = self._fetch(RESULTS_PAGE[newest_first, True], (pk, start_key['sk'], limit))
+        else:
+            rows = self._fetch(RESULTS_PAGE[newest_first, False], (pk, limit))
+        last_key = {'pk': pk, 'sk': rows[-1][0]} if len(rows) == limit else None
+        return [item for _, item in rows], game_listing.encode_cursor(last_key)
+
+    # Questions
+
+    def all_questions(self):
+        return [item for (item,) in self._fetch('SELECT item FROM trivia_questions')]
+
+    def has_questions(self):
+        return bool(self._fetch('SELECT 1 FROM trivia_questions LIMIT 1'))
+
+    def add_question(self, item, overwrite=True):
+        """Store a question; with overwrite=False an existing id is left alone"""
+        sql = PUT_QUESTION if overwrite else ('INSERT INTO trivia_questions (id, difficulty, sample_key, item) '
+                                              'VALUES (%s, %s, %s, %s) ON CONFLICT DO NOTHING')
+        with self.transaction() as cursor:
+            cursor.execute(sql, question_row(item))
+            return cursor.rowcount == 1
+
+    def add_questions(self, items):
+        with self.transaction() as cursor:
+            psycopg2.extras.execute_batch(cursor, PUT_QUESTION, [question_row(item) for item in items])
+
+    def sample_game(self, rounds, per_round, rng=random):
+        """Questions for a game, each an index seek to a random key of its difficulty"""
+        with self.transaction() as cursor:
+            def take(difficulty, taken, point):
+                # One more row than is taken holds an undrawn question if the range has one
+                for sql in SAMPLE_FROM:
+                    cursor.execute(sql, (difficulty, point, len(taken) + 1))
+                    for (question_id,) in cursor.fetchall():
+                        if question_id not in taken:
+                            return question_id
+                return None
+            ids = question_bank.sample_indexed(take, rounds, per_round, rng)
+            cursor.execute('SELECT id, item FROM trivia_questions WHERE id = ANY(%s)', (ids,))
+            items = dict(cursor.fetchall())
+            # A seek favours keys after wide gaps; fresh keys for the drawn questions even that out
+            cursor.execute('UPDATE trivia_questions SET sample_key = random() WHERE id = ANY(%s)', (ids,))
+        return [items[question_id] for question_id in ids]
+
+    def source_questions(self, table_name=SOURCE_QUESTIONS):
+        """Questions from the old app.py table, or [] if there is none"""
+        if self._fetch('SELECT to_regclass(%s)', (table_name,))[0][0] is None:
+            return []
+        rows = self._fetch(f"SELECT id, {', '.join(QUESTION_FIELDS)} FROM {table_name} ORDER BY id")
+        return [dict(zip(QUESTION_FIELDS, row[1:]), id=str(row[0])) for row in rows]
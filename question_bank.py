@@ -0,0 +1,220 @@
+"""
+Category and difficulty-aware question sampling
+Questions carry a `category` and a `difficulty` (easy, medium or hard;
+questions without them count as general and medium). QuestionBank indexes
+the bank once when it is loaded: for each difficulty, the categories it
+has, and for each (category, difficulty) the positions of its questions.
+
+A game is drawn one question at a time. The difficulty comes from the
+round's mix in ROUND_MIX, so rounds go from mostly easy to mostly hard. The
+category is drawn from that difficulty's categories (evenly by default, so a
+topic with many questions does not crowd out the rest). Both draws use Vose
+alias tables built at load time, and the question itself is taken from its
+bucket by a sparse Fisher-Yates step. Every draw is constant time and no
+question repeats within a game. A store that indexes questions by
+difficulty and a random key draws a game with sample_indexed() instead,
+without loading the bank.
+
+`python question_bank.py` prints the mix drawn from questions.json for
+each round and the cost per draw.
+"""
+
+import argparse
+import json
+import random
+import time
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+DEFAULT_CATEGORY = 'general'
+DEFAULT_DIFFICULTY = 'medium'
+
+# Share of each difficulty per round
+ROUND_MIX = {
+    1: {'easy': 0.6, 'medium': 0.3, 'hard': 0.1},
+    2: {'easy': 0.2, 'medium': 0.6, 'hard': 0.2},
+    3: {'easy': 0.1, 'medium': 0.3, 'hard': 0.6}
+}
+# Draws of an emptied bucket retried before falling back to a scan of the others
+MAX_REDRAWS = 8
+# Seconds a loaded bank is reused before the server reads questions again
+RELOAD_INTERVAL = 300
+
+
+class AliasTable:
+    """Constant-time draws of an index with probability proportional to its weight"""
+
+    def __init__(self, weights):
+        count = len(weights)
+        total = float(sum(weights))
+        scaled = [w * count / total for w in weights]
+        self.prob = [0.0] * count
+        self.alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Leftovers are 1 up to rounding
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+# Difficulty draw per round, for stores that sample without a loaded bank
+MIX_TABLES = {round_number: AliasTable([mix.get(difficulty, 0.0) for difficulty in DIFFICULTIES])
+              for round_number, mix in ROUND_MIX.items()}
+
+
+def question_key(question):
+    difficulty = question.get('difficulty')
+    return (question.get('category') or DEFAULT_CATEGORY,
+            difficulty if difficulty in DIFFICULTIES else DEFAULT_DIFFICULTY)
+
+
+class QuestionBank:
+    def __init__(self, questions, category_weights=None):
+        self.questions = list(questions)
+        # (category, difficulty) -> positions in self.questions
+        self.buckets = {}
+        for position, question in enumerate(self.questions):
+            self.buckets.setdefault(question_key(question), []).append(position)
+
+        # difficulty -> categories that have questions of that difficulty, and a table over them
+        self.categories = {}
+        self.category_tables = {}
+        for difficulty in DIFFICULTIES:
+            categories = sorted(category for category, d in self.buckets if d == difficulty)
+            if categories:
+                self.categories[difficulty] = categories
+                self.category_tables[difficulty] = AliasTable(
+                    [(category_weights or {}).get(category, 1.0) for category in categories])
+
+        self.mix_tables = {}
+        for round_number, mix in ROUND_MIX.items():
+            weights = [mix.get(difficulty, 0.0) if difficulty in self.categories else 0.0
+                       for difficulty in DIFFICULTIES]
+            if sum(weights) > 0:
+                self.mix_tables[round_number] = AliasTable(weights)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def sample_game(self, rounds, per_round, rng=random):
+        """Questions for a game, round by round; shorter if the bank is smaller"""
+        draw = Draw(self, rng)
+        picked = []
+        for round_number in range(1, rounds + 1):
+            for _ in range(per_round):
+                if draw.remaining == 0:
+                    return picked
+                picked.append(self.questions[draw.next(round_number)])
+        return picked
+
+
+class Draw:
+    """Questions taken without replacement from a bank, for one game"""
+
+    def __init__(self, bank, rng):
+        self.bank = bank
+        self.rng = rng
+        self.remaining = len(bank)
+        # (category, difficulty) -> [undrawn count, sparse swaps of the Fisher-Yates shuffle]
+        self.state = {}
+
+    def _take(self, key):
+        """A random undrawn position from a bucket, or None if it is empty"""
+        bucket = self.bank.buckets[key]
+        state = self.state.setdefault(key, [len(bucket), {}])
+        left, swaps = state
+        if left == 0:
+            return None
+        j = self.rng.randrange(left)
+        chosen = swaps.get(j, j)
+        swaps[j] = swaps.get(left - 1, left - 1)
+        state[0] = left - 1
+        self.remaining -= 1
+        return bucket[chosen]
+
+    def _draw_key(self, round_number):
+        mix = self.bank.mix_tables.get(round_number) or next(iter(self.bank.mix_tables.values()))
+        difficulty = DIFFICULTIES[mix.draw(self.rng)]
+        category = self.bank.categories[difficulty][self.bank.category_tables[difficulty].draw(self.rng)]
+        return category, difficulty
+
+    def next(self, round_number):
+        """Position of the next question for a round"""
+        for _ in range(MAX_REDRAWS):
+            position = self._take(self._draw_key(round_number))
+            if position is not None:
+                return position
+        # The round's preferred buckets are used up; nearest difficulty first
+        mix = ROUND_MIX.get(round_number, ROUND_MIX[1])
+        for difficulty in sorted(DIFFICULTIES, key=lambda d: -mix.get(d, 0.0)):
+            for category in self.bank.categories.get(difficulty, []):
+                position = self._take((category, difficulty))
+                if position is not None:
+                    return position
+        raise IndexError('question bank exhausted')
+
+
+def sample_indexed(take, rounds, per_round, rng=random):
+    """Ids of a game's questions drawn from a store, with the round mix but no category balancing"""
+    # take() returns the id of an undrawn question of the difficulty at or after the random point, or None
+    picked = []
+    # difficulty -> ids drawn so far
+    taken = {difficulty: set() for difficulty in DIFFICULTIES}
+    for round_number in range(1, rounds + 1):
+        mix = ROUND_MIX.get(round_number, ROUND_MIX[1])
+        table = MIX_TABLES.get(round_number, MIX_TABLES[1])
+        # Nearest difficulty first once the drawn one is used up
+        fallback = sorted(DIFFICULTIES, key=lambda d: -mix.get(d, 0.0))
+        for _ in range(per_round):
+            for difficulty in [DIFFICULTIES[table.draw(rng)]] + fallback:
+                question_id = take(difficulty, taken[difficulty], rng.random())
+                if question_id is not None:
+                    break
+            else:
+                return picked
+            taken[difficulty].add(question_id)
+            picked.append(question_id)
+    return picked
+
+
+def benchmark(path, games):
+    with open(path, encoding='utf-8') as f:
+        bank = QuestionBank(json.load(f))
+    print(f"{len(bank)} questions in {len(bank.buckets)} (category, difficulty) buckets")
+    rng = random.Random(1)
+    per_round = 10
+    counts = {round_number: dict.fromkeys(DIFFICULTIES, 0) for round_number in ROUND_MIX}
+    for _ in range(games):
+        picked = bank.sample_game(len(ROUND_MIX), per_round, rng)
+        for i, question in enumerate(picked):
+            counts[i // per_round + 1][question_key(question)[1]] += 1
+    for round_number, count in counts.items():
+        total = sum(count.values())
+        print(f"  round {round_number}: " + ', '.join(f"{d} {count[d] / total:.0%}" for d in DIFFICULTIES))
+
+    draws = 200000
+    big = QuestionBank([{'category': f'c{i % 20}', 'difficulty': DIFFICULTIES[i % 3]} for i in range(draws)])
+    began = time.perf_counter()
+    big.sample_game(len(ROUND_MIX), draws // len(ROUND_MIX), rng)
+    print(f"{1e6 * (time.perf_counter() - began) / draws:.2f}us per draw from a {draws}-question bank")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the difficulty mix drawn per round')
+    parser.add_argument('--questions', default='questions.json')
+    parser.add_argument('--games', type=int, default=2000)
+    args = parser.parse_args()
+    benchmark(args.questions, args.games)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Per-connection rate limiting
+Every limited Socket.IO event has a token bucket per connection: RATE
+tokens a second up to BURST. A client that sends faster than that has the
+excess dropped before the handler runs, so repeated get_players calls (a
+full player list serialization each) or join_game calls (a lobby broadcast
+each) from one client cannot eat a busy game's CPU.
+
+A bucket is two floats, and a connection has one per limited event, so
+memory per connection is fixed however much it sends. What happens to an
+excess event is set by RATE_LIMIT_POLICY:
+
+- drop: ignore it
+- notify: ignore it and tell the client with rate_limited
+- disconnect: ignore it, and disconnect the client after DISCONNECT_AFTER
+  excess events in a row
+
+RATE_LIMITS overrides the defaults as `event=rate:burst,...`.
+"""
+
+import argparse
+import os
+import threading
+import time
+
+DEFAULT_LIMITS = {
+    'submit_answer': (2.0, 4),
+    'vote_player': (2.0, 4),
+    'get_players': (1.0, 3),
+    'join_game': (0.5, 3),
+    'lobby_sync': (1.0, 3),
+    'question_fetch': (1.0, 3),
+    'watch_game': (0.5, 3)
+}
+DROP = 'drop'
+NOTIFY = 'notify'
+DISCONNECT = 'disconnect'
+POLICIES = (DROP, NOTIFY, DISCONNECT)
+DISCONNECT_AFTER = 20
+# Returned by check() for an event within its limit
+ALLOW = 'allow'
+
+
+def parse_limits(spec, defaults=DEFAULT_LIMITS):
+    """Defaults updated from an `event=rate:burst,...` spec"""
+    limits = dict(defaults)
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        event, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        limits[event.strip()] = (float(rate), int(burst or 1))
+    return limits
+
+
+class RateLimiter:
+    def __init__(self, limits=None, policy=None):
+        self.limits = limits if limits is not None else parse_limits(os.getenv('RATE_LIMITS'))
+        self.policy = policy or os.getenv('RATE_LIMIT_POLICY', DROP)
+        if self.policy not in POLICIES:
+            raise ValueError(f"RATE_LIMIT_POLICY must be one of {', '.join(POLICIES)}")
+        self.lock = threading.Lock()
+        # sid -> {event: [tokens, updated_at]}, and sid -> excess events in a row
+        self.buckets = {}
+        self.strikes = {}
+        self.dropped = dict.fromkeys(self.limits, 0)
+        self.disconnected = 0
+
+    def check(self, sid, event, now):
+        """ALLOW, or what to do with an event over its limit (the policy)"""
+        limit = self.limits.get(event)
+        if limit is None:
+            return ALLOW
+        rate, burst = limit
+        with self.lock:
+            buckets = self.buckets.setdefault(sid, {})
+            bucket = buckets.get(event)
+            if bucket is None:
+                bucket = buckets[event] = [float(burst), now]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                self.strikes.pop(sid, None)
+                return ALLOW
+
+            self.dropped[event] += 1
+            strikes = self.strikes[sid] = self.strikes.get(sid, 0) + 1
+            if self.policy == DISCONNECT:
+                if strikes < DISCONNECT_AFTER:
+                    return DROP
+                self.disconnected += 1
+                print(f"Disconnecting {sid} after {strikes} rate-limited events ({event})", flush=True)
+            return self.policy
+
+    def retry_after(self, event):
+        """Seconds until a drained bucket has a token again"""
+        return 1.0 / self.limits[event][0]
+
+    def forget(self, sid):
+        with self.lock:
+            self.buckets.pop(sid, None)
+            self.strikes.pop(sid, None)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'policy': self.policy,
+                'connections': len(self.buckets),
+                'dropped': dict(self.dropped),
+                'disconnected': self.disconnected
+            }
+
+
+def benchmark(events, clients):
+    """Cost of a check, and how much of a spam burst gets through"""
+    limiter = RateLimiter(DEFAULT_LIMITS, DROP)
+    sids = [f'sid{i}' for i in range(clients)]
+    began = time.perf_counter()
+    now = time.monotonic()
+    allowed = 0
+    for i in range(events):
+        # Every client spams get_players within the same second
+        if limiter.check(sids[i % clients], 'get_players', now + i * 1e-6) == ALLOW:
+            allowed += 1
+    elapsed = time.perf_counter() - began
+    print(f"{events} get_players events from {clients} clients in about "
+          f"{events * 1e-6:.3f}s: {allowed} handled, {limiter.stats()['dropped']['get_players']} dropped, "
+          f"{1e9 * elapsed / events:.0f}ns per check")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the socket event rate limiter')
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--clients', type=int, default=100)
+    args = parser.parse_args()
+    benchmark(args.events, args.clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+DynamoDB repository
+Owns the trivia tables behind one shared, tuned client. The client, table
+handles and write queue are built once, on first use, so importing the app
+does not pay for importing boto3 and loading the service model; boto3 Table
+objects only call DescribeTable when metadata such as table_arn or
+table_status is read, so routes never touch those attributes. Game writes
+other than the conditional create go through a write-behind queue so
+handlers don't wait on DynamoDB.
+"""
+
+import functools
+import threading
+from decimal import Decimal
+
+import answer_stats
+import game_history
+import game_listing
+import leaderboard
+from write_behind import WriteBehindQueue
+
+ADMINS_TABLE = 'trivia_admins'
+GAMES_TABLE = 'trivia_games'
+QUESTIONS_TABLE = 'trivia_questions'
+RESULTS_TABLE = 'trivia_results'
+
+RESULTS_TABLE_DEFINITION = {
+    'TableName': RESULTS_TABLE,
+    'KeySchema': [
+        {'AttributeName': 'pk', 'KeyType': 'HASH'},
+        {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+    ],
+    'AttributeDefinitions': [
+        {'AttributeName': 'pk', 'AttributeType': 'S'},
+        {'AttributeName': 'sk', 'AttributeType': 'S'}
+    ],
+    'BillingMode': 'PAY_PER_REQUEST'
+}
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+# botocore Config options for the shared client
+CLIENT_CONFIG = dict(
+    # Socket.IO handlers and timers run concurrently; the default pool of 10
+    # makes them queue for connections
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
+# Attributes connect() sets up
+CONNECTED = {'resource', 'client', 'admins', 'games', 'questions', 'results', 'writer'}
+
+
+class GameExists(Exception):
+    """A game with this id has already been written"""
+
+
+def plain(value):
+    """Convert the Decimals boto3 returns for numbers back to int or float"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
+
+class Repository:
+    def __init__(self, region):
+        self.region = region
+        self.connect_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Only reached while a connected attribute is still missing
+        if name not in CONNECTED:
+            raise AttributeError(name)
+        self.connect()
+        return self.__dict__[name]
+
+    def connect(self):
+        """Build the client, table handles and write queue if not done yet"""
+        with self.connect_lock:
+            if 'writer' in self.__dict__:
+                return
+            import boto3
+            from botocore.config import Config
+
+            self.resource = boto3.resource('dynamodb', region_name=self.region, config=Config(**CLIENT_CONFIG))
+            self.client = self.resource.meta.client
+            self.admins = self.resource.Table(ADMINS_TABLE)
+            self.games = self.resource.Table(GAMES_TABLE)
+            self.questions = self.resource.Table(QUESTIONS_TABLE)
+            self.results = self.resource.Table(RESULTS_TABLE)
+            self.writer = WriteBehindQueue(self.client)
+
+    def create_tables(self):
+        """Create missing tables and indexes"""
+        print(f"Creating DynamoDB tables in region: {self.region}", flush=True)
+        dynamodb = self.resource
+        try:
+            # Create admins table
+            admins_table = dynamodb.create_table(
+                TableName=ADMINS_TABLE,
+                KeySchema=[{'AttributeName': 'username', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'username', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            admins_table.wait_until_exists()
+
+            # Create questions table
+            questions_table = dynamodb.create_table(
+                TableName=QUESTIONS_TABLE,
+                KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            questions_table.wait_until_exists()
+
+            # Create games table
+            games_table = dynamodb.create_table(
+                TableName=GAMES_TABLE,
+                KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}] + game_listing.GAMES_INDEX_ATTRIBUTES,
+                GlobalSecondaryIndexes=[game_listing.GAMES_INDEX_DEFINITION],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            games_table.wait_until_exists()
+
+        except self.client.exceptions.ResourceInUseException:
+            print("Tables already exist", flush=True)
+        except Exception as e:
+            print(f"Error creating tables: {e}", flush=True)
+            print(f"Region being used: {self.region}", flush=True)
+
+        # Results table was added after the original three
+        try:
+            dynamodb.create_table(**RESULTS_TABLE_DEFINITION).wait_until_exists()
+        except self.client.exceptions.ResourceInUseException:
+            pass
+        except Exception as e:
+            print(f"Error creating results table: {e}", flush=True)
+
+        # Games tables created before the dashboard index need it added
+        try:
+            game_listing.ensure_games_index(dynamodb, GAMES_TABLE)
+        except Exception as e:
+            print(f"Error adding games index: {e}", flush=True)
+
+    # Admins
+
+    def get_admin(self, username):
+        """Admin item or None"""
+        return self.admins.get_item(Key={'username': username}).get('Item')
+
+    def add_admin(self, username, password_hash):
+        """Create an admin unless one with the username exists; returns True if created"""
+        try:
+            self.admins.put_item(
+                Item={'username': username, 'password': password_hash},
+                ConditionExpression='attribute_not_exists(username)'
+            )
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    # Games
+
+    def create_game(self, item):
+        """Write a new game in a single conditional put; raises GameExists on an id clash"""
+        # Synchronous, not write-behind: the id clash has to be known before the game is announced
+        try:
+            self.games.put_item(Item=item, ConditionExpression='attribute_not_exists(id)')
+        except self.client.exceptions.ConditionalCheckFailedException:
+            raise GameExists(item['id'])
+
+    def get_game(self, game_id):
+        """Game item or None"""
+        return self.games.get_item(Key={'id': game_id}).get('Item')
+
+    def delete_game(self, game_id):
+        self.writer.delete(GAMES_TABLE, {'id': game_id})
+
+    def list_games(self, cache, cursor=None):
+        """Cached dashboard page; returns (items, next_cursor)"""
+        return game_listing.list_games(functools.partial(game_listing.query_page, self.games), cache, cursor)
+
+    def write_stats(self):
+        return self.writer.stats()
+
+    def close(self):
+        """Flush queued writes before shutdown"""
+        if 'writer' in self.__dict__:
+            self.writer.close()
+
+    # Results
+
+    def save_results(self, items):
+        """Queue a finished game's items, waiting for room while the write queue is full"""
+        for item in items:
+            self.writer.put(RESULTS_TABLE, {'pk': item['pk'], 'sk': item['sk']}, item, timeout=None)
+
+    def game_results(self, game_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+        """Play-throughs of a game, newest first"""
+        return self._query_results(game_history.game_key(game_id), cursor, limit, newest_first=True)
+
+    def run_results(self, run_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+        """Players of one play-through in placement order"""
+        return self._query_results(game_history.run_key(run_id), cursor, limit)
+
+    def player_history(self, name, cursor=None, limit=HISTORY_PAGE_SIZE):
+        """A player's games, newest first"""
+        return self._query_results(game_history.player_key(name), cursor, limit, newest_first=True)
+
+    def save_leaderboard(self, boards):
+        """Queue a leaderboard snapshot; the head is written after its chunks"""
+        items, stale = boards.snapshot_items()
+        for item in items:
+            self.writer.put(RESULTS_TABLE, {'pk': item['pk'], 'sk': item['sk']}, item, timeout=None)
+        for key in stale:
+            self.writer.delete(RESULTS_TABLE, key, timeout=None)
+        return len(items)
+
+    def add_question_stats(self, rows):
+        """Add [(question_id, counters)] to the questions' stats items in one transaction"""
+        self.client.transact_write_items(TransactItems=[
+            answer_stats.update_action(RESULTS_TABLE, question_id, row) for question_id, row in rows])
+
+    def load_leaderboard(self):
+        """Leaderboards rebuilt from the latest snapshot, or empty ones"""
+        head = self.results.get_item(Key={'pk': leaderboard.SNAPSHOT_KEY, 'sk': 'HEAD'}).get('Item')
+        if head is None:
+            return leaderboard.Leaderboards()
+        head = plain(head)
+        from boto3.dynamodb.conditions import Key
+
+        params = {'KeyConditionExpression': Key('pk').eq(f"{leaderboard.SNAPSHOT_KEY}#{head['version']}")}
+        rows = []
+        while True:
+            response = self.results.query(**params)
+            for item in response['Items']:
+                rows.extend(plain(item['rows']))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return leaderboard.Leaderboards.from_rows(rows, head['version'], head['chunks'])
+
+    def _query_results(self, pk, cursor, limit, newest_first=False):
+        from boto3.dynamodb.conditions import Key
+
+        params = {
+            'KeyConditionExpression': Key('pk').eq(pk),
+            'ScanIndexForward': not newest_first,
+            'Limit': max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        }
+        start_key = game_listing.decode_cursor(cursor, ('pk', 'sk'))
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        response = self.results.query(**params)
+        items = [plain(item) for item in response['Items']]
+        return items, game_listing.encode_cursor(response.get('LastEvaluatedKey'))
+
+    # Questions
+
+    def all_questions(self):
+        """Every question, following scan pagination"""
+        return self._scan(self.questions)
+
+    def has_questions(self):
+        return bool(self.questions.scan(Limit=1)['Items'])
+
+    def add_question(self, item, overwrite=True):
+        """Store a question; with overwrite=False an existing id is left alone"""
+        if overwrite:
+            self.questions.put_item(Item=item)
+            return True
+        try:
+            self.questions.put_item(Item=item, ConditionExpression='attribute_not_exists(id)')
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def add_questions(self, items):
+        """Bulk load questions with batched writes"""
+        with self.questions.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def source_questions(self, table_name='trivia_questions_source'):
+        """Questions from the seed table, or [] if it is empty"""
+        source = self.resource.Table(table_name)
+        if not source.scan(Limit=1)['Items']:
+            return []
+        return self._scan(source)
+
+    def _scan(self, table):
+        response = table.scan()
+        items = response['Items']
+        while 'LastEvaluatedKey' in response:
+            response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+            items.extend(response['Items'])
+        return items
@@ -0,0 +1,83 @@
+"""
+Reconnect-with-resume tokens
+Each player gets a token when they join. If their socket drops, the slot is
+held for RESUME_GRACE_SECONDS; a reconnect presenting the token is rebound
+to the held slot instead of joining as a new player. Held slots that are not
+claimed in time expire and the player is removed as before.
+"""
+
+import os
+import secrets
+import threading
+
+RESUME_GRACE = float(os.getenv('RESUME_GRACE_SECONDS', '30'))
+SWEEP_INTERVAL = 1.0
+
+
+class ResumeTokens:
+    def __init__(self, grace=RESUME_GRACE):
+        self.grace = grace
+        self.lock = threading.Lock()
+        # token -> [game_id, sid]
+        self.by_token = {}
+        # sid -> token
+        self.token_of = {}
+        # token -> deadline, for disconnected players
+        self.held = {}
+
+    def issue(self, game_id, sid):
+        """Token a player can later resume with"""
+        token = secrets.token_urlsafe(16)
+        with self.lock:
+            old = self.token_of.pop(sid, None)
+            if old:
+                self.by_token.pop(old, None)
+            self.by_token[token] = [game_id, sid]
+            self.token_of[sid] = token
+        return token
+
+    def hold(self, sid, now):
+        """Keep a disconnected player's slot; returns False if they have no token"""
+        with self.lock:
+            token = self.token_of.pop(sid, None)
+            if token is None:
+                return False
+            self.held[token] = now + self.grace
+            return True
+
+    def claim(self, token, game_id, new_sid):
+        """Bind a token to a new sid; returns the sid it was bound to, or None"""
+        with self.lock:
+            entry = self.by_token.get(token)
+            if entry is None or entry[0] != game_id:
+                return None
+            old_sid = entry[1]
+            entry[1] = new_sid
+            self.held.pop(token, None)
+            self.token_of.pop(old_sid, None)
+            self.token_of[new_sid] = token
+            return old_sid
+
+    def expired(self, now):
+        """Pop held slots past their deadline; returns [(game_id, sid)]"""
+        with self.lock:
+            tokens = [token for token, deadline in self.held.items() if deadline <= now]
+            gone = []
+            for token in tokens:
+                del self.held[token]
+                gone.append(tuple(self.by_token.pop(token)))
+            return gone
+
+    def discard(self, sid):
+        with self.lock:
+            token = self.token_of.pop(sid, None)
+            if token:
+                self.by_token.pop(token, None)
+
+    def discard_game(self, game_id):
+        """Forget every token for a game that ended, stopped or was deleted"""
+        with self.lock:
+            for token in [t for t, entry in self.by_token.items() if entry[0] == game_id]:
+                _, sid = self.by_token.pop(token)
+                self.held.pop(token, None)
+                self.token_of.pop(sid, None)
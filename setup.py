@@ -23,8 +23,8 @@ def initialize_database():
     """Initialize DynamoDB tables"""
     print("Initializing DynamoDB tables...")
     try:
-        from app_dynamodb import init_dynamodb
-        init_dynamodb()
+        from app_dynamodb import init_storage
+        init_storage()
         print("Database initialized successfully")
     except Exception as e:
         print(f"Database initialization failed: {e}")
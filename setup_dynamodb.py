@@ -7,6 +7,9 @@ Run this once to create the DynamoDB tables
 import boto3
 import os
 
+import game_listing
+import repository
+
 def create_dynamodb_tables():
     """Create DynamoDB tables for trivia game"""
     dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-west-2'))
@@ -27,9 +30,11 @@ def create_dynamodb_tables():
         {
             'TableName': 'trivia_games',
             'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'}],
-            'AttributeDefinitions': [{'AttributeName': 'id', 'AttributeType': 'S'}],
+            'AttributeDefinitions': [{'AttributeName': 'id', 'AttributeType': 'S'}] + game_listing.GAMES_INDEX_ATTRIBUTES,
+            'GlobalSecondaryIndexes': [game_listing.GAMES_INDEX_DEFINITION],
             'BillingMode': 'PAY_PER_REQUEST'
-        }
+        },
+        repository.RESULTS_TABLE_DEFINITION
     ]
     
     for table_config in tables_to_create:
@@ -41,6 +46,8 @@ def create_dynamodb_tables():
         except dynamodb.meta.client.exceptions.ResourceInUseException:
             print(f"Table {table_config['TableName']} already exists")
     
+    game_listing.ensure_games_index(dynamodb)
+    
     print("All DynamoDB tables are ready!")
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Headless trivia game simulator
+Plays complete games against the rules engine on a virtual clock, so scoring
+rules can be tuned and regression tested without running the web server.
+
+Usage: python simulator.py --games 5000 --players 12 --accuracy 0.6 --workers 4
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+
+import game_engine
+from game_engine import GameState
+
+# Delays the server waits between phases (round start screen, next question)
+ROUND_START_DELAY = 8.0
+NEXT_QUESTION_DELAY = 3.0
+
+GameResult = namedtuple('GameResult', [
+    'winner', 'survivors', 'eliminations_by_round', 'questions_played',
+    'votes_cast', 'auto_votes', 'events', 'duration'
+])
+
+
+class VirtualClock:
+    """Clock that only moves when the simulation advances it"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+    def advance_to(self, timestamp):
+        self.now = max(self.now, timestamp)
+        return self.now
+
+
+def synthetic_questions(count=game_engine.ROUNDS * game_engine.QUESTIONS_PER_ROUND):
+    """Placeholder question bank with the same shape as questions.json"""
+    return [{
+        'id': str(i + 1),
+        'question': f'Question {i + 1}',
+        'option_a': f'Answer {i + 1}a',
+        'option_b': f'Answer {i + 1}b',
+        'option_c': f'Answer {i + 1}c',
+        'option_d': f'Answer {i + 1}d',
+        'correct_answer': game_engine.OPTIONS[i % 4]
+    } for i in range(count)]
+
+
+def _play_question(game, clock, rng, accuracy, answer_rate, vote_rate, counters):
+    """Run one question and its voting phase on the virtual clock"""
+    question = game.questions[game_engine.question_index(game)]
+    question_data = game_engine.prepare_question(game, question, rng)
+    if question_data is None:
+        return
+    game_engine.open_question(game, question_data, clock.now)
+    start = clock.now
+    correct = question_data['correct_answer']
+
+    # Each active player answers at some point in the window, or not at all
+    wrong = [o for o in game_engine.OPTIONS if o != correct]
+    active = game_engine.active_sids(game)
+    last_answer = 0.0
+    for sid in active:
+        if rng.random() >= answer_rate:
+            continue
+        answer = correct if rng.random() < accuracy else rng.choice(wrong)
+        at = rng.uniform(1.0, game_engine.QUESTION_TIME_LIMIT)
+        game_engine.record_answer(game, sid, answer, start + at)
+        last_answer = max(last_answer, at)
+
+    # The server closes the question early once everyone has answered
+    if len(game.answers) == len(active):
+        clock.advance_to(start + last_answer)
+    else:
+        clock.advance_to(start + game_engine.QUESTION_TIME_LIMIT)
+
+    counters['events'] += len(game_engine.close_question(game))
+
+    if game_engine.needs_voting(game):
+        counters['events'] += len(game_engine.open_voting(game, clock.now))
+        start = clock.now
+
+        voters = [(rng.uniform(1.0, game_engine.VOTING_TIME_LIMIT), p['sid'])
+                  for p in game.correct_players if rng.random() < vote_rate]
+        voters.sort()
+
+        for at, voter_sid in voters:
+            targets = game_engine.eligible_targets(game)
+            if not targets:
+                break
+            target_sid = rng.choice(targets)['sid']
+            accepted, events = game_engine.cast_vote(game, voter_sid, target_sid, start + at)
+            counters['events'] += len(events)
+            if accepted:
+                counters['votes'] += 1
+            if game_engine.voting_complete(game):
+                clock.advance_to(start + at)
+                break
+
+        if not game_engine.voting_complete(game):
+            clock.advance_to(start + game_engine.VOTING_TIME_LIMIT)
+            before = len(game.votes_cast)
+            counters['events'] += len(game_engine.auto_vote(game, clock.now, rng))
+            counters['auto_votes'] += len(game.votes_cast) - before
+            counters['votes'] += len(game.votes_cast) - before
+
+    counters['events'] += len(game_engine.close_voting(game))
+
+
+def simulate_game(num_players, rng=random, questions=None, rounds=game_engine.ROUNDS,
+                  accuracy=0.6, answer_rate=0.95, vote_rate=0.8):
+    """Play one full game and return a GameResult"""
+    clock = VirtualClock()
+    game = GameState('sim', 'Simulation', '')
+    game.questions = questions or synthetic_questions()
+    for i in range(num_players):
+        game.players[f'p{i}'] = game_engine.new_player(f'Player {i + 1}')
+    game.status = 'playing'
+
+    counters = {'events': 0, 'votes': 0, 'auto_votes': 0}
+    eliminations_by_round = [0] * rounds
+    questions_played = 0
+
+    for round_number in range(1, rounds + 1):
+        if game_engine.is_game_over(game):
+            break
+        counters['events'] += len(game_engine.start_round(game, round_number))
+        clock.advance(ROUND_START_DELAY)
+        active_before = len(game_engine.active_sids(game))
+
+        while not game_engine.is_game_over(game):
+            _play_question(game, clock, rng, accuracy, answer_rate, vote_rate, counters)
+            questions_played += 1
+            if game_engine.is_game_over(game):
+                break
+            clock.advance(NEXT_QUESTION_DELAY)
+            if game_engine.advance_question(game):
+                break
+
+        eliminations_by_round[round_number - 1] = active_before - len(game_engine.active_sids(game))
+
+    survivors = len(game_engine.active_sids(game))
+    events = game_engine.finish_game(game)
+    return GameResult(
+        winner=events[0].data['winner'],
+        survivors=survivors,
+        eliminations_by_round=eliminations_by_round,
+        questions_played=questions_played,
+        votes_cast=counters['votes'],
+        auto_votes=counters['auto_votes'],
+        events=counters['events'] + len(events),
+        duration=clock.now
+    )
+
+
+def _run_batch(games, num_players, seed, options):
+    """Simulate a batch of games and return summed counters"""
+    rng = random.Random(seed)
+    questions = options.pop('questions', None) or synthetic_questions()
+    totals = {
+        'decided': 0, 'survivors': 0, 'questions': 0, 'votes': 0,
+        'auto_votes': 0, 'events': 0, 'duration': 0.0,
+        'eliminations_by_round': [0] * options.get('rounds', game_engine.ROUNDS)
+    }
+
+    for _ in range(games):
+        result = simulate_game(num_players, rng, questions, **options)
+        totals['decided'] += result.survivors <= 1
+        totals['survivors'] += result.survivors
+        totals['questions'] += result.questions_played
+        totals['votes'] += result.votes_cast
+        totals['auto_votes'] += result.auto_votes
+        totals['events'] += result.events
+        totals['duration'] += result.duration
+        for i, count in enumerate(result.eliminations_by_round):
+            totals['eliminations_by_round'][i] += count
+
+    return totals
+
+
+def _run_batch_args(args):
+    return _run_batch(*args)
+
+
+def run(games, num_players, seed=None, workers=1, **options):
+    """Simulate many games and aggregate balance statistics"""
+    started = time.perf_counter()
+
+    if workers > 1:
+        import multiprocessing
+        base_seed = seed if seed is not None else random.randrange(2 ** 32)
+        batches = [(games // workers + (i < games % workers), num_players, base_seed + i, dict(options))
+                   for i in range(workers)]
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_run_batch_args, batches)
+    else:
+        results = [_run_batch(games, num_players, seed, dict(options))]
+
+    elapsed = time.perf_counter() - started
+
+    totals = results[0]
+    for other in results[1:]:
+        for key, value in other.items():
+            if key == 'eliminations_by_round':
+                totals[key] = [a + b for a, b in zip(totals[key], value)]
+            else:
+                totals[key] += value
+
+    return {
+        'games': games,
+        'players': num_players,
+        'elapsed': elapsed,
+        'games_per_second': games / elapsed if elapsed else float('inf'),
+        'decided_rate': totals['decided'] / games,
+        'avg_survivors': totals['survivors'] / games,
+        'avg_questions': totals['questions'] / games,
+        'avg_votes': totals['votes'] / games,
+        'auto_vote_rate': totals['auto_votes'] / totals['votes'] if totals['votes'] else 0.0,
+        'avg_events': totals['events'] / games,
+        'avg_duration_minutes': totals['duration'] / games / 60,
+        'avg_eliminations_by_round': [count / games for count in totals['eliminations_by_round']]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate trivia games on a virtual clock')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=12)
+    parser.add_argument('--rounds', type=int, default=game_engine.ROUNDS)
+    parser.add_argument('--accuracy', type=float, default=0.6, help='chance an answer is correct')
+    parser.add_argument('--answer-rate', type=float, default=0.95, help='chance a player answers in time')
+    parser.add_argument('--vote-rate', type=float, default=0.8, help='chance a voter votes before the timeout')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1, help='processes to spread games across')
+    args = parser.parse_args()
+
+    stats = run(args.games, args.players, seed=args.seed, workers=args.workers, rounds=args.rounds,
+                accuracy=args.accuracy, answer_rate=args.answer_rate, vote_rate=args.vote_rate)
+
+    print(f"Simulated {stats['games']} games with {stats['players']} players "
+          f"in {stats['elapsed']:.2f}s ({stats['games_per_second']:.0f} games/s)")
+    print(f"Decided before the end:  {stats['decided_rate']:.1%}")
+    print(f"Average survivors:       {stats['avg_survivors']:.2f}")
+    print(f"Average questions:       {stats['avg_questions']:.1f}")
+    print(f"Average votes:           {stats['avg_votes']:.1f} ({stats['auto_vote_rate']:.1%} auto)")
+    print(f"Average game length:     {stats['avg_duration_minutes']:.1f} virtual minutes")
+    for i, count in enumerate(stats['avg_eliminations_by_round']):
+        print(f"Round {i + 1} eliminations:    {count:.2f}")
+
+
+if __name__ == '__main__':
+    main()
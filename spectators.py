@@ -0,0 +1,122 @@
+"""
+Spectator tier
+Spectators follow a game without playing in it. Players move here when
+they are eliminated, and anyone can watch a game from /game/<id>/watch.
+They sit in the game's spectator room, which the per-event stream of
+answers, votes and score updates never reaches. Room events only mark the
+game as changed. Every SNAPSHOT_INTERVAL seconds each changed game with an
+audience gets one spectator_snapshot for the whole room: status, the open
+question without its answer, the last result and bounded standings. Events
+that change the screen for everyone (PASSTHROUGH) are still sent as they
+happen.
+
+A game costs its audience at most one emit per interval however many
+events it produces, so the number of spectators does not change how much
+the active players' emit lane carries.
+"""
+
+import os
+import threading
+
+import arena
+
+SNAPSHOT_INTERVAL = float(os.getenv('SPECTATOR_SNAPSHOT_SECONDS', '2.0'))
+# Room events spectators still get as they happen
+PASSTHROUGH = {'game_started', 'show_round_start', 'game_ended', 'game_cancelled', 'close_tab'}
+
+
+def room(game_id):
+    """Socket.IO room name for a game's spectators"""
+    return f'{game_id}:watch'
+
+
+def snapshot(game):
+    """Consolidated game state for spectators"""
+    state = {
+        'status': game.status,
+        'round': game.current_round,
+        'question': None,
+        'result': None,
+        'voting': None,
+        'standings': arena.standings(game)
+    }
+    if game.status != 'playing' or not game.question_data:
+        return state
+
+    if not game.question_expired:
+        state['question'] = {key: value for key, value in game.question_data.items() if key != 'correct_answer'}
+        return state
+    state['result'] = {
+        'round': game.question_data['round'],
+        'question_num': game.question_data['question_num'],
+        'question': game.question_data['question'],
+        'correct_answer': game.current_correct_answer,
+        'correct_count': len(game.correct_players),
+        'incorrect_count': len(game.incorrect_players)
+    }
+    if game.voting_active:
+        state['voting'] = {'deadline': game.voting_deadline, 'votes_cast': len(game.votes_cast)}
+    return state
+
+
+class SpectatorFeed:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # game_id -> sids in its spectator room, and sid -> game_id
+        self.audiences = {}
+        self.watching = {}
+        # Games with room events since their last snapshot
+        self.changed = set()
+        self.snapshots = 0
+        self.folded = 0
+
+    def add(self, game_id, sid):
+        with self.lock:
+            previous = self.watching.get(sid)
+            if previous is not None and previous != game_id:
+                self.audiences.get(previous, set()).discard(sid)
+            self.watching[sid] = game_id
+            self.audiences.setdefault(game_id, set()).add(sid)
+
+    def is_watching(self, game_id, sid):
+        with self.lock:
+            return self.watching.get(sid) == game_id
+
+    def forget(self, sid):
+        """Drop a sid; returns the game it was watching, or None"""
+        with self.lock:
+            game_id = self.watching.pop(sid, None)
+            if game_id is not None:
+                self.audiences.get(game_id, set()).discard(sid)
+            return game_id
+
+    def forget_game(self, game_id):
+        with self.lock:
+            for sid in self.audiences.pop(game_id, ()):
+                self.watching.pop(sid, None)
+            self.changed.discard(game_id)
+
+    def mark(self, game_id):
+        """Note a room event that the next snapshot will carry"""
+        with self.lock:
+            if self.audiences.get(game_id):
+                self.changed.add(game_id)
+                self.folded += 1
+
+    def due(self):
+        """Games to send a snapshot to, clearing their changed mark"""
+        with self.lock:
+            games = [game_id for game_id in self.changed if self.audiences.get(game_id)]
+            self.changed = set()
+            self.snapshots += len(games)
+            return games
+
+    def stats(self):
+        with self.lock:
+            return {
+                'interval': SNAPSHOT_INTERVAL,
+                'games': sum(1 for sids in self.audiences.values() if sids),
+                'spectators': len(self.watching),
+                'snapshots': self.snapshots,
+                'folded_events': self.folded
+            }
@@ -0,0 +1,370 @@
+"""
+SQLite repository
+The same interface as repository.Repository, on one embedded database file,
+for a venue running a single server with no network between it and its
+storage (STORAGE_BACKEND=sqlite). Items are stored as JSON documents under
+the keys the DynamoDB tables use, so game history, leaderboard snapshots
+and the dashboard listing work unchanged; per-question answer stats get a
+table of counters so a flush is one upsert per question. Questions are also
+indexed by difficulty and a random key, so with QUESTION_SOURCE=database a
+game is drawn by index seeks (sample_game) instead of from a loaded bank.
+
+The database runs in WAL mode with synchronous=NORMAL: readers never wait
+for the writer, and a commit appends to the log instead of syncing the
+database file. Connections are pooled and each keeps its statements
+prepared after first use, so a lookup is a cached statement and a B-tree
+probe. Writes take one lock, so concurrent handlers queue in the process
+instead of backing off on SQLITE_BUSY, and they are synchronous: at well
+under a millisecond there is nothing for a write-behind queue to hide.
+
+`python sqlite_repository.py` times the hot calls against a scratch database.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+import answer_stats
+import game_history
+import game_listing
+import leaderboard
+import question_bank
+import repository
+
+DATABASE_PATH = os.getenv('SQLITE_PATH', 'trivia.db')
+# File holding the seed questions, in place of the DynamoDB source table
+SOURCE_QUESTIONS = 'questions.json'
+# Prepared statements kept per connection
+STATEMENT_CACHE = 256
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS admins (username TEXT PRIMARY KEY, password TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS games (id TEXT PRIMARY KEY, created_at TEXT NOT NULL, item TEXT NOT NULL)',
+    # Dashboard pages, newest first
+    'CREATE INDEX IF NOT EXISTS games_created_at ON games (created_at, id)',
+    'CREATE TABLE IF NOT EXISTS questions (id TEXT PRIMARY KEY, difficulty TEXT NOT NULL, '
+    'sample_key REAL NOT NULL, item TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS results (pk TEXT NOT NULL, sk TEXT NOT NULL, item TEXT NOT NULL, '
+    'PRIMARY KEY (pk, sk)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS question_stats (question_id TEXT PRIMARY KEY, '
+    + ', '.join(f'{field} INTEGER NOT NULL DEFAULT 0' for field in answer_stats.FIELDS) + ')'
+]
+
+# Random draws seek to a point in a difficulty's keys
+SAMPLE_INDEX = 'CREATE INDEX IF NOT EXISTS questions_sample ON questions (difficulty, sample_key)'
+# Databases created before questions were indexed for sampling
+ADD_SAMPLE_COLUMNS = [
+    "ALTER TABLE questions ADD COLUMN difficulty TEXT NOT NULL DEFAULT 'medium'",
+    'ALTER TABLE questions ADD COLUMN sample_key REAL NOT NULL DEFAULT 0',
+    "UPDATE questions SET sample_key = random() / 18446744073709551616.0 + 0.5, difficulty = CASE "
+    "WHEN json_extract(item, '$.difficulty') IN ('easy', 'medium', 'hard') THEN json_extract(item, '$.difficulty') "
+    "ELSE 'medium' END"
+]
+
+GAMES_PAGE = 'SELECT id, created_at, item FROM games ORDER BY created_at DESC, id DESC LIMIT ?'
+GAMES_PAGE_AFTER = ('SELECT id, created_at, item FROM games WHERE (created_at, id) < (?, ?) '
+                    'ORDER BY created_at DESC, id DESC LIMIT ?')
+# (newest_first, after a cursor) -> query for a page of one results partition
+RESULTS_PAGE = {
+    (False, False): 'SELECT sk, item FROM results WHERE pk = ? ORDER BY sk LIMIT ?',
+    (False, True): 'SELECT sk, item FROM results WHERE pk = ? AND sk > ? ORDER BY sk LIMIT ?',
+    (True, False): 'SELECT sk, item FROM results WHERE pk = ? ORDER BY sk DESC LIMIT ?',
+    (True, True): 'SELECT sk, item FROM results WHERE pk = ? AND sk < ? ORDER BY sk DESC LIMIT ?'
+}
+# From the point to the end of a difficulty's keys, then from the start up to the point
+SAMPLE_FROM = [
+    'SELECT id FROM questions WHERE difficulty = ? AND sample_key >= ? ORDER BY sample_key LIMIT ?',
+    'SELECT id FROM questions WHERE difficulty = ? AND sample_key < ? ORDER BY sample_key LIMIT ?'
+]
+PUT_RESULT = 'INSERT OR REPLACE INTO results (pk, sk, item) VALUES (?, ?, ?)'
+ADD_STATS = (f"INSERT INTO question_stats (question_id, {', '.join(answer_stats.FIELDS)}) "
+             f"VALUES (?{', ?' * len(answer_stats.FIELDS)}) ON CONFLICT (question_id) DO UPDATE SET "
+             + ', '.join(f'{field} = {field} + excluded.{field}' for field in answer_stats.FIELDS))
+
+
+def dumps(item):
+    return json.dumps(item, separators=(',', ':'))
+
+
+def question_row(item):
+    return item['id'], question_bank.question_key(item)[1], random.random(), dumps(item)
+
+
+class SqliteRepository:
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self.pool = queue.SimpleQueue()
+        self.write_lock = threading.Lock()
+        self.committed = 0
+        self.failed = 0
+
+    def _open(self):
+        # Autocommit; writes open their own transactions
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE)
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """A pooled connection, opened if none is free"""
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            self.pool.put(conn)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """A connection inside one write transaction, committed on success"""
+        with self.write_lock, self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+                self.committed += 1
+            except Exception:
+                conn.execute('ROLLBACK')
+                self.failed += 1
+                raise
+
+    def _fetch(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def create_tables(self):
+        """Create missing tables and indexes"""
+        print(f"Opening SQLite database {self.path}", flush=True)
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            if 'sample_key' not in {row[1] for row in conn.execute('PRAGMA table_info(questions)')}:
+                for statement in ADD_SAMPLE_COLUMNS:
+                    conn.execute(statement)
+            conn.execute(SAMPLE_INDEX)
+
+    def write_stats(self):
+        # Writes are synchronous; there is no queue to report
+        return {'committed': self.committed, 'failed': self.failed}
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # Admins
+
+    def get_admin(self, username):
+        """Admin item or None"""
+        rows = self._fetch('SELECT username, password FROM admins WHERE username = ?', (username,))
+        return {'username': rows[0][0], 'password': rows[0][1]} if rows else None
+
+    def add_admin(self, username, password_hash):
+        """Create an admin unless one with the username exists; returns True if created"""
+        with self.transaction() as conn:
+            cursor = conn.execute('INSERT OR IGNORE INTO admins (username, password) VALUES (?, ?)',
+                                  (username, password_hash))
+            return cursor.rowcount == 1
+
+    # Games
+
+    def create_game(self, item):
+        """Insert a new game; raises repository.GameExists on an id clash"""
+        try:
+            with self.transaction() as conn:
+                conn.execute('INSERT INTO games (id, created_at, item) VALUES (?, ?, ?)',
+                             (item['id'], item['created_at'], dumps(item)))
+        except sqlite3.IntegrityError:
+            raise repository.GameExists(item['id'])
+
+    def get_game(self, game_id):
+        """Game item or None"""
+        rows = self._fetch('SELECT item FROM games WHERE id = ?', (game_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def delete_game(self, game_id):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM games WHERE id = ?', (game_id,))
+
+    def list_games(self, cache, cursor=None):
+        """Cached dashboard page; returns (items, next_cursor)"""
+        return game_listing.list_games(self._games_page, cache, cursor)
+
+    def _games_page(self, cursor, page_size):
+        start_key = game_listing.decode_cursor(cursor, ('id', 'created_at'))
+        if start_key:
+            rows = self._fetch(GAMES_PAGE_AFTER, (start_key['created_at'], start_key['id'], page_size))
+        else:
+            rows = self._fetch(GAMES_PAGE, (page_size,))
+        items = []
+        for _, _, item in rows:
+            item = json.loads(item)
+            # Only what the DynamoDB index projects, never the game password
+            items.append({key: item[key] for key in game_listing.LISTED_FIELDS if key in item})
+        last_key = {'id': rows[-1][0], 'created_at': rows[-1][1]} if len(rows) == page_size else None
+        return items, game_listing.encode_cursor(last_key)
+
+    # Results
+
+    def save_results(self, items):
+        with self.transaction() as conn:
+            conn.executemany(PUT_RESULT, [(item['pk'], item['sk'], dumps(item)) for item in items])
+
+    def game_results(self, game_id, cursor=None, limit=repository.HISTORY_PAGE_SIZE):
+        """Play-throughs of a game, newest first"""
+        return self._query_results(game_history.game_key(game_id), cursor, limit, newest_first=True)
+
+    def run_results(self, run_id, cursor=None, limit=repository.HISTORY_PAGE_SIZE):
+        """Players of one play-through in placement order"""
+        return self._query_results(game_history.run_key(run_id), cursor, limit)
+
+    def player_history(self, name, cursor=None, limit=repository.HISTORY_PAGE_SIZE):
+        """A player's games, newest first"""
+        return self._query_results(game_history.player_key(name), cursor, limit, newest_first=True)
+
+    def save_leaderboard(self, boards):
+        """Write a leaderboard snapshot and drop the previous one in one transaction"""
+        items, stale = boards.snapshot_items()
+        with self.transaction() as conn:
+            conn.executemany(PUT_RESULT, [(item['pk'], item['sk'], dumps(item)) for item in items])
+            conn.executemany('DELETE FROM results WHERE pk = ? AND sk = ?', [(key['pk'], key['sk']) for key in stale])
+        return len(items)
+
+    def add_question_stats(self, rows):
+        """Add [(question_id, counters)] to the questions' stats in one transaction"""
+        with self.transaction() as conn:
+            conn.executemany(ADD_STATS, [(question_id, *map(int, row)) for question_id, row in rows])
+
+    def load_leaderboard(self):
+        """Leaderboards rebuilt from the latest snapshot, or empty ones"""
+        head = self._fetch('SELECT item FROM results WHERE pk = ? AND sk = ?', (leaderboard.SNAPSHOT_KEY, 'HEAD'))
+        if not head:
+            return leaderboard.Leaderboards()
+        head = json.loads(head[0][0])
+        rows = []
+        for (item,) in self._fetch('SELECT item FROM results WHERE pk = ? ORDER BY sk',
+                                   (f"{leaderboard.SNAPSHOT_KEY}#{head['version']}",)):
+            rows.extend(json.loads(item)['rows'])
+        return leaderboard.Leaderboards.from_rows(rows, head['version'], head['chunks'])
+
+    def _query_results(self, pk, cursor, limit, newest_first=False):
+        limit = max(1, min(limit, repository.HISTORY_MAX_PAGE_SIZE))
+        start_key = game_listing.decode_cursor(cursor, ('pk', 'sk'))
+        if start_key:
+            rows = self._fetch(RESULTS_PAGE[newest_first, True], (pk, start_key['sk'], limit))
+        else:
+            rows = self._fetch(RESULTS_PAGE[newest_first, False], (pk, limit))
+        last_key = {'pk': pk, 'sk': rows[-1][0]} if len(rows) == limit else None
+        return [json.loads(item) for _, item in rows], game_listing.encode_cursor(last_key)
+
+    # Questions
+
+    def all_questions(self):
+        return [json.loads(item) for (item,) in self._fetch('SELECT item FROM questions')]
+
+    def has_questions(self):
+        return bool(self._fetch('SELECT 1 FROM questions LIMIT 1'))
+
+    def add_question(self, item, overwrite=True):
+        """Store a question; with overwrite=False an existing id is left alone"""
+        verb = 'INSERT OR REPLACE' if overwrite else 'INSERT OR IGNORE'
+        with self.transaction() as conn:
+            cursor = conn.execute(f'{verb} INTO questions (id, difficulty, sample_key, item) VALUES (?, ?, ?, ?)',
+                                  question_row(item))
+            return cursor.rowcount == 1
+
+    def add_questions(self, items):
+        with self.transaction() as conn:
+            conn.executemany('INSERT OR REPLACE INTO questions (id, difficulty, sample_key, item) VALUES (?, ?, ?, ?)',
+                             [question_row(item) for item in items])
+
+    def sample_game(self, rounds, per_round, rng=random):
+        """Questions for a game, each an index seek to a random key of its difficulty"""
+        with self.connection() as conn:
+            def take(difficulty, taken, point):
+                # One more row than is taken holds an undrawn question if the range has one
+                for sql in SAMPLE_FROM:
+                    for (question_id,) in conn.execute(sql, (difficulty, point, len(taken) + 1)):
+                        if question_id not in taken:
+                            return question_id
+                return None
+            ids = question_bank.sample_indexed(take, rounds, per_round, rng)
+            items = dict(conn.execute(f"SELECT id, item FROM questions WHERE id IN ({', '.join('?' * len(ids))})",
+                                      ids))
+        # A seek favours keys after wide gaps; fresh keys for the drawn questions even that out
+        try:
+            with self.transaction() as conn:
+                conn.executemany('UPDATE questions SET sample_key = ? WHERE id = ?',
+                                 [(rng.random(), question_id) for question_id in ids])
+        except sqlite3.Error as e:
+            print(f"Question sample keys not refreshed: {e}", flush=True)
+        return [json.loads(items[question_id]) for question_id in ids]
+
+    def source_questions(self, path=SOURCE_QUESTIONS):
+        """Questions from the seed file, numbered as setup_questions.py numbers them, or []"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                questions = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [dict(question, id=str(i + 1)) for i, question in enumerate(questions)]
+
+
+def benchmark(operations):
+    """Per-call cost of the hot repository calls on a scratch database"""
+    with tempfile.TemporaryDirectory() as directory:
+        repo = SqliteRepository(os.path.join(directory, 'bench.db'))
+        repo.create_tables()
+        repo.add_questions(repo.source_questions())
+        # A venue-sized bank, so sample_game is timed against more than one game's worth
+        repo.add_questions([{'id': f'bench-{i}', 'question': f'Question {i}', 'category': f'c{i % 20}',
+                             'difficulty': question_bank.DIFFICULTIES[i % 3]} for i in range(10000)])
+        for i in range(operations):
+            repo.create_game({'id': str(i), 'name': f'Game {i}', 'password': 'pw', 'mode': 'standard',
+                              'created_at': f'2026-01-01T00:00:{i:09d}', game_listing.INDEX_KEY: game_listing.INDEX_VALUE})
+        row = answer_stats.outcome_row(3, {'a': 3, 'b': 2}, [1.5, 4.0, 9.0])
+
+        calls = [
+            ('get_game', lambda i: repo.get_game(str(i))),
+            ('get_admin', lambda i: repo.get_admin('nobody')),
+            ('games page', lambda i: repo._games_page(None, game_listing.PAGE_SIZE)),
+            ('save_results (3 items)', lambda i: repo.save_results(
+                [{'pk': f'GAME#{i % 50}', 'sk': f'RUN#{i}#{n}', 'score': n} for n in range(3)])),
+            ('player_history', lambda i: repo.player_history(f'P{i % 50}')),
+            ('add_question_stats (10 questions)', lambda i: repo.add_question_stats(
+                [(str(n + 1), row) for n in range(10)])),
+            ('all_questions', lambda i: repo.all_questions()),
+            ('sample_game', lambda i: repo.sample_game(3, 15))
+        ]
+        for name, call in calls:
+            began = time.perf_counter()
+            for i in range(operations):
+                call(i)
+            print(f"{name}: {1e6 * (time.perf_counter() - began) / operations:.1f}us")
+        repo.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the SQLite repository calls')
+    parser.add_argument('--operations', type=int, default=2000)
+    args = parser.parse_args()
+    benchmark(args.operations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Pre-staged questions
+The next question is prepared and sent to players during idle time (the
+voting phase, the round start screen) encrypted under its own AES-GCM key.
+When the question starts only a small reveal carrying the key and the
+deadline is broadcast, so the question-start instant costs one tiny emit per
+room instead of the full payload.
+
+Players whose page cannot decrypt (WebCrypto needs a secure context) are
+sent the full question at start time as before, and a player that missed the
+staged copy asks for it with question_fetch. Staging is off without the
+cryptography package.
+"""
+
+import json
+import os
+import secrets
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    AESGCM = None
+
+AVAILABLE = AESGCM is not None
+NONCE_BYTES = 12
+
+
+class StagedQuestion:
+    def __init__(self, position, question_data):
+        self.seq = secrets.token_hex(4)
+        # (round, question) this payload was prepared for
+        self.position = position
+        self.question_data = question_data
+        self.key = AESGCM.generate_key(bit_length=128)
+        self.nonce = os.urandom(NONCE_BYTES)
+        self.blob = AESGCM(self.key).encrypt(self.nonce, json.dumps(question_data).encode(), None)
+
+    def staged(self):
+        """question_staged payload: the encrypted question"""
+        return {'seq': self.seq, 'nonce': self.nonce, 'blob': self.blob}
+
+    def reveal(self):
+        """question_reveal payload, once open_question has set the deadline"""
+        return {
+            'seq': self.seq,
+            'key': self.key,
+            'deadline': self.question_data['deadline'],
+            'time_limit': self.question_data['time_limit']
+        }
@@ -0,0 +1,129 @@
+"""
+Server startup
+Creating tables, seeding the admin and questions, loading the leaderboard
+snapshot and indexing the question bank all take DynamoDB round trips, and
+none of them is needed to serve the home page or to accept a socket. In the
+default lazy mode they run as warm-up steps on a background task once the
+server is listening, and /readyz reports 503 until they have finished, so a
+load balancer only sends games to the instance once it is warm. Anything
+used before its step has run (the repository client, the question bank) is
+built on first use. STARTUP_MODE=eager runs the steps before the server
+starts, as before.
+
+`python startup.py` starts app_dynamodb.py in each mode and prints the time
+until it answers its first request and until it reports ready.
+"""
+
+import argparse
+import os
+import pty
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+LAZY = 'lazy'
+EAGER = 'eager'
+MODE = os.getenv('STARTUP_MODE', LAZY)
+
+
+def serving_process(debug):
+    """False in the debug reloader's watcher process, which never serves requests"""
+    return not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+
+class Warmup:
+    def __init__(self, mode=MODE):
+        if mode not in (LAZY, EAGER):
+            raise ValueError(f"STARTUP_MODE must be {LAZY} or {EAGER}")
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.steps = []
+        self.timings = {}
+        self.errors = {}
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def add(self, name, step):
+        self.steps.append((name, step))
+
+    def run(self):
+        """Run every step in order; a failing step is reported and the rest still run"""
+        for name, step in self.steps:
+            began = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                print(f"ERROR in startup step {name}: {e}", flush=True)
+                with self.lock:
+                    self.errors[name] = str(e)
+            with self.lock:
+                self.timings[name] = round(time.perf_counter() - began, 3)
+        with self.lock:
+            self.finished_at = time.time()
+        print(f"Warm-up finished in {self.finished_at - self.started_at:.2f}s: {self.timings}", flush=True)
+
+    def done(self):
+        with self.lock:
+            return self.finished_at is not None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'mode': self.mode,
+                'done': self.finished_at is not None,
+                'seconds': round((self.finished_at or time.time()) - self.started_at, 3),
+                'steps': dict(self.timings),
+                'errors': dict(self.errors)
+            }
+
+
+def wait_for(url, deadline):
+    """Whether url answered 200 before the deadline"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.02)
+    return False
+
+
+def benchmark(modes, base_url, timeout):
+    for mode in modes:
+        env = dict(os.environ, STARTUP_MODE=mode)
+        began = time.perf_counter()
+        # Flask-SocketIO refuses to start the Werkzeug server without a terminal, so give it one.
+        # Own process group, so the debug reloader's child is stopped with it
+        terminal, stdin = pty.openpty()
+        server = subprocess.Popen([sys.executable, 'app_dynamodb.py'], env=env, start_new_session=True,
+                                  stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = began + timeout
+            results = []
+            for path in ('/', '/readyz'):
+                answered = wait_for(base_url + path, deadline)
+                results.append(f"{time.perf_counter() - began:.2f}s" if answered else 'timed out')
+            print(f"{mode}: first request {results[0]}, ready {results[1]}")
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+            os.close(terminal)
+            os.close(stdin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure time to first request and to ready')
+    parser.add_argument('--modes', nargs='+', default=[LAZY, EAGER], choices=[LAZY, EAGER])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args()
+    benchmark(args.modes, args.url, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+// Estimates the offset between this browser's clock and the server's, so
+// countdowns are drawn locally from the absolute deadlines in question and
+// voting payloads instead of trusting when the payload happened to arrive.
+const ServerClock = {
+    // Server time minus local time, in milliseconds
+    offset: 0,
+    bestRoundTrip: Infinity,
+
+    // Probe a few times on every (re)connect and keep the tightest round trip
+    sync(socket, samples = 4) {
+        const probe = remaining => {
+            const sent = Date.now();
+            socket.emit('clock_sync', {}, function(serverTime) {
+                const received = Date.now();
+                if (received - sent < ServerClock.bestRoundTrip) {
+                    ServerClock.bestRoundTrip = received - sent;
+                    ServerClock.offset = serverTime * 1000 - (sent + received) / 2;
+                }
+                if (remaining > 1) probe(remaining - 1);
+            });
+        };
+        socket.on('connect', function() {
+            ServerClock.bestRoundTrip = Infinity;
+            probe(samples);
+        });
+        return socket;
+    },
+
+    now() {
+        return Date.now() + ServerClock.offset;
+    },
+
+    // Whole seconds left until a server deadline given in epoch seconds
+    secondsLeft(deadline) {
+        return Math.max(0, Math.ceil((deadline * 1000 - ServerClock.now()) / 1000));
+    }
+};
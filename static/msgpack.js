@@ -0,0 +1,94 @@
+// MessagePack decoder for the compact wire format (see wire.js and wire.py).
+// Served from /static with the other scripts instead of a third-party CDN.
+// Only decoding is needed in the browser: clients never send MessagePack.
+// Covers the whole format except extension types, which the server never
+// writes.
+const MessagePack = (function() {
+    const utf8 = new TextDecoder();
+
+    function decode(bytes) {
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let pos = 0;
+
+        function take(length) {
+            if (pos + length > bytes.length) throw new RangeError('Truncated MessagePack data');
+            const start = pos;
+            pos += length;
+            return start;
+        }
+
+        function str(length) {
+            const start = take(length);
+            return utf8.decode(bytes.subarray(start, start + length));
+        }
+
+        function bin(length) {
+            const start = take(length);
+            return bytes.slice(start, start + length);
+        }
+
+        function array(length) {
+            const items = new Array(length);
+            for (let i = 0; i < length; i++) items[i] = value();
+            return items;
+        }
+
+        function map(length) {
+            const record = {};
+            for (let i = 0; i < length; i++) {
+                const key = value();
+                record[key] = value();
+            }
+            return record;
+        }
+
+        function uint64(start) {
+            return view.getUint32(start) * 4294967296 + view.getUint32(start + 4);
+        }
+
+        function value() {
+            const type = bytes[take(1)];
+            if (type < 0x80) return type;
+            if (type < 0x90) return map(type & 0x0f);
+            if (type < 0xa0) return array(type & 0x0f);
+            if (type < 0xc0) return str(type & 0x1f);
+            if (type >= 0xe0) return type - 0x100;
+            switch (type) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: return bin(bytes[take(1)]);
+                case 0xc5: return bin(view.getUint16(take(2)));
+                case 0xc6: return bin(view.getUint32(take(4)));
+                case 0xca: return view.getFloat32(take(4));
+                case 0xcb: return view.getFloat64(take(8));
+                case 0xcc: return bytes[take(1)];
+                case 0xcd: return view.getUint16(take(2));
+                case 0xce: return view.getUint32(take(4));
+                case 0xcf: return uint64(take(8));
+                case 0xd0: return view.getInt8(take(1));
+                case 0xd1: return view.getInt16(take(2));
+                case 0xd2: return view.getInt32(take(4));
+                case 0xd3: {
+                    const start = take(8);
+                    return view.getInt32(start) * 4294967296 + view.getUint32(start + 4);
+                }
+                case 0xd9: return str(bytes[take(1)]);
+                case 0xda: return str(view.getUint16(take(2)));
+                case 0xdb: return str(view.getUint32(take(4)));
+                case 0xdc: return array(view.getUint16(take(2)));
+                case 0xdd: return array(view.getUint32(take(4)));
+                case 0xde: return map(view.getUint16(take(2)));
+                case 0xdf: return map(view.getUint32(take(4)));
+            }
+            throw new TypeError(`Unsupported MessagePack type 0x${type.toString(16)}`);
+        }
+
+        const result = value();
+        if (pos !== bytes.length) throw new RangeError('Extra bytes after MessagePack value');
+        return result;
+    }
+
+    return { decode };
+})();
+window.MessagePack = MessagePack;
@@ -0,0 +1,49 @@
+// Receives the next question encrypted ahead of time (question_staged) and
+// shows it the moment the server broadcasts its key (question_reveal). If the
+// staged copy never arrived or does not decrypt, the question is fetched in
+// full with question_fetch. Clients without WebCrypto join without staging
+// and get every question in full, so they ignore the reveal.
+const Staging = {
+    // WebCrypto is only exposed to secure contexts
+    supported() {
+        return !!(window.crypto && window.crypto.subtle);
+    },
+
+    attach(socket, gameId, onQuestion) {
+        let staged = null;
+
+        // Binary fields arrive as ArrayBuffers
+        const bytes = data => new Uint8Array(data);
+
+        const fetchQuestion = () => socket.emit('question_fetch', {game_id: gameId});
+
+        socket.on('question_staged', function(data) {
+            staged = data;
+        });
+
+        socket.on('question_reveal', function(reveal) {
+            if (!Staging.supported()) {
+                return;
+            }
+            const current = staged;
+            staged = null;
+            if (!current || current.seq !== reveal.seq) {
+                fetchQuestion();
+                return;
+            }
+            crypto.subtle.importKey('raw', bytes(reveal.key), 'AES-GCM', false, ['decrypt'])
+                .then(key => crypto.subtle.decrypt({name: 'AES-GCM', iv: bytes(current.nonce)}, key, bytes(current.blob)))
+                .then(plain => {
+                    const question = JSON.parse(new TextDecoder().decode(plain));
+                    question.deadline = reveal.deadline;
+                    question.time_limit = reveal.time_limit;
+                    onQuestion(question);
+                })
+                .catch(error => {
+                    console.error('Staged question failed to decrypt:', error);
+                    fetchQuestion();
+                });
+        });
+        return socket;
+    }
+};
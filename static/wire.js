@@ -0,0 +1,46 @@
+// Rebuilds compact event payloads (MessagePack arrays laid out by the
+// schemas the server sends in wire_format) into the usual objects, so event
+// handlers see the same data whichever format was negotiated. See wire.py.
+const Wire = {
+    schemas: {},
+
+    // Formats this page can decode, offered with join_game and admin_join
+    formats() {
+        return window.MessagePack ? ['msgpack', 'json'] : ['json'];
+    },
+
+    attach(socket) {
+        const on = socket.on.bind(socket);
+        on('wire_format', function(hello) {
+            Wire.schemas = hello.schemas || {};
+        });
+        socket.on = function(name, handler) {
+            return on(name, data => handler(Wire.decode(name, data)));
+        };
+        return socket;
+    },
+
+    decode(name, data) {
+        const schema = Wire.schemas[name];
+        if (!schema || !(data instanceof ArrayBuffer)) return data;
+        return Wire.unpack(schema, MessagePack.decode(new Uint8Array(data)));
+    },
+
+    unpack(schema, values) {
+        const record = {};
+        schema.forEach((field, i) => {
+            const value = values[i];
+            if (value === null || value === undefined) return;
+            if (typeof field === 'string') {
+                record[field] = value;
+            } else if (field.each) {
+                record[field.key] = value.map(item => Wire.unpack(field.each, item));
+            } else {
+                record[field.key] = Wire.unpack(field.fields, value);
+            }
+        });
+        // Keys outside the schema travel in a trailing object
+        if (values.length > schema.length) Object.assign(record, values[schema.length]);
+        return record;
+    }
+};
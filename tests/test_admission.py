@@ -0,0 +1,23 @@
+import admission
+
+
+def test_recovers_when_timers_stop_firing():
+    controller = admission.AdmissionController(lag_limit=0.2, drift_limit=0.5, backlog_limit=100)
+    for _ in range(20):
+        controller.timer_fired(5.0)
+    assert not controller.ready()
+    assert not controller.admit()
+
+    # Load is gone and no game timer fires any more; only the probe keeps sampling
+    for _ in range(50):
+        controller.sample(0.0, 0)
+    assert controller.ready()
+    assert controller.admit()
+
+
+def test_drift_holds_while_timers_keep_firing_late():
+    controller = admission.AdmissionController(lag_limit=0.2, drift_limit=0.5, backlog_limit=100)
+    for _ in range(50):
+        controller.timer_fired(5.0)
+        controller.sample(0.0, 0)
+    assert not controller.ready()
@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+import answer_buffer
+from answer_buffer import AnswerBuffer
+
+
+def buffer_with(*sids):
+    buffer = AnswerBuffer(8)
+    for sid in sids:
+        buffer.assign(sid)
+    return buffer
+
+
+def test_partition_splits_active_players_and_counts_answers():
+    buffer = buffer_with('p1', 'p2', 'p3', 'p4')
+    buffer.submit('p1', 'a', 1.0)
+    buffer.submit('p2', 'b', 2.0)
+    buffer.submit('p3', 'a', 3.0)
+
+    correct, incorrect, counts = buffer.partition('a')
+
+    assert sorted(correct) == ['p1', 'p3']
+    assert sorted(incorrect) == ['p2', 'p4']
+    assert counts == {'a': 2, 'b': 1, 'c': 0, 'd': 0, 'no_answer': 1}
+    assert sorted(buffer.answer_times().tolist()) == [1.0, 2.0, 3.0]
+
+
+def test_duplicate_and_unknown_answers_are_refused():
+    buffer = buffer_with('p1')
+    assert buffer.submit('p1', 'a', 1.0)
+    assert not buffer.submit('p1', 'b', 1.5)
+    assert not buffer.submit('stranger', 'a', 1.0)
+    assert buffer.partition('a')[0] == ['p1']
+
+
+def test_full_batches_drain_into_the_arrays():
+    sids = [f'p{i}' for i in range(answer_buffer.BATCH_SIZE)]
+    buffer = AnswerBuffer(len(sids))
+    for sid in sids:
+        buffer.assign(sid)
+        buffer.submit(sid, 'c', 1.0)
+    assert buffer.pending == []
+    assert (buffer.choices == answer_buffer.OPTION_CODES['c']).all()
+    assert buffer.all_answered()
+
+
+def test_deactivated_players_are_left_out():
+    buffer = buffer_with('p1', 'p2')
+    buffer.submit('p1', 'a', 1.0)
+    buffer.deactivate('p2')
+
+    correct, incorrect, counts = buffer.partition('a')
+    assert (correct, incorrect, counts['no_answer']) == (['p1'], [], 0)
+    assert buffer.all_answered()
+
+
+def test_rebind_keeps_the_slot_and_its_answer():
+    buffer = buffer_with('old')
+    buffer.submit('old', 'd', 4.0)
+    slot = buffer.rebind('old', 'new')
+
+    assert slot == 0
+    assert buffer.has_answered('new')
+    assert not buffer.submit('new', 'a', 5.0)
+    assert buffer.partition('d')[0] == ['new']
+    assert buffer.rebind('old', 'other') is None
+
+
+def test_release_drops_a_buffered_answer():
+    buffer = buffer_with('p1')
+    buffer.submit('p1', 'a', 1.0)
+    buffer.release('p1')
+    buffer.assign('p2')
+
+    correct, incorrect, counts = buffer.partition('a')
+    assert (correct, incorrect) == ([], ['p2'])
+    assert counts['a'] == 0
+
+
+def test_partition_waits_for_a_drain_in_flight(monkeypatch):
+    buffer = buffer_with('p1')
+    buffer.submit('p1', 'a', 1.0)
+    fromiter = np.fromiter
+    results = []
+    threads = []
+
+    def partition_mid_drain(*args, **kwargs):
+        # The question timer closes the question while a batch is being written
+        if not threads:
+            thread = threading.Thread(target=lambda: results.append(buffer.partition('a')))
+            threads.append(thread)
+            thread.start()
+            thread.join(0.2)
+        return fromiter(*args, **kwargs)
+
+    monkeypatch.setattr(answer_buffer.np, 'fromiter', partition_mid_drain)
+    buffer.drain()
+    threads[0].join(5)
+
+    correct, incorrect, counts = results[0]
+    assert (correct, incorrect) == (['p1'], [])
+    assert counts['no_answer'] == 0
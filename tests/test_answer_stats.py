@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+from botocore.awsrequest import AWSResponse
+
+import answer_stats
+import repository
+
+
+class RawBody:
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def test_stats_flush_serializes_plain_values(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    repo = repository.Repository('us-west-2')
+    sent = []
+
+    def capture(request, **kwargs):
+        sent.append(json.loads(request.body))
+        return AWSResponse(request.url, 200, {}, RawBody(b'{}'))
+
+    repo.client.meta.events.register('before-send.dynamodb.TransactWriteItems', capture)
+
+    row = answer_stats.outcome_row(1, {'A': 1, 'B': 1}, np.array([1.5, 7.0]))
+    repo.add_question_stats([('q1', row)])
+
+    update = sent[0]['TransactItems'][0]['Update']
+    assert update['TableName'] == repository.RESULTS_TABLE
+    assert update['Key'] == {'pk': {'S': 'QUESTION#q1'}, 'sk': {'S': 'STATS'}}
+    values = update['ExpressionAttributeValues']
+    assert values[':players'] == {'N': '2'}
+    assert values[':correct'] == {'N': '1'}
+    assert values[':time_total_ms'] == {'N': '8500'}
+    assert ':no_answer' not in values
@@ -0,0 +1,85 @@
+import random
+
+import game_engine
+from game_engine import ROOM
+
+
+def game_with(*names, round_number=1):
+    game = game_engine.GameState('g1', 'Test', 'pw')
+    game.status = 'playing'
+    game.current_round = round_number
+    for name in names:
+        game_engine.add_player(game, name, name)
+    return game
+
+
+def ask(game, answers, correct='a', now=0.0):
+    game_engine.open_question(game, {'correct_answer': correct}, now)
+    for sid, answer in answers.items():
+        game_engine.record_answer(game, sid, answer, now)
+    return game_engine.close_question(game)
+
+
+def test_close_question_counts_missing_answers_as_incorrect():
+    game = game_with('p1', 'p2', 'p3')
+    [result] = ask(game, {'p1': 'a', 'p2': 'b'})
+
+    assert result.to == ROOM
+    assert [p['sid'] for p in result.data['correct_players']] == ['p1']
+    assert sorted(p['sid'] for p in result.data['incorrect_players']) == ['p2', 'p3']
+    assert game.voting_active and game_engine.needs_voting(game)
+
+
+def test_answers_after_the_deadline_and_grace_are_rejected():
+    game = game_with('p1')
+    game_engine.open_question(game, {'correct_answer': 'a'}, 0.0)
+    late = game.question_deadline + game_engine.DEADLINE_GRACE + 0.1
+
+    accepted, events = game_engine.record_answer(game, 'p1', 'a', late)
+    assert not accepted
+    assert events[0].name == 'answer_rejected'
+    assert game_engine.record_answer(game, 'p1', 'a', game.question_deadline)[0]
+
+
+def test_votes_stop_at_the_per_question_cap():
+    game = game_with('c1', 'c2', 'c3', 'x', round_number=3)
+    ask(game, {'c1': 'a', 'c2': 'a', 'c3': 'a', 'x': 'b'})
+
+    accepted, _ = game_engine.cast_vote(game, 'c1', 'x', 0.0)
+    assert accepted and game.players['x']['score'] == 3
+    accepted, events = game_engine.cast_vote(game, 'c2', 'x', 0.0)
+    assert not accepted
+    assert events[0].name == 'vote_failed'
+    assert game_engine.cast_vote(game, 'c1', 'x', 0.0)[1][0].data['message'] == 'You have already voted'
+
+
+def test_reaching_the_elimination_score_eliminates():
+    game = game_with('c1', 'x', round_number=2)
+    game.players['x']['score'] = game_engine.ELIMINATION_SCORE - 1
+    ask(game, {'c1': 'a', 'x': 'b'})
+
+    accepted, events = game_engine.cast_vote(game, 'c1', 'x', 5.0)
+    assert accepted
+    assert game.players['x']['score'] == game_engine.ELIMINATION_SCORE
+    assert game.players['x']['eliminated'] and game.players['x']['eliminated_at'] == 5.0
+    assert 'player_eliminated' in [event.name for event in events]
+    assert game_engine.is_game_over(game)
+
+
+def test_auto_votes_fill_every_pending_voter_within_the_caps():
+    game = game_with('c1', 'c2', 'c3', 'x', 'y')
+    ask(game, {'c1': 'a', 'c2': 'a', 'c3': 'a', 'x': 'b', 'y': 'c'})
+    game_engine.cast_vote(game, 'c1', 'x', 0.0)
+
+    events = game_engine.auto_vote(game, 0.0, random.Random(7))
+    assert set(game.votes_cast) == {'c1', 'c2', 'c3'}
+    assert all(points <= game_engine.MAX_POINTS_PER_QUESTION for points in game.points_awarded.values())
+    assert sum(1 for event in events if event.name == 'vote_recorded') == 2
+
+
+def test_round_ends_after_its_last_question():
+    game = game_with('p1')
+    game.current_question = game_engine.QUESTIONS_PER_ROUND - 2
+    assert not game_engine.advance_question(game)
+    assert game_engine.advance_question(game)
+    assert game_engine.upcoming_position(game) == (2, 0)
@@ -0,0 +1,26 @@
+import game_engine
+import game_history
+
+
+def test_player_who_joins_a_running_game_is_recorded():
+    game = game_engine.GameState('g1', 'Test', 'pw')
+    game_engine.add_player(game, 'early', 'Early')
+    game.status = 'playing'
+    game.current_round = 1
+    recorder = game_history.GameRecorder(game, 100.0)
+    recorder.record_round(game)
+
+    game.current_round = 2
+    game_engine.add_player(game, 'late', 'Late')
+    recorder.add_player('late', 'Late')
+    recorder.record_question(game, ['late'], ['early'])
+    game.players['early']['score'] = 3
+    recorder.record_round(game)
+
+    items = recorder.finish(game.players, 'Late', 200.0)
+    rows = {item['name']: item for item in items if item['pk'] == game_history.run_key(recorder.run_id)}
+    assert rows['Late']['placement'] == 1
+    assert rows['Late']['round_scores'] == [None, 0]
+    assert rows['Late']['correct'] == 1
+    assert rows['Early']['round_scores'] == [0, 3]
+    assert any(item['pk'] == game_history.player_key('Late') for item in items)
@@ -0,0 +1,74 @@
+import game_engine
+import lifecycle
+
+
+def make_games(*ids, status='waiting'):
+    games = {}
+    for game_id in ids:
+        games[game_id] = game_engine.GameState(game_id, game_id, 'pw')
+        games[game_id].status = status
+    return games
+
+
+def fixed_size(total):
+    return lambda game: {'total': total}
+
+
+def test_ended_and_idle_games_are_evicted():
+    tracker = lifecycle.GameTracker(idle_ttl=100, ended_ttl=10, budget=10 ** 9)
+    games = make_games('ended', 'idle', 'fresh')
+    for game_id in games:
+        tracker.touch(game_id, 0)
+    tracker.touch('ended', 50)
+    tracker.ended('ended', 50)
+    tracker.touch('fresh', 90)
+
+    assert tracker.to_evict(games, 55, fixed_size(1)) == []
+    assert tracker.to_evict(games, 100, fixed_size(1)) == [('idle', 'idle'), ('ended', 'ended')]
+
+
+def test_restarted_game_is_no_longer_treated_as_ended():
+    tracker = lifecycle.GameTracker(idle_ttl=100, ended_ttl=10, budget=10 ** 9)
+    games = make_games('g1')
+    tracker.touch('g1', 0)
+    tracker.ended('g1', 0)
+    tracker.restarted('g1')
+    assert tracker.to_evict(games, 50, fixed_size(1)) == []
+
+
+def test_games_never_touched_count_as_active_now():
+    tracker = lifecycle.GameTracker(idle_ttl=100, ended_ttl=10, budget=10 ** 9)
+    games = make_games('g1')
+    assert tracker.to_evict(games, 1000, fixed_size(1)) == []
+    assert tracker.to_evict(games, 1100, fixed_size(1)) == [('g1', 'idle')]
+
+
+def test_memory_budget_evicts_least_recently_active_games_not_playing():
+    tracker = lifecycle.GameTracker(idle_ttl=1000, ended_ttl=1000, budget=250)
+    games = make_games('oldest', 'older', 'newer', 'newest')
+    games['oldest'].status = 'playing'
+    for when, game_id in enumerate(games):
+        tracker.touch(game_id, when)
+
+    # 400 bytes against a budget of 250: skip the game being played, drop the next two
+    assert tracker.to_evict(games, 10, fixed_size(100)) == [('older', 'memory'), ('newer', 'memory')]
+
+
+def test_forgotten_games_start_over():
+    tracker = lifecycle.GameTracker(idle_ttl=100, ended_ttl=10, budget=10 ** 9)
+    games = make_games('g1')
+    tracker.touch('g1', 0)
+    tracker.ended('g1', 0)
+    tracker.forget('g1')
+    assert tracker.to_evict(games, 50, fixed_size(1)) == []
+
+
+def test_game_memory_counts_each_part_once():
+    game = make_games('g1')['g1']
+    for i in range(50):
+        game_engine.add_player(game, f'sid{i}', f'Player {i}')
+    usage = lifecycle.game_memory(game)
+
+    assert usage['players'] > 0
+    assert usage['total'] == sum(value for part, value in usage.items() if part != 'total')
+    assert lifecycle.game_memory(make_games('g2')['g2'])['players'] < usage['players']
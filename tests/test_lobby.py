@@ -0,0 +1,106 @@
+import game_engine
+import lobby
+
+
+def lobby_game(*names, mode=game_engine.STANDARD):
+    game = game_engine.GameState('g1', 'Test', 'pw', mode)
+    for name in names:
+        game_engine.add_player(game, f'sid-{name}', name)
+    return game
+
+
+def delta(events):
+    [event] = events
+    assert (event.name, event.to) == ('lobby_delta', game_engine.ROOM)
+    return event.data
+
+
+def test_player_who_joins_and_leaves_in_one_window_is_sent_as_left():
+    game = lobby_game()
+    feed = lobby.LobbyFeed()
+    player = game_engine.add_player(game, 'sid-p', 'P')
+    assert feed.join(player)
+
+    # A client that asks for a snapshot now sees the player
+    snapshot = feed.state(game)
+    assert [entry['id'] for entry in snapshot['players']] == [player['id']]
+
+    del game.players['sid-p']
+    assert not feed.leave(player)
+    update = delta(feed.flush(game))
+    assert update['version'] == snapshot['version'] + 1
+    assert (update['joined'], update['left']) == ([], [player['id']])
+
+
+def test_reset_lets_the_next_change_schedule_a_flush():
+    game = lobby_game('A')
+    feed = lobby.LobbyFeed()
+    assert feed.join(game.players['sid-A'])
+    # The game is stopped before the pending flush has run
+    feed.reset()
+
+    assert feed.join(game.players['sid-A'])
+    assert delta(feed.flush(game))['joined'][0]['name'] == 'A'
+
+
+def test_changes_in_a_window_coalesce_into_one_versioned_delta():
+    game = lobby_game('A', 'B', 'C')
+    feed = lobby.LobbyFeed()
+    scheduled = [feed.join(player) for player in game.players.values()]
+    assert scheduled == [True, False, False]
+
+    update = delta(feed.flush(game))
+    assert update['version'] == 1
+    assert [entry['name'] for entry in update['joined']] == ['A', 'B', 'C']
+    assert update['total_players'] == 3
+
+    # The next change opens a new window with the next version
+    assert feed.leave(game.players.pop('sid-B'))
+    update = delta(feed.flush(game))
+    assert update['version'] == 2
+    assert update['left'] == [2]
+    assert update['total_players'] == 2
+
+
+def test_flush_with_nothing_queued_keeps_the_version():
+    game = lobby_game('A')
+    feed = lobby.LobbyFeed()
+    assert feed.flush(game) == []
+    assert feed.state(game)['version'] == 0
+
+
+def test_rejoin_in_the_same_window_is_a_join():
+    game = lobby_game('A')
+    feed = lobby.LobbyFeed()
+    player = game.players['sid-A']
+    feed.leave(player)
+    feed.join(player)
+
+    update = delta(feed.flush(game))
+    assert (update['left'], [entry['id'] for entry in update['joined']]) == ([], [player['id']])
+
+
+def test_snapshot_matches_the_version_clients_continue_from():
+    game = lobby_game('A', 'B')
+    feed = lobby.LobbyFeed()
+    for player in game.players.values():
+        feed.join(player)
+    feed.flush(game)
+
+    snapshot = feed.state(game)
+    assert snapshot['version'] == 1
+    assert [entry['name'] for entry in snapshot['players']] == ['A', 'B']
+    assert set(snapshot['players'][0]) == {'id', 'name', 'score', 'eliminated', 'readonly'}
+
+    feed.reset()
+    assert feed.state(game)['version'] == 2
+
+
+def test_arena_lobbies_only_update_the_admin():
+    game = lobby_game('A', 'B', mode=game_engine.ARENA)
+    feed = lobby.LobbyFeed()
+    feed.join(game.players['sid-B'])
+
+    [event] = feed.flush(game)
+    assert (event.name, event.to) == ('player_joined', game_engine.ADMIN)
+    assert event.data['total_players'] == 2
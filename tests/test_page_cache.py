@@ -0,0 +1,28 @@
+from werkzeug.http import parse_accept_header
+
+import assets
+import page_cache
+
+
+def accept(header):
+    return parse_accept_header(header)
+
+
+def test_choose_encoding_skips_refused_encodings():
+    available = {'br', 'gzip'}
+    assert page_cache.choose_encoding(available, accept('gzip, br')) == 'br'
+    assert page_cache.choose_encoding(available, accept('br;q=0, gzip')) == 'gzip'
+    assert page_cache.choose_encoding(available, accept('gzip;q=0')) is None
+    assert page_cache.choose_encoding(available, accept('gzip;q=0, *')) == 'br'
+    assert page_cache.choose_encoding(available, accept('')) is None
+
+
+def test_asset_select_skips_refused_encodings():
+    manifest = assets.AssetManifest()
+    manifest.files = {'app.1234.js': {'etag': '1234', 'encodings': ['br', 'gzip']}}
+
+    assert manifest.select('app.1234.js', accept('br, gzip'))[2] == 'br'
+    path, _, encoding, etag = manifest.select('app.1234.js', accept('br;q=0, gzip'))
+    assert (path, encoding, etag) == ('app.1234.js.gz', 'gzip', '1234-gzip')
+    assert manifest.select('app.1234.js', accept('br;q=0, gzip;q=0'))[2:] == (None, '1234')
+    assert manifest.select('missing.js', accept('gzip')) is None
@@ -0,0 +1,66 @@
+import json
+import random
+import sqlite3
+
+import question_bank
+import sqlite_repository
+
+
+def repository(tmp_path, questions):
+    repo = sqlite_repository.SqliteRepository(str(tmp_path / 'trivia.db'))
+    repo.create_tables()
+    repo.add_questions(questions)
+    return repo
+
+
+def bank(count):
+    return [{'id': str(i), 'difficulty': question_bank.DIFFICULTIES[i % 3]} for i in range(count)]
+
+
+def test_sampled_game_has_no_repeats_and_follows_the_round_mix(tmp_path):
+    repo = repository(tmp_path, bank(300))
+    rng = random.Random(7)
+    counts = {round_number: dict.fromkeys(question_bank.DIFFICULTIES, 0) for round_number in (1, 3)}
+    for _ in range(40):
+        picked = repo.sample_game(3, 10, rng)
+        assert len(picked) == 30
+        assert len({question['id'] for question in picked}) == 30
+        for round_number in counts:
+            for question in picked[(round_number - 1) * 10:round_number * 10]:
+                counts[round_number][question['difficulty']] += 1
+    assert counts[1]['easy'] > counts[1]['hard']
+    assert counts[3]['hard'] > counts[3]['easy']
+    repo.close()
+
+
+def test_small_bank_falls_back_to_other_difficulties_then_ends_short(tmp_path):
+    repo = repository(tmp_path, [{'id': str(i), 'difficulty': 'hard'} for i in range(4)])
+    picked = repo.sample_game(3, 10, random.Random(1))
+    assert sorted(question['id'] for question in picked) == ['0', '1', '2', '3']
+    repo.close()
+
+
+def test_drawn_questions_get_fresh_sample_keys(tmp_path):
+    repo = repository(tmp_path, bank(30))
+    before = dict(repo._fetch('SELECT id, sample_key FROM questions'))
+    picked = {question['id'] for question in repo.sample_game(1, 5, random.Random(3))}
+    after = dict(repo._fetch('SELECT id, sample_key FROM questions'))
+    assert {question_id for question_id in after if after[question_id] != before[question_id]} == picked
+    repo.close()
+
+
+def test_questions_table_from_before_sampling_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE questions (id TEXT PRIMARY KEY, item TEXT NOT NULL)')
+    conn.executemany('INSERT INTO questions VALUES (?, ?)', [
+        ('1', json.dumps({'id': '1', 'difficulty': 'hard'})),
+        ('2', json.dumps({'id': '2', 'difficulty': 'unknown'}))])
+    conn.commit()
+    conn.close()
+
+    repo = sqlite_repository.SqliteRepository(path)
+    repo.create_tables()
+    assert dict(repo._fetch('SELECT id, difficulty FROM questions')) == {'1': 'hard', '2': 'medium'}
+    assert len(repo.sample_game(1, 2, random.Random(2))) == 2
+    repo.close()
@@ -0,0 +1,76 @@
+from collections import Counter
+
+import numpy as np
+
+import game_engine
+import vote_allocator
+
+
+def voting_game(correct, incorrect, round_number=1, scores=None):
+    game = game_engine.GameState('g1', 'Test', 'pw')
+    game.current_round = round_number
+    scores = scores or {}
+    for sid in correct + incorrect:
+        game_engine.add_player(game, sid, sid)['score'] = scores.get(sid, 0)
+    game.correct_players = [{'sid': sid, 'name': sid} for sid in correct]
+    game.incorrect_players = [{'sid': sid, 'name': sid} for sid in incorrect]
+    game.voting_active = True
+    return game
+
+
+def points_by_target(assignments):
+    totals = Counter()
+    for _, target, points in assignments:
+        totals[target] += points
+    return totals
+
+
+def test_votes_spread_one_level_at_a_time():
+    game = voting_game([f'c{i}' for i in range(4)], ['x', 'y'])
+    assignments = vote_allocator.allocate(game, np.random.default_rng(1))
+
+    assert sorted(voter for voter, _, _ in assignments) == ['c0', 'c1', 'c2', 'c3']
+    assert points_by_target(assignments) == {'x': 2, 'y': 2}
+
+
+def test_per_question_cap_limits_votes():
+    # Round 3 votes are worth 3 points, so a second vote would pass the cap of 4
+    game = voting_game([f'c{i}' for i in range(5)], ['x', 'y'], round_number=3)
+    assignments = vote_allocator.allocate(game, np.random.default_rng(2))
+
+    assert len(assignments) == 2
+    assert points_by_target(assignments) == {'x': 3, 'y': 3}
+
+
+def test_elimination_headroom_caps_points():
+    game = voting_game(['c0', 'c1', 'c2'], ['x', 'y'], round_number=2,
+                       scores={'x': game_engine.ELIMINATION_SCORE - 1, 'y': game_engine.ELIMINATION_SCORE})
+    assignments = vote_allocator.allocate(game, np.random.default_rng(3))
+
+    assert assignments == [(assignments[0][0], 'x', 1)]
+
+
+def test_points_already_awarded_count_towards_the_cap():
+    game = voting_game(['c0', 'c1', 'c2', 'c3'], ['x'])
+    game.votes_cast = {'c0': 'x'}
+    game.points_awarded = {'x': game_engine.MAX_POINTS_PER_QUESTION - 1}
+    assignments = vote_allocator.allocate(game, np.random.default_rng(4))
+
+    assert len(assignments) == 1
+    assert assignments[0][0] != 'c0'
+    assert points_by_target(assignments) == {'x': 1}
+
+
+def test_matches_the_engine_allocation_totals():
+    scores = {'x': 0, 'y': 7, 'z': 9}
+    for round_number in (1, 2, 3):
+        game = voting_game([f'c{i}' for i in range(9)], ['x', 'y', 'z'], round_number, scores)
+        vectorized = vote_allocator.allocate(game, np.random.default_rng(5))
+        engine = game_engine.allocate_auto_votes(game)
+        assert points_by_target(vectorized) == points_by_target(engine)
+        assert len(vectorized) == len(engine)
+
+
+def test_nothing_to_allocate_without_voters_or_targets():
+    assert vote_allocator.allocate(voting_game([], ['x'])) == []
+    assert vote_allocator.allocate(voting_game(['c0'], [])) == []
@@ -0,0 +1,61 @@
+"""
+Vectorized auto-vote allocation
+Assigns every correct player who didn't vote to a target in one pass over
+NumPy arrays, using the same policy as game_engine.allocate_auto_votes:
+votes are handed out level by level so they spread evenly and randomly over
+the incorrect players, without breaking the per-question cap or pushing a
+score past the elimination threshold.
+"""
+
+import numpy as np
+
+import game_engine
+
+
+def allocate(game, rng=None):
+    """Return (voter_sid, target_sid, points) for every pending voter that can vote"""
+    rng = rng or np.random.default_rng()
+    players = game.players
+
+    voters = game_engine.pending_voters(game)
+    sids = [p['sid'] for p in game.incorrect_players if p['sid'] in players]
+    if not voters or not sids:
+        return []
+
+    headroom = game_engine.ELIMINATION_SCORE - np.fromiter(
+        (players[sid]['score'] for sid in sids), dtype=np.int64, count=len(sids))
+    round_points = np.fromiter(
+        (game.points_awarded.get(sid, 0) for sid in sids), dtype=np.int64, count=len(sids))
+    per_vote = game_engine.points_per_vote(game.current_round)
+
+    # One slot per further vote each target can take; every vote is worth at
+    # least a point, so there are at most MAX_POINTS_PER_QUESTION levels
+    slot_targets = []
+    slot_points = []
+    slot_levels = []
+    open_targets = headroom > 0
+    for level in range(game_engine.MAX_POINTS_PER_QUESTION):
+        award = np.minimum(per_vote, headroom)
+        open_targets &= (headroom > 0) & (round_points + award <= game_engine.MAX_POINTS_PER_QUESTION)
+        idx = np.flatnonzero(open_targets)
+        if not len(idx):
+            break
+        slot_targets.append(idx)
+        slot_points.append(award[idx])
+        slot_levels.append(np.full(len(idx), level))
+        round_points[idx] += award[idx]
+        headroom[idx] -= award[idx]
+
+    if not slot_targets:
+        return []
+
+    slot_targets = np.concatenate(slot_targets)
+    slot_points = np.concatenate(slot_points)
+    slot_levels = np.concatenate(slot_levels)
+
+    # Fill lower levels first, random order within a level
+    order = np.lexsort((rng.random(len(slot_targets)), slot_levels))[:len(voters)]
+    voter_order = rng.permutation(len(voters))[:len(order)]
+
+    return [(voters[v], sids[t], int(points))
+            for v, t, points in zip(voter_order, slot_targets[order], slot_points[order])]
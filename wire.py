@@ -0,0 +1,162 @@
+"""
+Compact Socket.IO payloads
+The hottest broadcasts (new_question, question_result, score_update,
+admin_player_list) can be sent as MessagePack-encoded arrays laid out by a
+fixed schema per event instead of JSON objects, so key names are not
+repeated for every player and sids the clients never read are dropped.
+
+A client offers the formats it can decode when it joins; the server answers
+with the chosen format and, for msgpack, the schemas the client needs to
+rebuild the objects. Without the msgpack package, or for clients that do not
+offer it, everything stays JSON. Each client also joins a per-format subroom
+of its game room so a broadcast is encoded once per format.
+
+Schemas are lists of fields. A field is a key, {'key', 'fields'} for a nested
+object or {'key', 'each'} for a list of objects. Top-level keys missing from
+the schema travel in a trailing extras object; nested objects keep only the
+schema fields. Clients drop null values when rebuilding an object.
+
+WebSocket frames are further compressed by the transport: simple-websocket
+negotiates permessage-deflate with browsers that offer it.
+"""
+
+import argparse
+import json
+import time
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+FORMATS = [MSGPACK, JSON] if msgpack else [JSON]
+
+PLAYER_FIELDS = ['id', 'name', 'score', 'eliminated', 'readonly', 'eliminated_at']
+STANDINGS = [{'key': 'players', 'each': PLAYER_FIELDS}, 'total_players', 'active_players', 'eliminated_players']
+
+SCHEMAS = {
+    'new_question': ['round', 'question_num', 'question', {'key': 'options', 'fields': ['a', 'b', 'c', 'd']},
+                     'correct_answer', 'time_limit', 'deadline'],
+    'question_result': ['correct_answer', {'key': 'correct_players', 'each': ['name']},
+                        {'key': 'incorrect_players', 'each': ['name']},
+                        'correct_count', 'incorrect_count', 'answer_counts'],
+    'score_update': STANDINGS,
+    'admin_player_list': STANDINGS
+}
+
+
+def negotiate(offered):
+    """First server-supported format the client offered, JSON by default"""
+    for fmt in FORMATS:
+        if fmt in (offered or ()):
+            return fmt
+    return JSON
+
+
+def hello(fmt):
+    """Negotiation result sent back to the client"""
+    if fmt == MSGPACK:
+        return {'format': MSGPACK, 'schemas': SCHEMAS}
+    return {'format': JSON}
+
+
+def room(base, fmt):
+    """Per-format subroom of a game or shard room"""
+    return f'{base}#{fmt}'
+
+
+def is_compact(name):
+    return msgpack is not None and name in SCHEMAS
+
+
+def _pack_fields(schema, record):
+    values = []
+    for field in schema:
+        if isinstance(field, str):
+            values.append(record.get(field))
+            continue
+        value = record.get(field['key'])
+        if value is None:
+            values.append(None)
+        elif 'each' in field:
+            values.append([_pack_fields(field['each'], item) for item in value])
+        else:
+            values.append(_pack_fields(field['fields'], value))
+    return values
+
+
+def pack(schema, payload):
+    """Schema-ordered arrays for a payload, with unknown top-level keys as extras"""
+    values = _pack_fields(schema, payload)
+    known = {field if isinstance(field, str) else field['key'] for field in schema}
+    extras = {key: value for key, value in payload.items() if key not in known}
+    if extras:
+        values.append(extras)
+    return values
+
+
+def encode(name, payload):
+    """MessagePack bytes for an event payload"""
+    return msgpack.packb(pack(SCHEMAS[name], payload))
+
+
+def sample_payloads(players):
+    """Representative payloads for a game of the given size"""
+    sids = [f'{i:04d}AbCdEfGhIjKlMnOp' for i in range(players)]
+    roster = [{'id': i + 1, 'name': f'Player {i + 1}', 'score': (i * 37) % 500, 'eliminated': i % 5 == 0,
+               'readonly': False, 'eliminated_at': 1700000000.123 + i if i % 5 == 0 else None}
+              for i in range(players)]
+    half = players // 2
+    return {
+        'new_question': {'round': 2, 'question_num': 7, 'question': 'Who is known as the Kingslayer?',
+                         'options': {'a': 'Jaime Lannister', 'b': 'Bronn', 'c': 'Sandor Clegane',
+                                     'd': 'Brienne of Tarth'}, 'correct_answer': 'a'},
+        'question_result': {'correct_answer': 'a',
+                            'correct_players': [{'sid': s, 'name': p['name']} for s, p in zip(sids[:half], roster)],
+                            'incorrect_players': [{'sid': s, 'name': p['name']}
+                                                  for s, p in zip(sids[half:], roster[half:])]},
+        'score_update': {'players': roster},
+        'admin_player_list': {'players': roster}
+    }
+
+
+def deflated_size(body):
+    """Size after raw deflate, roughly what permessage-deflate puts on the socket"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return len(compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+
+def benchmark(players, repeat):
+    """Bytes and encode time per event, JSON against schema-packed msgpack"""
+    if msgpack is None:
+        print("msgpack is not installed; only JSON is available")
+        return
+    print(f"{players} players, {repeat} encodes per event")
+    for name, payload in sample_payloads(players).items():
+        began = time.perf_counter()
+        for _ in range(repeat):
+            text = json.dumps(payload, separators=(',', ':')).encode()
+        json_time = (time.perf_counter() - began) / repeat
+        began = time.perf_counter()
+        for _ in range(repeat):
+            binary = encode(name, payload)
+        binary_time = (time.perf_counter() - began) / repeat
+        deflated = [deflated_size(body) for body in (text, binary)]
+        print(f"  {name:18s} json {len(text):6d}B {1e6 * json_time:6.1f}us   "
+              f"msgpack {len(binary):6d}B {1e6 * binary_time:6.1f}us   "
+              f"deflated {deflated[0]:5d}B / {deflated[1]:5d}B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON and compact event payloads')
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+    benchmark(args.players, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
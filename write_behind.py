@@ -0,0 +1,168 @@
+"""
+Write-behind persistence
+Non-critical DynamoDB writes are queued and flushed by a background thread
+with BatchWriteItem, either when a full batch is waiting or when the oldest
+write has waited FLUSH_INTERVAL. Writes to the same key are coalesced so a
+batch never holds duplicate keys. Failed batches are retried with
+exponential backoff, producers block briefly when the queue is full, and
+close() drains what is left on shutdown.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+
+# BatchWriteItem accepts at most 25 requests
+BATCH_SIZE = 25
+FLUSH_INTERVAL = 0.5
+MAX_PENDING = 10000
+PUT_TIMEOUT = 2.0
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 0.1
+BACKOFF_MAX = 5.0
+
+
+class QueueFull(Exception):
+    """The write queue stayed full for PUT_TIMEOUT"""
+
+
+class WriteBehindQueue:
+    def __init__(self, client, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_pending=MAX_PENDING):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        # (table, key) -> (request, enqueued_at), oldest first
+        self.pending = OrderedDict()
+        self.inflight_since = None
+        self.cond = threading.Condition()
+        self.closing = False
+
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+
+        self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self.thread.start()
+
+    def put(self, table, key, item, timeout=PUT_TIMEOUT):
+        """Queue a put of item, whose primary key is key
+
+        Blocks for up to timeout seconds while the queue is full (forever if
+        timeout is None), then raises QueueFull.
+        """
+        self._enqueue(table, key, {'PutRequest': {'Item': item}}, timeout)
+
+    def delete(self, table, key, timeout=PUT_TIMEOUT):
+        self._enqueue(table, key, {'DeleteRequest': {'Key': key}}, timeout)
+
+    def _enqueue(self, table, key, request, timeout):
+        ident = (table, tuple(sorted(key.items())))
+        with self.cond:
+            if self.closing:
+                raise QueueFull('write queue is shutting down')
+            if ident in self.pending:
+                # Latest write wins but keeps its place and age in the queue
+                self.pending[ident] = (request, self.pending[ident][1])
+                return
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while len(self.pending) >= self.max_pending:
+                if self.closing:
+                    raise QueueFull('write queue is shutting down')
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise QueueFull(f'{len(self.pending)} writes pending')
+                self.cond.wait(remaining)
+            self.pending[ident] = (request, time.monotonic())
+            if len(self.pending) >= self.batch_size:
+                self.cond.notify_all()
+
+    def flush_lag(self):
+        """Seconds the oldest unwritten write has been waiting"""
+        with self.cond:
+            oldest = self.inflight_since
+            if self.pending:
+                queued = next(iter(self.pending.values()))[1]
+                oldest = queued if oldest is None else min(oldest, queued)
+        return 0.0 if oldest is None else time.monotonic() - oldest
+
+    def stats(self):
+        with self.cond:
+            depth = len(self.pending)
+        return {
+            'pending': depth,
+            'flush_lag': round(self.flush_lag(), 3),
+            'written': self.written,
+            'failed': self.failed,
+            'retries': self.retries
+        }
+
+    def close(self, timeout=10.0):
+        """Stop accepting writes and wait for the queue to drain"""
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+        if self.pending:
+            print(f"Write queue closed with {len(self.pending)} writes unflushed", flush=True)
+
+    def _next_batch(self):
+        """Block until a batch is due; returns [] once closed and drained"""
+        with self.cond:
+            while True:
+                if self.pending:
+                    age = time.monotonic() - next(iter(self.pending.values()))[1]
+                    if self.closing or len(self.pending) >= self.batch_size or age >= self.flush_interval:
+                        break
+                    self.cond.wait(self.flush_interval - age)
+                elif self.closing:
+                    return []
+                else:
+                    self.cond.wait()
+
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                ident, (request, enqueued_at) = self.pending.popitem(last=False)
+                batch.append((ident[0], request, enqueued_at))
+            self.inflight_since = min(entry[2] for entry in batch)
+            # Producers blocked on a full queue can continue
+            self.cond.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._write(batch)
+            with self.cond:
+                self.inflight_since = None
+
+    def _write(self, batch):
+        request_items = {}
+        for table, request, _ in batch:
+            request_items.setdefault(table, []).append(request)
+
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = self.client.batch_write_item(RequestItems=request_items)
+                unprocessed = response.get('UnprocessedItems') or {}
+            except Exception as e:
+                print(f"Write batch failed (attempt {attempt + 1}): {e}", flush=True)
+                unprocessed = request_items
+
+            sent = sum(len(requests) for requests in request_items.values())
+            left = sum(len(requests) for requests in unprocessed.values())
+            self.written += sent - left
+            if not left:
+                return
+
+            request_items = unprocessed
+            self.retries += 1
+            time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+
+        self.failed += left
+        print(f"Dropping {left} writes after {MAX_ATTEMPTS} attempts: {request_items}", flush=True)